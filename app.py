@@ -1,17 +1,18 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-# Import UI modules
-from ui.document_management import render_document_management
-from ui.analysis_tab import render_analysis_tab
-from ui.extraction_tab import render_extraction_tab
-from ui.comparison_tab import render_comparison_tab
-from ui.dashboard_tab import render_dashboard_tab
+# UI modules pull in LangChain, FAISS, PyMuPDF, pandas and Plotly, so each tab
+# is imported the first time it renders rather than before the first paint
+from utils.lazy_loading import load_attribute, start_background_warmup
 
 # Import config
-from config import APP_TITLE, APP_DESCRIPTION
+from config import APP_TITLE, APP_DESCRIPTION, BACKGROUND_WARMUP, TRACE_PROMETHEUS_FILE, PROFILE_ENABLED, WORKSPACE_SNAPSHOT_PATH
+from modules.document_registry import sync_session_documents, get_session_id
+from modules.jobs import apply_finished_jobs
+from modules.tracing import get_tracer
+from utils.profiling import profile_block
+from ui.profile_view import render_profile_summary
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +27,8 @@ def init_session_state():
         st.session_state.comparison_mode = False
     if 'extracted_data' not in st.session_state:
         st.session_state.extracted_data = {}
+    if 'applied_jobs' not in st.session_state:
+        st.session_state.applied_jobs = set()
 
 def setup_page():
     """Setup page configuration"""
@@ -66,6 +69,18 @@ def render_sidebar():
     7. Generate future financial projections
     """)
 
+    # Save or restore the whole workspace
+    render_workspace_snapshot()
+
+    # Shared document memory across all sessions
+    render_document_memory()
+
+    # Latency per pipeline stage
+    render_stage_latency()
+
+    # cProfile/tracemalloc toggle and the last profiled rerun
+    render_profiler()
+
     # Display Gemini model information
     st.sidebar.markdown("---")
     st.sidebar.subheader("Model Information")
@@ -82,11 +97,116 @@ def render_sidebar():
     pip install langchain-google-genai
     """)
 
+def render_workspace_snapshot():
+    """Render save and restore controls for workspace snapshots"""
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Workspace")
+    snapshot_path = st.sidebar.text_input("Snapshot file", value=WORKSPACE_SNAPSHOT_PATH)
+
+    col1, col2 = st.sidebar.columns(2)
+    save_clicked = col1.button("Save", disabled=not st.session_state.processed_docs)
+    restore_clicked = col2.button("Restore")
+
+    if save_clicked:
+        from modules.workspace import save_snapshot
+        try:
+            stats = save_snapshot(snapshot_path, st.session_state)
+            st.sidebar.success(f"Saved ({stats['written']} changed, {stats['unchanged']} unchanged)")
+        except (ValueError, OSError) as e:
+            st.sidebar.error(f"Error saving workspace: {e}")
+
+    if restore_clicked:
+        from modules.workspace import load_snapshot
+        try:
+            result = load_snapshot(snapshot_path, st.session_state)
+            st.sidebar.success(f"Restored {result['documents']} documents, {result['extracted']} metric sets "
+                               f"and {result['answers']} answers")
+            if result['missing']:
+                st.sidebar.warning(f"Indexes not found, process again: {', '.join(result['missing'])}")
+        except (ValueError, OSError) as e:
+            st.sidebar.error(f"Error restoring workspace: {e}")
+
+def render_document_memory():
+    """Render resident memory of shared document indexes"""
+    registry = sync_session_documents(st.session_state)
+    doc_stats = registry.stats()
+    if not doc_stats:
+        return
+
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Document Memory")
+    for doc in doc_stats:
+        location = f"{doc['bytes'] / (1024 * 1024):.1f} MB in memory" if doc['resident'] else "on disk"
+        st.sidebar.caption(f"{doc['label']}: {location}, {doc['sessions']} session(s)")
+
+    used_mb = registry.resident_bytes() / (1024 * 1024)
+    budget_mb = registry.memory_budget_bytes / (1024 * 1024)
+    st.sidebar.progress(min(used_mb / budget_mb, 1.0) if budget_mb else 0.0)
+    st.sidebar.caption(f"{used_mb:.1f} / {budget_mb:.0f} MB shared index budget")
+
+def render_stage_latency():
+    """Render p50/p95 latency per traced stage and the main counters"""
+    tracer = get_tracer()
+    stage_stats = tracer.stage_stats()
+    if not stage_stats:
+        return
+
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Stage Latency")
+    st.sidebar.table([
+        {
+            'Stage': name,
+            'Count': stats['count'],
+            'p50 (ms)': round(stats['p50'] * 1000, 1),
+            'p95 (ms)': round(stats['p95'] * 1000, 1)
+        }
+        for name, stats in stage_stats.items()
+    ])
+
+    counters = tracer.counters()
+    if counters:
+        st.sidebar.caption(", ".join(f"{name.replace('_', ' ')}: {value}" for name, value in sorted(counters.items())))
+    gauges = tracer.gauges()
+    if gauges:
+        st.sidebar.caption(", ".join(f"{name.replace('_', ' ')}: {value}" for name, value in sorted(gauges.items())))
+
+    if st.sidebar.button("Export Prometheus metrics"):
+        st.sidebar.success(f"Written to {tracer.write_prometheus(TRACE_PROMETHEUS_FILE)}")
+
+def render_profiler():
+    """Render the profiling toggle and hotspots of the last profiled rerun"""
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Profiler")
+    if PROFILE_ENABLED:
+        st.sidebar.caption("Profiling every rerun and ingest job (FINSIGHT_PROFILE=1)")
+    else:
+        st.sidebar.checkbox("Profile reruns and ingest jobs", key="profile_enabled",
+                            help="Records cProfile and tracemalloc data; adds overhead while enabled")
+
+    if st.session_state.get('last_profile'):
+        with st.sidebar.expander("Last profiled rerun"):
+            render_profile_summary(st.session_state.last_profile)
+
+def profiling_enabled():
+    """Whether reruns and ingest jobs should be profiled"""
+    return PROFILE_ENABLED or st.session_state.get('profile_enabled', False)
+
+def run():
+    """Run one Streamlit rerun, profiled when the profiler is switched on"""
+    with profile_block('rerun', profiling_enabled()) as profile:
+        main()
+    # Shown in the sidebar on the next rerun
+    if profile is not None:
+        st.session_state.last_profile = profile
+
 def main():
     """Main application function"""
     # Initialize session state
     init_session_state()
     
+    # Pick up documents and metrics from background jobs that finished since the last rerun
+    apply_finished_jobs(st.session_state, get_session_id())
+    
     # Setup page
     setup_page()
     
@@ -96,6 +216,7 @@ def main():
     # Only proceed if we have an API key
     if api_key:
         # Configure Gemini API
+        import google.generativeai as genai
         genai.configure(api_key=api_key)
         
         # Create tabs for the main interface
@@ -109,24 +230,28 @@ def main():
         
         # Render each tab
         with tab1:
-            render_document_management()
+            load_attribute('ui.document_management', 'render_document_management')()
         
         # Only show the other tabs if we have processed documents
         if st.session_state.processed_docs and st.session_state.current_doc:
             with tab2:
-                render_analysis_tab()
+                load_attribute('ui.analysis_tab', 'render_analysis_tab')()
             
             with tab3:
-                render_extraction_tab()
+                load_attribute('ui.extraction_tab', 'render_extraction_tab')()
             
             with tab4:
-                render_comparison_tab()
+                load_attribute('ui.comparison_tab', 'render_comparison_tab')()
             
             with tab5:
-                render_dashboard_tab()
+                load_attribute('ui.dashboard_tab', 'render_dashboard_tab')()
+        
+        # Load the remaining heavy modules while the user reads the first page
+        if BACKGROUND_WARMUP:
+            start_background_warmup()
     
     # Render sidebar
     render_sidebar()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run()
\ No newline at end of file
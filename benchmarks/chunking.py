@@ -0,0 +1,119 @@
+"""Compare the layout-aware chunker with the recursive character splitter.
+
+Reports chunk counts, embedded tokens (a proxy for embedding cost), how many
+statement tables survive in one piece and the retrieval hit rate for
+ground-truth metric questions on synthetic filings:
+
+    python -m benchmarks.chunking --docs 4 --pages 30
+    python -m benchmarks.chunking --output chunking.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+def recursive_chunks(file_path, doc_info):
+    """The previous splitter: PyPDFLoader pages cut into 800/200 character windows"""
+    from langchain.document_loaders import PyPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from config import CHUNK_SIZE, CHUNK_OVERLAP
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=["\n\n", "\n", ".", " ", ""],
+        length_function=len
+    )
+    return splitter.split_documents(PyPDFLoader(file_path).load())
+
+def layout_chunks(file_path, doc_info):
+    from modules.chunking import chunk_pdf
+    return chunk_pdf(file_path, doc_info)
+
+CHUNKERS = {
+    'recursive': recursive_chunks,
+    'layout': layout_chunks
+}
+
+def hit_rate(chunks, manifest_entry, k):
+    """Share of metric questions whose top-k chunks contain the ground-truth value"""
+    from langchain.vectorstores import FAISS
+    from modules.stubs import StubEmbeddings
+
+    vectorstore = FAISS.from_documents(chunks, StubEmbeddings())
+    hits = 0
+    for metric, value in manifest_entry['metrics'].items():
+        number = value.replace('$', '').replace(' million', '')
+        question = f"What was {metric} for fiscal year {manifest_entry['year']}?"
+        retrieved = vectorstore.similarity_search(question, k=k)
+        hits += any(number in doc.page_content for doc in retrieved)
+    return hits / len(manifest_entry['metrics'])
+
+def intact_tables(chunks):
+    """Table headers seen, and how many share a chunk with every metric row"""
+    from benchmarks.synthetic import METRICS
+
+    headers, intact = 0, 0
+    for chunk in chunks:
+        for table in chunk.page_content.split("(in millions)")[1:]:
+            headers += 1
+            intact += all(name in table for name, _ in METRICS)
+    return headers, intact
+
+def compare_chunkers(manifest, k):
+    """Chunk every filing with each chunker and score the result"""
+    from modules.document_analyzer import detect_document_type
+    from modules.tracing import estimate_tokens
+
+    results = {}
+    for name, chunker in CHUNKERS.items():
+        chunk_count, tokens, seconds, hit_rates, tables, tables_intact = 0, 0, 0.0, [], 0, 0
+        for entry in manifest:
+            doc_info = detect_document_type(entry['path'])
+            start_time = time.perf_counter()
+            chunks = chunker(entry['path'], doc_info)
+            seconds += time.perf_counter() - start_time
+            chunk_count += len(chunks)
+            tokens += sum(estimate_tokens(c.page_content) for c in chunks)
+            hit_rates.append(hit_rate(chunks, entry, k))
+            headers, intact = intact_tables(chunks)
+            tables += headers
+            tables_intact += intact
+        results[name] = {
+            'chunks': chunk_count,
+            'embedded_tokens': tokens,
+            'chunking_seconds': round(seconds, 4),
+            'intact_tables': round(tables_intact / tables, 3) if tables else None,
+            'hit_rate': round(sum(hit_rates) / len(hit_rates), 3)
+        }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare chunkers on synthetic filings")
+    parser.add_argument("--docs", type=int, default=4, help="Number of synthetic filings")
+    parser.add_argument("--pages", type=int, default=30, help="Pages per filing")
+    parser.add_argument("--tables-per-page", type=int, default=2, help="Statement tables on each statement page")
+    parser.add_argument("--k", type=int, default=2, help="Chunks retrieved per question")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    os.environ["FINSIGHT_LLM_BACKEND"] = "stub"
+    from benchmarks.synthetic import generate_corpus
+    manifest = generate_corpus(tempfile.mkdtemp(prefix="finsight-chunking-"), args.docs,
+                               pages=args.pages, tables_per_page=args.tables_per_page, seed=11)
+
+    results = compare_chunkers(manifest, args.k)
+    print(f"{'chunker':<10} {'chunks':>8} {'tokens':>9} {'seconds':>9} {'intact tables':>14} {'hit rate@' + str(args.k):>12}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['chunks']:>8} {result['embedded_tokens']:>9} "
+              f"{result['chunking_seconds']:>9.3f} {result['intact_tables'] or 0:>14.3f} {result['hit_rate']:>12.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'docs': args.docs, 'pages': args.pages, 'k': args.k, 'results': results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
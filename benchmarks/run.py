@@ -0,0 +1,213 @@
+"""Offline benchmark of ingestion, retrieval, extraction, comparison and projections.
+
+Runs against synthetic filings with the deterministic stub backend, so no
+network access or API key is needed:
+
+    python -m benchmarks.run --sizes 1 4 12 --output benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --max-regression 20
+    python -m benchmarks.run --llm-latency-ms 800 --embedding-latency-ms 150   # approximate API round trips
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+
+QUESTIONS = [
+    "What was total revenue for the fiscal year?",
+    "How much net income did the company report?",
+    "What are the main risk factors?",
+    "What were cash and cash equivalents at year end?",
+    "How did operating income change compared to the prior year?"
+]
+
+def configure_environment(workdir, embedding_latency_ms, llm_latency_ms):
+    """Point the app at the stub backend and throwaway caches; must run before app modules are imported"""
+    os.environ["FINSIGHT_LLM_BACKEND"] = "stub"
+    os.environ["FINSIGHT_STUB_EMBEDDING_LATENCY_MS"] = str(embedding_latency_ms)
+    os.environ["FINSIGHT_STUB_LLM_LATENCY_MS"] = str(llm_latency_ms)
+    os.environ["FINSIGHT_VECTORSTORE_CACHE_DIR"] = os.path.join(workdir, "vectorstores")
+    os.environ["FINSIGHT_JOBS_DIR"] = os.path.join(workdir, "jobs")
+    os.environ["FINSIGHT_SEARCH_INDEX"] = os.path.join(workdir, "search", "pages.sqlite")
+    os.environ["FINSIGHT_TRACE_FILE"] = ""
+
+    # process_single_document uses st.spinner, which warns when run outside `streamlit run`
+    import streamlit.logger
+    from streamlit import config as streamlit_config
+    streamlit_config.set_option("global.showWarningOnDirectExecution", False)
+    streamlit.logger.set_log_level("error")
+
+def _stage(items, unit, seconds):
+    return {
+        'items': items,
+        'unit': unit,
+        'seconds': round(seconds, 4),
+        'per_item_ms': round(seconds / items * 1000, 3) if items else 0.0
+    }
+
+def benchmark_corpus(manifest, n_questions):
+    """Time each pipeline stage over one corpus"""
+    from modules.document_registry import get_document_registry, file_content_hash
+    from modules.search_index import get_search_index
+    from modules.document_processor import process_single_document
+    from modules.qa_chain import create_qa_chain
+    from modules.data_extraction import extract_standardized_financials, compare_documents
+    from modules.prediction import predict_future_performance
+    from modules.forecasting import panel_records_from_extracted_data, build_metric_panel, fit_panel_models
+
+    results = {}
+
+    # Drop indexes from earlier repeats so ingestion is measured cold
+    registry = get_document_registry()
+    for entry in manifest:
+        registry.forget(file_content_hash(entry['path']))
+        get_search_index().forget(file_content_hash(entry['path']))
+    
+    # Ingestion: parse, split, embed and index every filing
+    documents = {}
+    start_time = time.perf_counter()
+    for entry in manifest:
+        vectorstore, file_info, num_pages, doc_index = process_single_document(entry['path'])
+        documents[file_info['name']] = {
+            'path': entry['path'],
+            'vectorstore': vectorstore,
+            'info': file_info,
+            'pages': num_pages,
+            'index': doc_index
+        }
+    results['ingest'] = _stage(sum(d['pages'] for d in documents.values()), 'page', time.perf_counter() - start_time)
+
+    qa_chains = {name: create_qa_chain(doc['vectorstore']) for name, doc in documents.items()}
+
+    # Retrieval only, to separate vector search from LLM time
+    questions = QUESTIONS[:n_questions]
+    start_time = time.perf_counter()
+    for qa_chain in qa_chains.values():
+        for question in questions:
+            qa_chain.retriever.get_relevant_documents(question)
+    results['retrieval'] = _stage(len(qa_chains) * len(questions), 'query', time.perf_counter() - start_time)
+
+    # Standardized extraction, one LLM call per metric
+    metric_count = 0
+    start_time = time.perf_counter()
+    for name, qa_chain in qa_chains.items():
+        metric_count += len(extract_standardized_financials(qa_chain, documents[name]['info']['type']))
+    results['extraction'] = _stage(metric_count, 'metric', time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    compare_documents(documents, 'Total Revenue')
+    results['comparison'] = _stage(len(documents), 'document', time.perf_counter() - start_time)
+
+    # Projections use the generator's ground truth so they do not depend on stub extraction quality
+    extracted_data = {
+        os.path.basename(entry['path']): {
+            metric: {'value': value, 'period': f"FY {entry['year']}", 'page': '1', 'confidence': '5'}
+            for metric, value in entry['metrics'].items()
+        }
+        for entry in manifest
+    }
+    entity_names = {os.path.basename(entry['path']): entry['company'] for entry in manifest}
+    metric_names = sorted({m for entry in manifest for m in entry['metrics']})
+
+    start_time = time.perf_counter()
+    for metric in metric_names:
+        predict_future_performance(extracted_data, metric)
+    panel = build_metric_panel(panel_records_from_extracted_data(extracted_data, entity_names=entity_names))
+    fit_panel_models(panel)
+    results['projections'] = _stage(len(metric_names), 'metric', time.perf_counter() - start_time)
+
+    return results
+
+def run_benchmarks(sizes, pages, tables_per_page, boilerplate_ratio, n_questions, workdir, repeats=3):
+    """Generate a corpus per size and keep the fastest of several runs for each stage"""
+    from benchmarks.synthetic import generate_corpus
+
+    # Pay one-off import and model setup costs before anything is timed
+    warmup = generate_corpus(os.path.join(workdir, "warmup"), 1, pages=2, seed=0)
+    benchmark_corpus(warmup, 1)
+
+    report = {}
+    for size in sizes:
+        # A distinct seed per size keeps content hashes apart, so no size reuses another's index
+        manifest = generate_corpus(
+            os.path.join(workdir, f"corpus-{size}"), size, pages=pages,
+            tables_per_page=tables_per_page, boilerplate_ratio=boilerplate_ratio, seed=size
+        )
+        runs = [benchmark_corpus(manifest, n_questions) for _ in range(max(1, repeats))]
+        report[str(size)] = {stage: min((run[stage] for run in runs), key=lambda r: r['seconds']) for stage in runs[0]}
+    return report
+
+def compare_to_baseline(results, baseline_results, max_regression_pct, min_delta_ms):
+    """Return (size, stage, before, after) for stages whose per-item time regressed"""
+    regressions = []
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            previous = baseline_results.get(size, {}).get(stage)
+            if not previous or not previous['per_item_ms']:
+                continue
+            delta = result['per_item_ms'] - previous['per_item_ms']
+            # Ignore sub-millisecond jitter on very cheap stages
+            if delta > min_delta_ms and delta / previous['per_item_ms'] * 100 > max_regression_pct:
+                regressions.append((size, stage, previous['per_item_ms'], result['per_item_ms']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the document pipeline offline with synthetic filings")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 12], help="Corpus sizes (number of filings)")
+    parser.add_argument("--pages", type=int, default=30, help="Pages per filing")
+    parser.add_argument("--tables-per-page", type=int, default=2, help="Statement tables on each statement page")
+    parser.add_argument("--boilerplate", type=float, default=0.3, help="Share of paragraphs that are repeated boilerplate")
+    parser.add_argument("--questions", type=int, default=len(QUESTIONS), help="Retrieval queries per document")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0, help="Simulated latency per embedding request")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated latency per LLM call")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per corpus; the fastest is kept per stage")
+    parser.add_argument("--workdir", help="Where to write corpora and caches (default: a temporary directory)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previously written JSON file")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="Allowed per-item slowdown in percent")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore per-item slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="finsight-bench-")
+    configure_environment(workdir, args.embedding_latency_ms, args.llm_latency_ms)
+
+    results = run_benchmarks(args.sizes, args.pages, args.tables_per_page, args.boilerplate,
+                             args.questions, workdir, args.repeats)
+
+    for size, stages in results.items():
+        print(f"corpus of {size} filing(s)")
+        for stage, result in stages.items():
+            print(f"  {stage:<12} {result['seconds']:>9.3f} s  {result['per_item_ms']:>10.3f} ms/{result['unit']}"
+                  f"  ({result['items']} x {result['unit']})")
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pages': args.pages,
+            'tables_per_page': args.tables_per_page,
+            'boilerplate': args.boilerplate,
+            'embedding_latency_ms': args.embedding_latency_ms,
+            'llm_latency_ms': args.llm_latency_ms,
+            'repeats': args.repeats
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline['results'], args.max_regression, args.min_delta_ms)
+        for size, stage, previous, current in regressions:
+            print(f"REGRESSION {stage} @ {size} filing(s): {previous:.3f} -> {current:.3f} ms per item")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
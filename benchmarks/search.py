@@ -0,0 +1,157 @@
+"""Benchmark full-text page search against LLM-based lookup.
+
+Indexes every page of a synthetic corpus with the FTS5 page index, times
+phrase, prefix and boolean queries across the whole corpus, and compares
+them with asking the QA chain where a term appears (the only way to find it
+before the search index), using the stub backend with a simulated LLM
+round trip:
+
+    python -m benchmarks.search --docs 200 --pages 20
+    python -m benchmarks.search --llm-latency-ms 800 --llm-docs 5 --output search.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+QUERIES = [
+    ('phrase', '"net income"'),
+    ('phrase', '"forward-looking statements"'),
+    ('word', 'goodwill'),
+    ('prefix', 'amortiz*'),
+    ('and', 'liquidity "cash equivalents"'),
+    ('or', 'repurchases OR dividends')
+]
+
+def page_texts(path):
+    import fitz  # PyMuPDF
+    with fitz.open(path) as doc:
+        return [page.get_text("text") for page in doc]
+
+def ground_truth_pages(texts, query):
+    """Pages matching a query by plain regex scan (the reference for recall)"""
+    def pattern(term):
+        if term.endswith('*'):
+            return re.compile(r"\b" + re.escape(term[:-1]) + r"\w*", re.IGNORECASE)
+        return re.compile(r"\b" + r"\W+".join(re.escape(w) for w in term.split()) + r"\b", re.IGNORECASE)
+
+    terms = [phrase or word for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query)]
+    if 'OR' in terms:
+        alternatives = [pattern(t) for t in terms if t != 'OR']
+        return {i + 1 for i, text in enumerate(texts) if any(p.search(text) for p in alternatives)}
+    patterns = [pattern(t) for t in terms]
+    return {i + 1 for i, text in enumerate(texts) if all(p.search(text) for p in patterns)}
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+def benchmark_search(manifest, repeats):
+    """Index the corpus, then time every query over all documents"""
+    from modules.search_index import get_search_index
+    from modules.document_registry import file_content_hash
+
+    index = get_search_index()
+    texts, hashes = {}, {}
+    start_time = time.perf_counter()
+    for entry in manifest:
+        content_hash = file_content_hash(entry['path'])
+        texts[content_hash] = page_texts(entry['path'])
+        index.add_document(content_hash, entry['path'], texts[content_hash])
+        hashes[entry['path']] = content_hash
+    index_seconds = time.perf_counter() - start_time
+
+    results = {}
+    for kind, query in QUERIES:
+        timings = []
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            index.search(query, limit=20)
+            timings.append(time.perf_counter() - start_time)
+
+        # Recall over all matches (no limit) against a regex scan of the page text
+        found = {(hit['content_hash'], hit['page']) for hit in index.search(query, limit=10 ** 6)}
+        truth = {(h, page) for h, pages in texts.items() for page in ground_truth_pages(pages, query)}
+        results[query] = {
+            'kind': kind,
+            'p50_ms': round(_percentile(timings, 0.5) * 1000, 3),
+            'p95_ms': round(_percentile(timings, 0.95) * 1000, 3),
+            'matching_pages': len(truth),
+            'recall': round(len(found & truth) / len(truth), 3) if truth else None
+        }
+
+    pages = sum(len(t) for t in texts.values())
+    return {'documents': len(manifest), 'pages': pages,
+            'index_seconds': round(index_seconds, 3), 'queries': results}, texts, hashes
+
+def benchmark_llm_lookup(manifest, texts, hashes, n_docs):
+    """Ask the QA chain where each term appears in a few documents and extrapolate"""
+    from modules.document_processor import ingest_document
+    from modules.qa_chain import answer_question
+    from config import RETRIEVER_K
+
+    sample = manifest[:n_docs]
+    vectorstores = [ingest_document(entry['path'])[0] for entry in sample]
+
+    results = {}
+    for kind, query in QUERIES:
+        seconds, recalls = 0.0, []
+        for entry, vectorstore in zip(sample, vectorstores):
+            start_time = time.perf_counter()
+            answer_question(vectorstore, f"On which pages does {query} appear?")
+            seconds += time.perf_counter() - start_time
+
+            # The answer can only cite pages of the k retrieved chunks (best case: no score threshold)
+            truth = ground_truth_pages(texts[hashes[entry['path']]], query)
+            cited = set()
+            for doc in vectorstore.similarity_search(query, k=RETRIEVER_K):
+                cited.update(range(doc.metadata.get('page', 0) + 1, doc.metadata.get('page_end', doc.metadata.get('page', 0)) + 2))
+            if truth:
+                recalls.append(len(cited & truth) / len(truth))
+
+        per_document = seconds / len(sample)
+        results[query] = {
+            'per_document_ms': round(per_document * 1000, 1),
+            'corpus_estimate_s': round(per_document * len(manifest), 1),
+            'recall_bound': round(sum(recalls) / len(recalls), 3) if recalls else None
+        }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark full-text page search against LLM lookup")
+    parser.add_argument("--docs", type=int, default=200, help="Number of synthetic filings")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per filing")
+    parser.add_argument("--repeats", type=int, default=50, help="Timed runs per query")
+    parser.add_argument("--llm-docs", type=int, default=3, help="Documents asked through the QA chain")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="Simulated LLM round trip")
+    parser.add_argument("--workdir", help="Where to write the corpus and indexes (default: a temporary directory)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    from benchmarks.run import configure_environment
+    workdir = args.workdir or tempfile.mkdtemp(prefix="finsight-search-")
+    configure_environment(workdir, 0, args.llm_latency_ms)
+
+    from benchmarks.synthetic import generate_corpus
+    manifest = generate_corpus(os.path.join(workdir, "corpus"), args.docs, pages=args.pages, seed=7)
+
+    search, texts, hashes = benchmark_search(manifest, args.repeats)
+    llm = benchmark_llm_lookup(manifest, texts, hashes, min(args.llm_docs, len(manifest)))
+
+    print(f"{search['documents']} documents, {search['pages']} pages indexed in {search['index_seconds']:.2f} s")
+    print(f"{'query':<32} {'search p50':>11} {'p95':>9} {'recall':>7}   {'LLM per doc':>12} {'LLM corpus':>11} {'recall bound':>13}")
+    for _, query in QUERIES:
+        s, l = search['queries'][query], llm[query]
+        print(f"{query:<32} {s['p50_ms']:>8.2f} ms {s['p95_ms']:>6.2f} ms {s['recall'] if s['recall'] is not None else '-':>7}"
+              f"   {l['per_document_ms']:>9.0f} ms {l['corpus_estimate_s']:>9.1f} s {l['recall_bound'] if l['recall_bound'] is not None else '-':>13}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'search': search, 'llm_lookup': llm, 'llm_latency_ms': args.llm_latency_ms}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Check statement table parsing against known series.
+
+Parses income statements whose cells are placed one by one, with the
+weighted-average share counts before and after the per-share amounts (both
+label their rows just "Basic" and "Diluted"), plus the current-year values
+of synthetic filings, and times the parse:
+
+    python -m benchmarks.statements --docs 10
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+YEARS = (2023, 2022, 2021)
+NET_INCOME = ('Net income', '73,795', '61,271', '55,012')
+PER_SHARE = [
+    ('Earnings per share:', None),
+    ('Basic', ('5.84', '4.85', '4.33')),
+    ('Diluted', ('5.80', '4.82', '4.30'))
+]
+SHARES = [
+    ('Weighted-average shares outstanding:', None),
+    ('Basic', ('12,630', '12,640', '12,700')),
+    ('Diluted', ('12,720', '12,730', '12,790'))
+]
+EXPECTED = {
+    'Net Income': [[2021, 55012e6], [2022, 61271e6], [2023, 73795e6]],
+    'EPS (Basic)': [[2021, 4.33], [2022, 4.85], [2023, 5.84]]
+}
+
+def write_income_statement(path, shares_first):
+    """One-page income statement with every cell inserted separately, right-aligned in year columns"""
+    import fitz  # PyMuPDF
+
+    rows = [(NET_INCOME[0], NET_INCOME[1:])] + (SHARES + PER_SHARE if shares_first else PER_SHARE + SHARES)
+    doc = fitz.open()
+    page = doc.new_page()
+    font = fitz.Font("helv")
+
+    def cell(x_right, y, text):
+        page.insert_text((x_right - font.text_length(text, 8), y), text, fontsize=8)
+
+    page.insert_text((54, 60), "Consolidated Statements of Income", fontsize=11)
+    page.insert_text((54, 78), "(in millions, except per share amounts)", fontsize=8)
+    columns = (360, 440, 520)
+    for x_right, year in zip(columns, YEARS):
+        cell(x_right, 100, str(year))
+    for row, (label, values) in enumerate(rows):
+        y = 118 + row * 16
+        page.insert_text((54, y), label, fontsize=8)
+        for x_right, value in zip(columns, values or ()):
+            cell(x_right, y, value)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    doc.save(path)
+    doc.close()
+
+def check_layouts(workdir):
+    from modules.statement_parser import parse_statements
+
+    results = {}
+    for layout, shares_first in (('shares_first', True), ('per_share_first', False)):
+        path = os.path.join(workdir, f"income-{layout}.pdf")
+        write_income_statement(path, shares_first)
+        statements = parse_statements(path)
+        series = {metric: statements.get(metric, {}).get('series') for metric in EXPECTED}
+        results[layout] = {'series': series, 'ok': all(
+            found is not None and len(found) == len(expected)
+            and all(y == ey and abs(v - ev) <= 1e-6 * abs(ev) for (y, v), (ey, ev) in zip(found, expected))
+            for found, expected in ((series[m], EXPECTED[m]) for m in EXPECTED))}
+    return results
+
+def check_synthetic(manifest):
+    """Current-year values of synthetic filings, and parse time per filing"""
+    from modules.statement_parser import parse_statements
+    from modules.verification import parse_amount
+
+    matched, total, seconds = 0, 0, 0.0
+    for entry in manifest:
+        start_time = time.perf_counter()
+        statements = parse_statements(entry['path'])
+        seconds += time.perf_counter() - start_time
+        for metric, value in entry['metrics'].items():
+            total += 1
+            points = dict((year, v) for year, v in statements.get(metric, {}).get('series', []))
+            amount, precision, _ = parse_amount(value)
+            matched += entry['year'] in points and abs(points[entry['year']] - amount) <= precision
+    return {'values': total, 'matched': matched, 'per_filing_ms': round(seconds / len(manifest) * 1000, 1),
+            'ok': matched == total}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check statement table parsing")
+    parser.add_argument("--docs", type=int, default=10, help="Number of synthetic filings")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per filing")
+    parser.add_argument("--workdir", help="Where to write the filings (default: a temporary directory)")
+    args = parser.parse_args(argv)
+
+    from benchmarks.run import configure_environment
+    workdir = args.workdir or tempfile.mkdtemp(prefix="finsight-statements-")
+    configure_environment(workdir, 0, 0)
+
+    from benchmarks.synthetic import generate_corpus
+    manifest = generate_corpus(os.path.join(workdir, "corpus"), args.docs, pages=args.pages, seed=5)
+
+    layouts = check_layouts(workdir)
+    for layout, result in layouts.items():
+        print(f"{layout:<16} {'ok' if result['ok'] else 'FAILED'}  "
+              + "  ".join(f"{metric}: {series}" for metric, series in result['series'].items()))
+    synthetic = check_synthetic(manifest)
+    print(f"{'synthetic':<16} {'ok' if synthetic['ok'] else 'FAILED'}  {synthetic['matched']}/{synthetic['values']} "
+          f"current-year values, {synthetic['per_filing_ms']} ms per filing")
+    return 0 if synthetic['ok'] and all(r['ok'] for r in layouts.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
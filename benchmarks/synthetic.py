@@ -0,0 +1,126 @@
+"""Deterministic synthetic financial filings for benchmarks.
+
+Each filing has a cover page, a built-in table of contents, narrative pages,
+financial statement tables carrying known metric values and a configurable
+share of repeated boilerplate (the legal text real filings repeat on many pages).
+"""
+import os
+import random
+import fitz  # PyMuPDF
+
+PAGE_RECT = fitz.Rect(54, 54, 558, 738)  # Letter page with 0.75in margins
+
+SECTIONS = [
+    "Business Overview",
+    "Risk Factors",
+    "Management's Discussion and Analysis",
+    "Consolidated Statements of Income",
+    "Consolidated Balance Sheets",
+    "Consolidated Statements of Cash Flows",
+    "Notes to Consolidated Financial Statements"
+]
+
+# Metric name, share of revenue used to derive its value
+METRICS = [
+    ('Total Revenue', 1.0),
+    ('Operating Income', 0.22),
+    ('Net Income', 0.17),
+    ('Total Assets', 2.4),
+    ('Total Liabilities', 1.3),
+    ('Cash and Cash Equivalents', 0.35)
+]
+
+BOILERPLATE = (
+    "This report contains forward-looking statements within the meaning of the Private Securities "
+    "Litigation Reform Act of 1995. Actual results may differ materially from those expressed or implied "
+    "by such statements due to risks and uncertainties, including those described under Risk Factors. "
+    "We undertake no obligation to update any forward-looking statement."
+)
+
+VOCABULARY = (
+    "revenue growth margin customers segment services products pricing demand market operating costs "
+    "capital expenditure investment liquidity borrowings debt interest currency exchange headcount "
+    "infrastructure regulatory compliance subscription advertising cloud hardware licensing supply chain "
+    "inventory receivables depreciation amortization taxes dividends repurchases acquisitions goodwill"
+).split()
+
+def metric_values(company_seed, year, base_year=2019):
+    """Ground-truth metric values (in millions) for a company and year"""
+    rng = random.Random(company_seed)
+    base_revenue = rng.uniform(500, 50000)
+    growth = rng.uniform(-0.05, 0.25)
+    revenue = base_revenue * (1 + growth) ** (year - base_year)
+    return {name: round(revenue * share * rng.uniform(0.9, 1.1), 1) for name, share in METRICS}
+
+def format_millions(value):
+    return f"${value:,.1f} million"
+
+def _paragraph(rng, words=70):
+    text = " ".join(rng.choice(VOCABULARY) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+def _statement_table(rng, metrics, year):
+    """Render a two-year statement table as aligned text rows"""
+    rows = [f"{'(in millions)':<34}{'FY ' + str(year):>16}{'FY ' + str(year - 1):>16}"]
+    for name, value in metrics.items():
+        prior = value / rng.uniform(1.0, 1.2)
+        rows.append(f"{name:<34}{value:>16,.1f}{prior:>16,.1f}")
+    return "\n".join(rows)
+
+def generate_filing(path, company, year, pages=20, tables_per_page=1, boilerplate_ratio=0.3, seed=0, company_seed=None):
+    """Write a synthetic annual report and return its ground-truth metrics"""
+    rng = random.Random(seed)
+    metrics = metric_values(company_seed if company_seed is not None else seed, year)
+
+    doc = fitz.open()
+    toc = []
+
+    cover = doc.new_page()
+    cover.insert_textbox(PAGE_RECT, (
+        f"{company} Inc.\n\nAnnual Report {year}\n\nFor the fiscal year ended December 31, {year}\n\n"
+        f"Total Revenue: {format_millions(metrics['Total Revenue'])} for fiscal year {year}\n"
+        f"Net Income: {format_millions(metrics['Net Income'])} for fiscal year {year}"
+    ), fontsize=12)
+
+    for page_number in range(2, pages + 1):
+        section = SECTIONS[(page_number - 2) * len(SECTIONS) // max(pages - 1, 1)]
+        if not toc or toc[-1][1] != section:
+            toc.append([1, section, page_number])
+
+        blocks = [section, ""]
+        for _ in range(3):
+            blocks.append(BOILERPLATE if rng.random() < boilerplate_ratio else _paragraph(rng))
+
+        # Statement pages carry the metric values both as a table and as a sentence
+        if section.startswith("Consolidated"):
+            for _ in range(tables_per_page):
+                blocks.append(_statement_table(rng, metrics, year))
+            name = rng.choice(list(metrics))
+            blocks.append(f"{name} was {format_millions(metrics[name])} for fiscal year {year} (Page {page_number}).")
+
+        # insert_textbox writes nothing when the text overflows, so drop trailing blocks until it fits
+        page = doc.new_page()
+        while page.insert_textbox(PAGE_RECT, "\n\n".join(blocks), fontsize=8, fontname="cour") < 0 and len(blocks) > 1:
+            blocks.pop()
+
+    doc.set_toc(toc)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    doc.save(path)
+    doc.close()
+    return {name: format_millions(value) for name, value in metrics.items()}
+
+def generate_corpus(out_dir, n_docs, pages=20, tables_per_page=1, boilerplate_ratio=0.3, seed=0, years_per_company=4):
+    """Write n_docs filings (a few years per company) and return a manifest of paths and ground truth"""
+    manifest = []
+    for i in range(n_docs):
+        company_index = i // years_per_company
+        company = f"Synthetic{seed}x{company_index}"
+        year = 2019 + i % years_per_company
+        path = os.path.join(out_dir, f"{company.lower()}-{year}-annual-report.pdf")
+        metrics = generate_filing(
+            path, company, year, pages=pages, tables_per_page=tables_per_page,
+            boilerplate_ratio=boilerplate_ratio, seed=seed * 100003 + i,
+            company_seed=seed * 100003 + company_index
+        )
+        manifest.append({'path': path, 'company': company, 'year': year, 'metrics': metrics})
+    return manifest
@@ -0,0 +1,116 @@
+"""Check local verification against known values and values from neighbouring rows.
+
+Every correct metric value of a synthetic filing should be verified, and a
+value copied from another row of the same statement (the classic extraction
+mistake) must not be. Filings are checked both as the text-row tables of
+benchmarks.synthetic and as an income statement whose cells are placed one
+by one, which PyMuPDF extracts one cell per line:
+
+    python -m benchmarks.verification --docs 20
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+# Income statement rows (label, current year, prior year) in millions, except per-share amounts and shares
+CELL_STATEMENT = [
+    ('Revenue', '$ 125,410', '$ 110,308'),
+    ('Cost of revenue', '45,427', '41,950'),
+    ('Research and development', '18,552', '16,037'),
+    ('Income from operations', '84,293', '73,795'),
+    ('Net income', '73,795', '61,271'),
+    ('Basic earnings per share', '5.84', '4.85'),
+    ('Weighted average shares outstanding, basic', '12,630', '12,640')
+]
+CELL_METRICS = {
+    'Total Revenue': ('$125,410 million', '$45,427 million'),
+    'Operating Income': ('$84,293 million', '$18,552 million'),
+    'Net Income': ('$73,795 million', '$84,293 million'),
+    'EPS (Basic)': ('$5.84', '12,630')
+}
+
+def write_cell_statement(path, year=2023):
+    """An income statement with every cell inserted separately, right-aligned in year columns"""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((54, 60), "Consolidated Statements of Income", fontsize=11)
+    page.insert_text((54, 78), "(in millions, except per share amounts)", fontsize=8)
+    font = fitz.Font("helv")
+    for column, text in ((400, str(year)), (500, str(year - 1))):
+        page.insert_text((column - font.text_length(text, 8), 100), text, fontsize=8)
+    for row, (label, current, prior) in enumerate(CELL_STATEMENT):
+        y = 118 + row * 16
+        page.insert_text((54, y), label, fontsize=8)
+        for column, text in ((400, current), (500, prior)):
+            page.insert_text((column - font.text_length(text, 8), y), text, fontsize=8)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    doc.save(path)
+    doc.close()
+
+def check_synthetic(manifest):
+    """(metric, correct value verified, neighbouring row value verified) for every synthetic filing"""
+    from modules.verification import verify_extracted_metrics
+
+    results = []
+    for entry in manifest:
+        names = list(entry['metrics'])
+        correct = {name: {'value': entry['metrics'][name]} for name in names}
+        neighbour = {name: {'value': entry['metrics'][names[(i + 1) % len(names)]]} for i, name in enumerate(names)}
+        good = verify_extracted_metrics(None, correct, entry['path'])
+        bad = verify_extracted_metrics(None, neighbour, entry['path'])
+        results.extend((name, good[name]['verified'], bad[name]['verified'], bad[name]['status']) for name in names)
+    return results
+
+def check_cells(path):
+    from modules.verification import verify_extracted_metrics
+
+    correct = {name: {'value': values[0]} for name, values in CELL_METRICS.items()}
+    neighbour = {name: {'value': values[1]} for name, values in CELL_METRICS.items()}
+    good = verify_extracted_metrics(None, correct, path)
+    bad = verify_extracted_metrics(None, neighbour, path)
+    return [(name, good[name]['verified'], bad[name]['verified'], bad[name]['status']) for name in CELL_METRICS]
+
+def summarize(results):
+    return {
+        'values': len(results),
+        'correct_verified': sum(1 for _, good, _, _ in results if good),
+        'neighbour_verified': sum(1 for _, _, bad, _ in results if bad),
+        'neighbour_statuses': sorted({status for _, _, _, status in results}),
+        'failures': sorted({name for name, good, bad, _ in results if bad or not good})
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check local verification against neighbouring-row values")
+    parser.add_argument("--docs", type=int, default=20, help="Number of synthetic filings")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per filing")
+    parser.add_argument("--workdir", help="Where to write the filings (default: a temporary directory)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    from benchmarks.run import configure_environment
+    workdir = args.workdir or tempfile.mkdtemp(prefix="finsight-verify-")
+    configure_environment(workdir, 0, 0)
+
+    from benchmarks.synthetic import generate_corpus
+    manifest = generate_corpus(os.path.join(workdir, "corpus"), args.docs, pages=args.pages, seed=11)
+    cell_path = os.path.join(workdir, "cells", "income-statement.pdf")
+    write_cell_statement(cell_path)
+
+    summary = {'synthetic': summarize(check_synthetic(manifest)), 'cells': summarize(check_cells(cell_path))}
+    for layout, s in summary.items():
+        print(f"{layout:<10} {s['correct_verified']}/{s['values']} correct values verified, "
+              f"{s['neighbour_verified']}/{s['values']} neighbouring-row values verified "
+              f"(statuses: {', '.join(s['neighbour_statuses'])})"
+              + (f"; check {', '.join(s['failures'])}" if s['failures'] else ""))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if any(s['neighbour_verified'] or s['correct_verified'] < s['values'] for s in summary.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Headless batch ingestion and metric extraction.
+
+    python cli.py "reports/*.pdf" --output metrics.csv --workers 4
+    python cli.py reports/ --output metrics.parquet
+    python cli.py reports/ --stub-llm   # offline, with the deterministic stub backend
+
+Finished documents are checkpointed, so rerunning the same command resumes
+an interrupted run.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+OUTPUT_COLUMNS = ['Document', 'Company', 'Type', 'Year', 'Metric', 'Value',
+                  'Numeric Value', 'Period', 'Page', 'Confidence']
+
+def collect_pdf_files(inputs):
+    """Expand folders and glob patterns into a sorted list of PDF paths"""
+    pdf_files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            pdf_files.update(glob.glob(os.path.join(item, "*.pdf")))
+        else:
+            pdf_files.update(p for p in glob.glob(item) if p.lower().endswith(".pdf"))
+    return sorted(os.path.abspath(p) for p in pdf_files)
+
+class Checkpoint:
+    """Append-only JSONL record of finished documents, keyed by content hash"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write can leave a truncated last line
+                        continue
+                    self.records[record['content_hash']] = record
+
+    def is_done(self, content_hash):
+        return content_hash in self.records
+
+    def add(self, record):
+        with self._lock:
+            self.records[record['content_hash']] = record
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+def process_file(pdf_file, skip_extraction=False):
+    """Ingest one PDF and extract its standard metrics"""
+    from modules.document_processor import ingest_document
+    from modules.qa_chain import create_qa_chain
+    from modules.data_extraction import extract_standardized_financials
+
+    start_time = time.perf_counter()
+    vectorstore, file_info, num_pages, _ = ingest_document(pdf_file)
+    ingest_seconds = time.perf_counter() - start_time
+
+    metrics = {}
+    extract_seconds = 0.0
+    if not skip_extraction:
+        start_time = time.perf_counter()
+        qa_chain = create_qa_chain(vectorstore)
+        metrics = extract_standardized_financials(qa_chain, file_info['type'])
+        extract_seconds = time.perf_counter() - start_time
+
+    return {
+        'path': pdf_file,
+        'content_hash': vectorstore.content_hash,
+        'info': file_info,
+        'pages': num_pages,
+        'metrics': metrics,
+        'timings': {'ingest': ingest_seconds, 'extract': extract_seconds}
+    }
+
+def metric_rows(records):
+    """Flatten checkpoint records into one row per document and metric"""
+    from modules.data_extraction import extract_numeric_value
+
+    rows = []
+    for record in records:
+        info = record['info']
+        for metric, details in record['metrics'].items():
+            rows.append({
+                'Document': info['name'],
+                'Company': info.get('company') or 'Unknown',
+                'Type': info.get('type') or 'Unknown',
+                'Year': info.get('year') or 'Unknown',
+                'Metric': metric,
+                'Value': details['value'],
+                'Numeric Value': extract_numeric_value(details['value']),
+                'Period': details['period'],
+                'Page': details['page'],
+                'Confidence': details['confidence']
+            })
+    return rows
+
+def write_metrics(rows, output_path, output_format=None):
+    """Write metric rows to CSV or Parquet"""
+    import pandas as pd
+
+    output_format = output_format or ('parquet' if output_path.endswith('.parquet') else 'csv')
+    df = pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+    if output_format == 'parquet':
+        try:
+            df.to_parquet(output_path, index=False)
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow: pip install pyarrow")
+    else:
+        df.to_csv(output_path, index=False)
+    return len(df)
+
+def print_throughput(stage_totals, wall_seconds):
+    """Print per-stage throughput for the run"""
+    print("\nStage throughput")
+    print(f"  {'stage':<10} {'items':>8} {'seconds':>10} {'items/s':>10}")
+    for stage, (items, unit, seconds) in stage_totals.items():
+        rate = items / seconds if seconds > 0 else float('inf')
+        print(f"  {stage:<10} {items:>8} {seconds:>10.2f} {rate:>10.2f}  ({unit})")
+    print(f"  wall clock: {wall_seconds:.2f} s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest PDFs and extract standard financial metrics without the UI")
+    parser.add_argument("inputs", nargs="+", help="PDF folders or glob patterns")
+    parser.add_argument("--output", "-o", default="metrics.csv", help="Output file (.csv or .parquet)")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="Override the output format")
+    parser.add_argument("--workers", "-w", type=int, default=4, help="Documents processed in parallel")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.jsonl)")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--skip-extraction", action="store_true", help="Only build indexes")
+    parser.add_argument("--stub-llm", action="store_true", help="Use deterministic offline LLM and embeddings")
+    args = parser.parse_args(argv)
+
+    # The backend is read from config at import time, so set it before anything loads
+    if args.stub_llm:
+        os.environ["FINSIGHT_LLM_BACKEND"] = "stub"
+    load_dotenv()
+    if os.getenv("FINSIGHT_LLM_BACKEND", "gemini") != "stub" and not os.getenv("GOOGLE_API_KEY"):
+        print("GOOGLE_API_KEY is not set (use --stub-llm to run offline)", file=sys.stderr)
+        return 2
+
+    pdf_files = collect_pdf_files(args.inputs)
+    if not pdf_files:
+        print("No PDF files found", file=sys.stderr)
+        return 1
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint.jsonl"
+    if args.no_resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+
+    from modules.document_registry import file_content_hash
+    pending = [p for p in pdf_files if not checkpoint.is_done(file_content_hash(p))]
+    print(f"{len(pdf_files)} PDF files, {len(pdf_files) - len(pending)} already done, {len(pending)} to process")
+
+    run_start = time.perf_counter()
+    failures = []
+    completed = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {executor.submit(process_file, p, args.skip_extraction): p for p in pending}
+        for i, future in enumerate(as_completed(futures), start=1):
+            pdf_file = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                failures.append((pdf_file, str(e)))
+                print(f"[{i}/{len(pending)}] FAILED {os.path.basename(pdf_file)}: {e}", file=sys.stderr)
+                continue
+            checkpoint.add(record)
+            completed.append(record)
+            print(f"[{i}/{len(pending)}] {os.path.basename(pdf_file)}: {record['pages']} pages, "
+                  f"{len(record['metrics'])} metrics")
+
+    # Write every finished document, including ones from earlier runs
+    write_start = time.perf_counter()
+    rows = metric_rows(checkpoint.records.values())
+    written = write_metrics(rows, args.output, args.format)
+    write_seconds = time.perf_counter() - write_start
+    print(f"Wrote {written} rows to {args.output}")
+
+    # Stage times are summed across workers, so rates are per worker-second
+    stage_totals = {
+        'ingest': (sum(r['pages'] for r in completed), 'pages',
+                   sum(r['timings']['ingest'] for r in completed)),
+        'extract': (sum(len(r['metrics']) for r in completed), 'metrics',
+                    sum(r['timings']['extract'] for r in completed)),
+        'write': (written, 'rows', write_seconds)
+    }
+    print_throughput(stage_totals, time.perf_counter() - run_start)
+
+    if failures:
+        print(f"\n{len(failures)} document(s) failed; rerun to retry them", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import os
+
 # Application settings
 APP_TITLE = "FinSight AI"
 APP_DESCRIPTION = "AI-powered tool for analyzing financial documents"
@@ -6,17 +8,126 @@ APP_DESCRIPTION = "AI-powered tool for analyzing financial documents"
 DEFAULT_SINGLE_DOC_PATH = r"C:\Users\admin\OneDrive\Desktop\AI Business Chatbot\Uploads\2022-alphabet-annual-report.pdf"
 DEFAULT_FOLDER_PATH = r"C:\Users\admin\OneDrive\Desktop\AI Business Chatbot\Uploads"
 
+# Preload heavy modules in a background thread after the first render
+BACKGROUND_WARMUP = os.getenv("FINSIGHT_BACKGROUND_WARMUP", "1") == "1"
+
 # Model settings
 EMBEDDING_MODEL = "models/embedding-001"
 LLM_MODEL = "gemini-1.5-flash"
 LLM_TEMPERATURE = 0
 
+# "gemini" for the real API, "stub" for deterministic offline models (tests, benchmarks, local service runs)
+LLM_BACKEND = os.getenv("FINSIGHT_LLM_BACKEND", "gemini")
+# Simulated per-request latency of the stub backend, to approximate API round trips in benchmarks
+STUB_EMBEDDING_LATENCY_MS = float(os.getenv("FINSIGHT_STUB_EMBEDDING_LATENCY_MS", "0"))
+STUB_LLM_LATENCY_MS = float(os.getenv("FINSIGHT_STUB_LLM_LATENCY_MS", "0"))
+
 # Document processing settings
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 200
+CHUNK_MAX_TABLE_SIZE = 3000  # Tables and statements up to this many characters are kept in one chunk
+# "layout" follows PDF blocks and TOC sections; "recursive" is the plain character splitter
+CHUNKER = os.getenv("FINSIGHT_CHUNKER", "layout")
 RETRIEVER_K = 8
 RETRIEVER_SCORE_THRESHOLD = 0.7
 
+# Near-duplicate chunk detection (MinHash/LSH) before embedding
+DEDUP_ENABLED = os.getenv("FINSIGHT_DEDUP", "1") == "1"
+DEDUP_THRESHOLD = 0.9  # Estimated Jaccard similarity of word 5-grams to treat chunks as duplicates
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16  # 16 bands of 4 rows: candidates from about 0.5 similarity, confirmed on the full signature
+DEDUP_SHINGLE_SIZE = 5
+DEDUP_CORPUS_MAX_CHUNKS = 100000  # Chunks remembered for cross-document embedding reuse
+
+# Shared vectorstore registry settings
+VECTORSTORE_MEMORY_BUDGET_MB = int(os.getenv("FINSIGHT_VECTORSTORE_BUDGET_MB", "1024"))
+VECTORSTORE_CACHE_DIR = os.getenv(
+    "FINSIGHT_VECTORSTORE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "vectorstores")
+)
+# Persist indexes as memory-mapped files shared by all worker processes (0 keeps FAISS in RAM, spilling on pressure)
+VECTORSTORE_MMAP = os.getenv("FINSIGHT_VECTORSTORE_MMAP", "1") == "1"
+
+# Answers cached per document content hash and question
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("FINSIGHT_ANSWER_CACHE_MAX_ENTRIES", "5000"))
+
+# Full-text page search (SQLite FTS5), built during ingestion
+SEARCH_INDEX_PATH = os.getenv(
+    "FINSIGHT_SEARCH_INDEX",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "search", "pages.sqlite")
+)
+SEARCH_INDEX_ENABLED = os.getenv("FINSIGHT_SEARCH", "1") == "1"
+SEARCH_SNIPPET_TOKENS = 16
+
+# Source pages rendered ahead of time when an answer is shown
+SOURCE_PAGE_PRELOAD = 3
+
+# Local verification of extracted values against page text
+VERIFY_PAGE_WINDOW = 1  # Pages either side of the claimed page to search
+VERIFY_ROW_LOOKBACK_LINES = 6  # Lines above a lone table cell to search for its row label
+
+# Workspace snapshots (documents, extracted metrics and cached answers in one SQLite file)
+WORKSPACE_SNAPSHOT_PATH = os.getenv(
+    "FINSIGHT_WORKSPACE_SNAPSHOT",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "workspaces", "workspace.sqlite")
+)
+
+# Background job settings
+JOBS_DIR = os.getenv(
+    "FINSIGHT_JOBS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "jobs")
+)
+JOB_WORKERS = int(os.getenv("FINSIGHT_JOB_WORKERS", "2"))
+# Finished job records are deleted once older than this or beyond the newest JOB_RETENTION_COUNT
+JOB_RETENTION_SECONDS = float(os.getenv("FINSIGHT_JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+JOB_RETENTION_COUNT = int(os.getenv("FINSIGHT_JOB_RETENTION_COUNT", "200"))
+
+# Identical concurrent LLM and embedding requests (same document, prompt and parameters) share one call
+SINGLE_FLIGHT_ENABLED = os.getenv("FINSIGHT_SINGLE_FLIGHT", "1") == "1"
+
+# Gemini quota scheduler: all LLM and embedding requests share these per-minute budgets, served
+# interactive first, then extraction, then ingest, and fairly across sessions (0 means unlimited).
+# On by default only for the real API.
+QUOTA_ENABLED = os.getenv("FINSIGHT_QUOTA", "1" if LLM_BACKEND == "gemini" else "0") == "1"
+QUOTA_WINDOW_SECONDS = 60
+LLM_RPM = int(os.getenv("FINSIGHT_LLM_RPM", "15"))
+LLM_TPM = int(os.getenv("FINSIGHT_LLM_TPM", "1000000"))
+EMBEDDING_RPM = int(os.getenv("FINSIGHT_EMBEDDING_RPM", "1500"))
+EMBEDDING_TPM = int(os.getenv("FINSIGHT_EMBEDDING_TPM", "0"))
+EMBEDDING_BATCH_SIZE = 100  # Texts per embedding request
+
+# Precompute the example questions and standard metrics of a document right after it is processed
+# (a background job; off by default because it spends LLM calls the analyst may never need)
+PRECOMPUTE_ENABLED = os.getenv("FINSIGHT_PRECOMPUTE", "0") == "1"
+PRECOMPUTE_WORKERS = int(os.getenv("FINSIGHT_PRECOMPUTE_WORKERS", "2"))  # Concurrent LLM calls per document
+PRECOMPUTE_METRICS = os.getenv("FINSIGHT_PRECOMPUTE_METRICS", "1") == "1"
+
+# Tracing settings (set FINSIGHT_TRACE_FILE to an empty string to disable the JSONL span log)
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "traces")
+TRACE_FILE = os.getenv("FINSIGHT_TRACE_FILE", os.path.join(TRACE_DIR, "spans.jsonl"))
+TRACE_PROMETHEUS_FILE = os.getenv("FINSIGHT_TRACE_PROMETHEUS_FILE", os.path.join(TRACE_DIR, "metrics.prom"))
+TRACE_WINDOW = 1000  # Recent durations kept per stage for percentiles
+TRACE_MAX_BYTES = int(os.getenv("FINSIGHT_TRACE_MAX_BYTES", str(20 * 1024 * 1024)))  # Span file size before it rolls over to .1 (0: never)
+
+# Profiling settings (FINSIGHT_PROFILE=1 profiles every rerun and ingest job)
+PROFILE_ENABLED = os.getenv("FINSIGHT_PROFILE", "0") == "1"
+PROFILE_DIR = os.getenv(
+    "FINSIGHT_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "profiles")
+)
+PROFILE_KEEP = 20  # Most recent profiles kept on disk
+PROFILE_TOP_N = 15  # Hotspots shown inline
+
+# Query service settings
+SERVICE_HOST = os.getenv("FINSIGHT_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("FINSIGHT_SERVICE_PORT", "8765"))
+SERVICE_WORKERS = int(os.getenv("FINSIGHT_SERVICE_WORKERS", "4"))
+SERVICE_QUEUE_SIZE = int(os.getenv("FINSIGHT_SERVICE_QUEUE_SIZE", "64"))
+
+# Dashboard settings
+DASHBOARD_MAX_POINTS = 500  # Charts are aggregated above this many points
+DASHBOARD_MAX_COMPANIES = 12  # Remaining companies are grouped as "Other"
+
 # Financial metrics
 STANDARD_METRICS = {
     'Annual Report': [
@@ -45,6 +156,40 @@ STANDARD_METRICS = {
     ]
 }
 
+# Example questions offered on the Analysis tab (and precomputed after ingestion)
+EXAMPLE_QUESTIONS = [
+    "What were the total revenues in the most recent fiscal year?",
+    "How did advertising revenue change compared to the previous year?",
+    "What are the key risks mentioned in the report?",
+    "Summarize the company's financial performance",
+    "What is the company's R&D spending?"
+]
+
+# Multi-year statement tables are parsed at ingestion so one filing yields a series per metric
+STATEMENT_PARSING = os.getenv("FINSIGHT_STATEMENTS", "1") == "1"
+STATEMENT_CACHE_ENTRIES = 1000  # Documents whose parsed statements are kept in memory
+
+# Supporting passages retrieved for generated insights (0 sends only the metrics table)
+INSIGHTS_CONTEXT_CHUNKS = int(os.getenv("FINSIGHT_INSIGHTS_CONTEXT_CHUNKS", "3"))
+
+# Metrics offered for multi-document comparison
+COMPARISON_METRICS = [
+    "Total Revenue",
+    "Net Income",
+    "Operating Income",
+    "EPS",
+    "R&D Expenses",
+    "Cash and Cash Equivalents",
+    "Total Assets",
+    "Total Liabilities"
+]
+# Matrix comparison: documents extracted concurrently, one LLM call per document for up to
+# COMPARISON_BATCH_SIZE metrics, with the retrieved chunks of all its metrics as shared context
+COMPARISON_WORKERS = int(os.getenv("FINSIGHT_COMPARISON_WORKERS", "4"))
+COMPARISON_BATCH_SIZE = 8
+COMPARISON_CHUNKS_PER_METRIC = 3
+COMPARISON_MAX_CHUNKS = 16
+
 # Extraction templates
 EXTRACTION_TEMPLATES = {
     "Annual Revenue": "Extract all revenue figures for the past 3 years with page references",
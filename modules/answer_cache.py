@@ -0,0 +1,83 @@
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from config import ANSWER_CACHE_MAX_ENTRIES
+from modules.tracing import get_tracer
+
+def normalize_question(question):
+    """Lower-case a question and collapse whitespace so trivial variants share an entry"""
+    return re.sub(r"\s+", " ", question.strip().lower()).rstrip(" ?")
+
+def cache_key(content_hash, question, kind='qa'):
+    question_hash = hashlib.sha1(normalize_question(question).encode('utf-8')).hexdigest()[:16]
+    return f"{kind}:{content_hash}:{question_hash}"
+
+class AnswerCache:
+    """Process-wide answers keyed by document content hash, kind and normalized question
+
+    An answer depends only on the document's content and the question, so
+    every session (and a restored workspace) can reuse it. The least recently
+    used entries are dropped beyond max_entries.
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> entry dict
+        self._lock = threading.Lock()
+
+    def get(self, content_hash, question, kind='qa'):
+        """Cached entry for a question, or None"""
+        if not content_hash:
+            return None
+        key = cache_key(content_hash, question, kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        get_tracer().increment('answer_cache_hits' if entry is not None else 'answer_cache_misses')
+        return entry
+
+    def contains(self, content_hash, question, kind='qa'):
+        """Whether an answer is cached, without counting a hit or miss"""
+        with self._lock:
+            return bool(content_hash) and cache_key(content_hash, question, kind) in self._entries
+
+    def put(self, content_hash, question, answer, kind='qa', **extra):
+        """Store an answer (any JSON-serializable value) with optional extra fields"""
+        if not content_hash:
+            return None
+        entry = dict(extra, key=cache_key(content_hash, question, kind), kind=kind,
+                     content_hash=content_hash, question=question, answer=answer, created_at=time.time())
+        self.load([entry])
+        return entry
+
+    def load(self, entries):
+        """Add entries, e.g. from a workspace snapshot"""
+        with self._lock:
+            for entry in entries:
+                self._entries[entry['key']] = entry
+                self._entries.move_to_end(entry['key'])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def entries_for(self, content_hashes):
+        """Entries for a set of documents"""
+        content_hashes = set(content_hashes)
+        with self._lock:
+            return [dict(e) for e in self._entries.values() if e['content_hash'] in content_hashes]
+
+    def __len__(self):
+        return len(self._entries)
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+def get_answer_cache():
+    """Get the process-wide answer cache"""
+    global _answer_cache
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = AnswerCache()
+        return _answer_cache
@@ -0,0 +1,152 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from modules.forecasting import fit_panel_models, MODEL_TYPES
+
+# Memoized backtest results keyed by a hash of the panel contents and settings
+_BACKTEST_CACHE = OrderedDict()
+BACKTEST_CACHE_SIZE = 32
+
+def panel_fingerprint(panel):
+    """Hash the contents of a metric panel"""
+    digest = hashlib.sha1()
+    for key in panel['keys']:
+        digest.update(repr(key).encode('utf-8'))
+    for name in ('years', 'values', 'mask'):
+        array = np.ascontiguousarray(panel[name])
+        digest.update(str(array.shape).encode('utf-8'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def _truncate_panel(panel, origin):
+    """Keep only the first `origin` observations of every series"""
+    mask = panel['mask'].copy()
+    mask[:, origin:] = False
+    return {'keys': panel['keys'], 'years': panel['years'], 'values': panel['values'], 'mask': mask}
+
+def _run_backtest(panel, horizon, models, min_train, confidence):
+    """Rolling-origin evaluation of every model on every series"""
+    n_series, max_len = panel['values'].shape
+    rows = np.arange(n_series)
+    n_points = panel['mask'].sum(axis=1)
+
+    ape = {model: [] for model in models}
+    covered = {model: [] for model in models}
+
+    # Each origin is evaluated for all series at once; origins are few (one per year of history)
+    for origin in range(min_train, max_len):
+        train = _truncate_panel(panel, origin)
+        forecast = fit_panel_models(train, horizon, models, confidence)
+        train_last_year = panel['years'][:, origin - 1]
+
+        for step in range(horizon):
+            target = origin + step
+            if target >= max_len:
+                break
+
+            actual = panel['values'][:, target]
+            lead = panel['years'][:, target] - train_last_year
+            valid = (n_points > target) & (lead >= 1) & (lead <= horizon)
+            lead_idx = np.clip(lead.astype(int) - 1, 0, horizon - 1)
+
+            for model in models:
+                result = forecast['models'][model]
+                predicted = result['predictions'][rows, lead_idx]
+                lower = result['lower_bound'][rows, lead_idx]
+                upper = result['upper_bound'][rows, lead_idx]
+
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    errors = np.abs(actual - predicted) / np.abs(actual)
+                errors = np.where(valid & np.isfinite(errors), errors, np.nan)
+                has_interval = valid & np.isfinite(lower) & np.isfinite(upper)
+                hits = np.where(has_interval, (actual >= lower) & (actual <= upper), np.nan)
+
+                ape[model].append(errors)
+                covered[model].append(hits)
+
+    metrics = {}
+    for model in models:
+        if ape[model]:
+            errors = np.vstack(ape[model])
+            hits = np.vstack(covered[model])
+        else:
+            errors = np.full((1, n_series), np.nan)
+            hits = np.full((1, n_series), np.nan)
+
+        n_forecasts = np.isfinite(errors).sum(axis=0)
+        n_intervals = np.isfinite(hits).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mape = np.where(n_forecasts > 0, np.nansum(errors, axis=0) / n_forecasts * 100, np.nan)
+            coverage = np.where(n_intervals > 0, np.nansum(hits, axis=0) / n_intervals, np.nan)
+
+        metrics[model] = {'mape': mape, 'coverage': coverage, 'n_forecasts': n_forecasts}
+
+    return metrics
+
+def _select_best_models(panel, metrics, models, confidence):
+    """Pick the lowest-MAPE model per series, falling back to in-sample R²"""
+    mape = np.vstack([metrics[model]['mape'] for model in models])
+    has_backtest = np.isfinite(mape).any(axis=0)
+    best_by_mape = np.argmin(np.where(np.isfinite(mape), mape, np.inf), axis=0)
+
+    # Series too short to backtest are ranked on in-sample fit instead
+    in_sample = fit_panel_models(panel, 1, models, confidence)
+    r_squared = np.vstack([in_sample['models'][model]['r_squared'] for model in models])
+    best_by_fit = np.argmax(np.where(np.isfinite(r_squared), r_squared, -np.inf), axis=0)
+
+    best_index = np.where(has_backtest, best_by_mape, best_by_fit)
+    best_model = np.array(models, dtype=object)[best_index]
+    basis = np.where(has_backtest, 'backtest MAPE', 'in-sample R²')
+    return best_model, basis
+
+def backtest_panel(panel, horizon=1, models=MODEL_TYPES, min_train=3, confidence=0.95):
+    """Rolling-origin backtest of every model, memoized on the panel contents"""
+    models = tuple(models)
+    cache_key = (panel_fingerprint(panel), horizon, models, min_train, confidence)
+    if cache_key in _BACKTEST_CACHE:
+        _BACKTEST_CACHE.move_to_end(cache_key)
+        return _BACKTEST_CACHE[cache_key]
+
+    if not panel['keys']:
+        result = {'keys': [], 'metrics': {}, 'best_model': np.array([], dtype=object),
+                  'selection_basis': np.array([], dtype=object)}
+    else:
+        metrics = _run_backtest(panel, horizon, models, max(min_train, 2), confidence)
+        best_model, basis = _select_best_models(panel, metrics, models, confidence)
+        result = {'keys': panel['keys'], 'metrics': metrics, 'best_model': best_model,
+                  'selection_basis': basis}
+
+    _BACKTEST_CACHE[cache_key] = result
+    if len(_BACKTEST_CACHE) > BACKTEST_CACHE_SIZE:
+        _BACKTEST_CACHE.popitem(last=False)
+    return result
+
+def backtest_table(backtest):
+    """Convert backtest metrics into a long-format DataFrame"""
+    rows = []
+    for model, metrics in backtest['metrics'].items():
+        for i, (entity, metric) in enumerate(backtest['keys']):
+            rows.append({
+                'Entity': entity,
+                'Metric': metric,
+                'Model': model,
+                'MAPE (%)': metrics['mape'][i],
+                'Interval Coverage': metrics['coverage'][i],
+                'Forecasts Evaluated': int(metrics['n_forecasts'][i]),
+                'Selected': backtest['best_model'][i] == model
+            })
+    return pd.DataFrame(rows)
+
+def select_best_forecasts(projection_df, backtest):
+    """Keep only the backtest-selected model's projections for each series"""
+    if projection_df.empty or not backtest['keys']:
+        return projection_df
+
+    selection = pd.DataFrame({
+        'Entity': [key[0] for key in backtest['keys']],
+        'Metric': [key[1] for key in backtest['keys']],
+        'Model': backtest['best_model'],
+        'Selected By': backtest['selection_basis']
+    })
+    return projection_df.merge(selection, on=['Entity', 'Metric', 'Model'], how='inner')
@@ -0,0 +1,178 @@
+import re
+import fitz  # PyMuPDF
+from langchain.schema import Document
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_MAX_TABLE_SIZE
+from utils.pdf_utils import create_document_index
+
+NUMBER_PATTERN = re.compile(r"\(?-?\$?\d[\d,]*(?:\.\d+)?\)?%?")
+STATEMENT_PATTERN = re.compile(r"(?i)(consolidated|statements? of|balance sheets?|cash flows?|income|note \d+|notes to)")
+FINANCIAL_PATTERN = re.compile(r'(?i)(table|figure|chart|financial|statement|balance sheet|income statement|cash flow)')
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def is_table_block(text):
+    """A block is tabular when most of its lines carry two or more numbers"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return False
+    numeric_lines = sum(1 for line in lines if len(NUMBER_PATTERN.findall(line)) >= 2)
+    return numeric_lines >= max(1, len(lines) // 2)
+
+def section_for_page(doc_index, page_number):
+    """Title of the last TOC entry starting on or before a (1-based) page"""
+    section = None
+    for entry in sorted(doc_index, key=lambda e: e['page']):
+        if entry['page'] <= page_number:
+            section = entry['title']
+        else:
+            break
+    return section
+
+def _page_blocks(page):
+    """Text blocks of a page in reading order, skipping images and bare page numbers"""
+    blocks = []
+    for x0, y0, x1, y1, text, block_no, block_type in page.get_text("blocks", sort=True):
+        text = text.strip()
+        if block_type != 0 or not text or re.fullmatch(r"(?i)(page\s+)?\d{1,4}", text):
+            continue
+        blocks.append(text)
+    return blocks
+
+def _split_long_text(text, chunk_size):
+    """Split an oversized prose block at sentence (or line) boundaries"""
+    pieces = SENTENCE_END.split(text) if SENTENCE_END.search(text) else text.splitlines()
+    parts, current = [], ""
+    for piece in pieces:
+        while len(piece) > chunk_size:
+            parts.append(piece[:chunk_size])
+            piece = piece[chunk_size:]
+        if current and len(current) + len(piece) + 1 > chunk_size:
+            parts.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}".strip()
+    if current:
+        parts.append(current)
+    return parts
+
+def _split_table(text, max_size):
+    """Split a very long table at row boundaries"""
+    parts, current = [], []
+    for line in text.splitlines():
+        if current and sum(len(l) + 1 for l in current) + len(line) > max_size:
+            parts.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        parts.append("\n".join(current))
+    return parts
+
+def _overlap_tail(text, chunk_overlap):
+    """Trailing sentences of a prose chunk, up to chunk_overlap characters"""
+    if chunk_overlap <= 0:
+        return ""
+    tail = ""
+    for sentence in reversed(SENTENCE_END.split(text)):
+        if len(tail) + len(sentence) + 1 > chunk_overlap:
+            break
+        tail = f"{sentence} {tail}".strip()
+    return tail
+
+def chunk_pdf(file_path, doc_info, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, doc_index=None, page_texts=None):
+    """Split a PDF into chunks that follow its layout and sections
+
+    Chunks never cross a TOC section boundary, tables are kept whole (up to
+    CHUNK_MAX_TABLE_SIZE characters), and only prose split inside a section
+    carries overlap. Each chunk records the page span it came from. When a
+    page_texts list is given, each page's text is appended to it.
+    """
+    if doc_index is None:
+        doc_index = create_document_index(file_path)
+
+    chunks = []
+    current = {'parts': [], 'start': None, 'end': None, 'section': None, 'has_table': False}
+
+    def flush(carry_overlap=False):
+        if not current['parts']:
+            return ""
+        text = "\n\n".join(current['parts'])
+        chunks.append(_make_document(text, file_path, doc_info, current['start'], current['end'],
+                                     current['section'], current['has_table']))
+        tail = _overlap_tail(current['parts'][-1], chunk_overlap) if carry_overlap and not current['has_table'] else ""
+        current.update(parts=[], start=None, end=None, has_table=False)
+        return tail
+
+    def add(text, page_number, is_table=False):
+        if current['start'] is None:
+            current['start'] = page_number
+        current['end'] = page_number
+        current['parts'].append(text)
+        current['has_table'] = current['has_table'] or is_table
+
+    def size():
+        return sum(len(p) + 2 for p in current['parts'])
+
+    with fitz.open(file_path) as doc:
+        for page_index, page in enumerate(doc):
+            page_number = page_index + 1
+            section = section_for_page(doc_index, page_number)
+
+            # A new section always starts a new chunk
+            if section != current['section']:
+                flush()
+                current['section'] = section
+
+            blocks = _page_blocks(page)
+            if page_texts is not None:
+                page_texts.append("\n".join(blocks))
+            
+            for block in blocks:
+                if is_table_block(block):
+                    # Tables stay together; a table that continues a table chunk joins it
+                    if current['parts'] and (not current['has_table'] or size() + len(block) > CHUNK_MAX_TABLE_SIZE):
+                        flush()
+                    for part in _split_table(block, CHUNK_MAX_TABLE_SIZE):
+                        if current['parts'] and size() + len(part) > CHUNK_MAX_TABLE_SIZE:
+                            flush()
+                        add(part, page_number, is_table=True)
+                    continue
+
+                if current['has_table']:
+                    # Short captions and totals right after a table belong with it
+                    if len(block) < 200 and size() + len(block) <= CHUNK_MAX_TABLE_SIZE:
+                        add(block, page_number)
+                        continue
+                    flush()
+
+                for piece in _split_long_text(block, chunk_size) if len(block) > chunk_size else [block]:
+                    if current['parts'] and size() + len(piece) > chunk_size:
+                        previous_end = current['end']
+                        tail = flush(carry_overlap=True)
+                        if tail:
+                            add(tail, previous_end)
+                    add(piece, page_number)
+
+        flush()
+
+    return chunks
+
+def _make_document(text, file_path, doc_info, start_page, end_page, section, has_table):
+    # The section title is kept in the text so retrieval can match on it
+    page_content = f"{section}\n{text}" if section and not text.startswith(section) else text
+    page_display = f"Page {start_page}" if start_page == end_page else f"Pages {start_page}-{end_page}"
+
+    metadata = {
+        'source': file_path,
+        'page': start_page - 1,  # 0-based like PyPDFLoader
+        'page_end': end_page - 1,
+        'page_display': page_display,
+        'doc_type': doc_info['type'],
+        'doc_year': doc_info['year'],
+        'company': doc_info['company']
+    }
+    if section:
+        metadata['section'] = section
+    if has_table:
+        metadata['content_type'] = 'table' if not STATEMENT_PATTERN.search(section or '') else 'financial_data'
+    elif FINANCIAL_PATTERN.search(text):
+        metadata['content_type'] = 'financial_data'
+    return Document(page_content=page_content, metadata=metadata)
@@ -1,5 +1,10 @@
 import re
-from config import STANDARD_METRICS
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import (STANDARD_METRICS, COMPARISON_WORKERS, COMPARISON_BATCH_SIZE,
+                    COMPARISON_CHUNKS_PER_METRIC, COMPARISON_MAX_CHUNKS)
+from modules.tracing import span
+from modules.quota import quota_context, current_quota_context
 
 def extract_text_from_response(response_obj):
     """Helper function to extract text from response object"""
@@ -14,14 +19,9 @@ def extract_text_from_response(response_obj):
     else:
         return str(response_obj)
 
-def extract_standardized_financials(qa_chain, doc_type):
-    """Extract standardized financial data based on document type"""
-    # Get the list of metrics to extract based on document type
-    metrics_to_extract = STANDARD_METRICS.get(doc_type, STANDARD_METRICS['Annual Report'])
-    
-    extracted_data = {}
-    for metric in metrics_to_extract:
-        prompt = f"""
+def extract_metric(qa_chain, metric):
+    """Extract one metric's value, page, period and confidence"""
+    prompt = f"""
         Extract the exact value of '{metric}' from the document.
         Return ONLY:
         1. The exact value with proper units (e.g., "$123.45 million")
@@ -35,23 +35,83 @@ def extract_standardized_financials(qa_chain, doc_type):
         Period: [reporting period]
         Confidence: [1-5]
         """
-        
-        # Updated to use invoke() and handle the response properly
+    
+    # Bulk extraction yields to interactive questions when the API quota is tight
+    with span('extract.metric', metric=metric), quota_context(priority='extraction'):
         response_obj = qa_chain.invoke(prompt)
-        response_text = extract_text_from_response(response_obj)
-        
-        # Parse the response to extract the value
+    response_text = extract_text_from_response(response_obj)
+    
+    # Parse the response to extract the value
+    with span('extract.parse'):
         value_match = re.search(r'Value:\s*(.*)', response_text)
         page_match = re.search(r'Page:\s*(.*)', response_text)
         period_match = re.search(r'Period:\s*(.*)', response_text)
         confidence_match = re.search(r'Confidence:\s*(.*)', response_text)
+    
+    return {
+        'value': value_match.group(1).strip() if value_match else "Not found",
+        'page': page_match.group(1).strip() if page_match else "Not found",
+        'period': period_match.group(1).strip() if period_match else "Not found",
+        'confidence': confidence_match.group(1).strip() if confidence_match else "0"
+    }
+
+def standard_metric_names(doc_type):
+    """Metrics to extract for a document type"""
+    return STANDARD_METRICS.get(doc_type, STANDARD_METRICS['Annual Report'])
+
+def is_found(value):
+    return bool(value) and value != "Not found" and not str(value).startswith("Error")
+
+def cell_to_metric(cell):
+    """A comparison matrix cell in the extracted data format"""
+    return {
+        'value': cell['value'],
+        'page': cell.get('page') or "Not found",
+        'period': cell.get('year') or "Not found",
+        'confidence': cell.get('confidence') or "0"
+    }
+
+def metric_to_cell(details, doc_info):
+    """An extracted metric as a comparison matrix cell"""
+    return {
+        'value': details['value'],
+        'page': details.get('page'),
+        'year': details.get('period') or doc_info['year'],
+        'confidence': details.get('confidence') or "0",
+        'company': doc_info['company']
+    }
+
+def cached_comparison_metrics(content_hash, metrics):
+    """Metrics of a document already found by the comparison matrix, in the extracted data format"""
+    from modules.answer_cache import get_answer_cache
+
+    answer_cache = get_answer_cache()
+    found = {}
+    for metric in metrics:
+        if answer_cache.contains(content_hash, metric, kind='comparison'):
+            cell = answer_cache.get(content_hash, metric, kind='comparison')['answer']
+            if is_found(cell['value']):
+                found[metric] = cell_to_metric(cell)
+    return found
+
+def extract_standardized_financials(qa_chain, doc_type, progress_callback=None, known=None):
+    """Extract standardized financial data based on document type
+
+    progress_callback(done, total, metric) is called after each metric; it may
+    raise to stop the extraction early (e.g. when a background job is cancelled).
+    Metrics in known (already extracted, e.g. by the comparison matrix) are
+    used as they are instead of asking the LLM again.
+    """
+    # Get the list of metrics to extract based on document type
+    metrics_to_extract = standard_metric_names(doc_type)
+    known = known or {}
+    
+    extracted_data = {}
+    for metric in metrics_to_extract:
+        extracted_data[metric] = dict(known[metric]) if metric in known else extract_metric(qa_chain, metric)
         
-        extracted_data[metric] = {
-            'value': value_match.group(1).strip() if value_match else "Not found",
-            'page': page_match.group(1).strip() if page_match else "Not found",
-            'period': period_match.group(1).strip() if period_match else "Not found",
-            'confidence': confidence_match.group(1).strip() if confidence_match else "0"
-        }
+        if progress_callback:
+            progress_callback(len(extracted_data), len(metrics_to_extract), metric)
     
     return extracted_data
 
@@ -81,13 +141,15 @@ def compare_documents(documents, metric_name):
         """
         
         # Updated to use invoke() and handle the response properly
-        response_obj = qa_chain.invoke(prompt)
+        with span('compare.document', document=doc_name, metric=metric_name):
+            response_obj = qa_chain.invoke(prompt)
         response_text = extract_text_from_response(response_obj)
         
         # Parse the response
-        value_match = re.search(r'Value:\s*(.*)', response_text)
-        year_match = re.search(r'Year:\s*(.*)', response_text)
-        confidence_match = re.search(r'Confidence:\s*(.*)', response_text)
+        with span('extract.parse'):
+            value_match = re.search(r'Value:\s*(.*)', response_text)
+            year_match = re.search(r'Year:\s*(.*)', response_text)
+            confidence_match = re.search(r'Confidence:\s*(.*)', response_text)
         
         comparison_results[doc_name] = {
             'value': value_match.group(1).strip() if value_match else "Not found",
@@ -98,6 +160,131 @@ def compare_documents(documents, metric_name):
     
     return comparison_results
 
+def parse_metric_blocks(response_text, metrics):
+    """Parse "Metric: ... / Value: ... / Page: ... / Year: ... / Confidence: ..." blocks into {metric: fields}"""
+    wanted = {m.lower(): m for m in metrics}
+    parsed = {}
+    for block in re.split(r"(?im)^\s*(?=Metric:)", response_text):
+        name_match = re.match(r"(?i)Metric:\s*\**\s*(.+?)\s*\**\s*$", block.split("\n", 1)[0])
+        if not name_match or name_match.group(1).lower() not in wanted:
+            continue
+        fields = {key.lower(): value.strip() for key, value in re.findall(r"(?im)^\s*(Value|Page|Year|Confidence):\s*(.*)$", block)}
+        parsed[wanted[name_match.group(1).lower()]] = fields
+    return parsed
+
+def extract_metrics_batch(vectorstore, metrics, doc_info):
+    """Extract several metrics from one document with a single LLM call
+
+    Each metric gets its own small retrieval; the chunks are merged (each
+    one once) into a shared context. Returns {metric: cell} with the same
+    fields as compare_documents.
+    """
+    from modules.qa_chain import get_llm, retrieve_with_scores
+    from modules.embeddings import get_retriever
+    from config import RETRIEVER_SCORE_THRESHOLD
+
+    retriever = get_retriever(vectorstore, k=COMPARISON_CHUNKS_PER_METRIC, score_threshold=RETRIEVER_SCORE_THRESHOLD)
+    with span('compare.retrieval', metrics=len(metrics)) as retrieval_span:
+        chunks = {}
+        for metric in metrics:
+            for doc in retrieve_with_scores(retriever, metric):
+                key = doc.metadata.get('chunk_id') or doc.page_content
+                if key not in chunks or doc.metadata['score'] < chunks[key].metadata['score']:
+                    chunks[key] = doc
+        context_docs = sorted(chunks.values(), key=lambda d: d.metadata['score'])[:COMPARISON_MAX_CHUNKS]
+        retrieval_span.set(chunks=len(context_docs))
+    
+    context = "\n\n".join(f"[{doc.metadata.get('page_display', 'Page ?')}]\n{doc.page_content}" for doc in context_docs)
+    metric_list = "\n".join(f"- {metric}" for metric in metrics)
+    prompt = f"""
+    Context: {context}
+    
+    Question: Find the values of these metrics in the financial document above:
+    {metric_list}
+    
+    For EACH metric return one block in exactly this format, using "Not found" when the document does not state it:
+    Metric: [metric name as listed]
+    Value: [exact value with proper units, e.g. "$123.45 million"]
+    Page: [page number]
+    Year: [year or period]
+    Confidence: [1-5]
+    
+    DO NOT make up or estimate any values.
+    """
+    
+    with span('compare.document', metrics=len(metrics), context_chars=len(context)):
+        response_obj = get_llm().invoke(prompt)
+        # Chat models return a message; the stub LLM returns a string
+        response_text = extract_text_from_response(getattr(response_obj, 'content', response_obj))
+    parsed = parse_metric_blocks(response_text, metrics)
+    
+    return {metric: {
+        'value': parsed.get(metric, {}).get('value') or "Not found",
+        'page': parsed.get(metric, {}).get('page') or "Not found",
+        'year': parsed.get(metric, {}).get('year') or doc_info['year'],
+        'confidence': parsed.get(metric, {}).get('confidence') or "0",
+        'company': doc_info['company']
+    } for metric in metrics}
+
+def compare_documents_matrix(documents, metrics, max_workers=COMPARISON_WORKERS):
+    """Extract every metric from every document, yielding (doc_name, metric, cell) as cells complete
+
+    Cells already in the answer cache, or found by a standard metrics
+    extraction of the document, are yielded first; the rest are extracted
+    per document in batches of COMPARISON_BATCH_SIZE metrics, with documents
+    processed concurrently. New cells are cached per document content and
+    metric, where standard metrics extraction picks them up as well.
+    """
+    from modules.answer_cache import get_answer_cache
+    from modules.single_flight import coalesce, request_key
+    from modules.precompute import cached_metrics
+
+    answer_cache = get_answer_cache()
+    pending = []
+    for doc_name, doc_data in documents.items():
+        content_hash = doc_data.get('content_hash')
+        standard = (cached_metrics(content_hash, doc_data['info'].get('type')) or {}) if content_hash else {}
+        missing = []
+        for metric in metrics:
+            cached = answer_cache.get(content_hash, metric, kind='comparison')
+            if cached is not None:
+                yield doc_name, metric, dict(cached['answer'])
+            elif metric in standard and is_found(standard[metric]['value']):
+                yield doc_name, metric, metric_to_cell(standard[metric], doc_data['info'])
+            else:
+                missing.append(metric)
+        for start in range(0, len(missing), COMPARISON_BATCH_SIZE):
+            pending.append((doc_name, doc_data, missing[start:start + COMPARISON_BATCH_SIZE]))
+    if not pending:
+        return
+    
+    # Bulk extraction yields to interactive questions under the API quota; workers keep the caller's session
+    session_id = current_quota_context()[1]
+    
+    def extract(doc_data, batch):
+        content_hash = doc_data.get('content_hash')
+        key = request_key(content_hash, *batch) if content_hash else None
+        with quota_context(priority='extraction', session_id=session_id):
+            cells = coalesce('comparison', key, extract_metrics_batch, doc_data['vectorstore'], batch, doc_data['info'])
+        for metric, cell in cells.items():
+            answer_cache.put(content_hash, metric, cell, kind='comparison')
+        return cells
+    
+    with span('compare.matrix', documents=len(documents), metrics=len(metrics), batches=len(pending)):
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compare") as executor:
+            futures = {executor.submit(contextvars.copy_context().run, extract, doc_data, batch): (doc_name, doc_data, batch)
+                       for doc_name, doc_data, batch in pending}
+            for future in as_completed(futures):
+                doc_name, doc_data, batch = futures[future]
+                try:
+                    cells = future.result()
+                except Exception as e:
+                    # A failed document leaves its cells uncached so they are retried next time
+                    cells = {metric: {'value': f"Error: {e}", 'page': None, 'year': doc_data['info']['year'],
+                                      'confidence': "0", 'company': doc_data['info']['company']} for metric in batch}
+                for metric, cell in cells.items():
+                    yield doc_name, metric, cell
+
 def extract_table_data(qa_chain, table_type):
     """Extract structured tabular data from financial statements"""
     prompt = f"""
@@ -116,7 +303,8 @@ def extract_table_data(qa_chain, table_type):
     """
     
     # Updated to use invoke() and handle the response properly
-    response_obj = qa_chain.invoke(prompt)
+    with span('extract.table', table=table_type):
+        response_obj = qa_chain.invoke(prompt)
     return extract_text_from_response(response_obj)
 
 def extract_numeric_value(value_str):
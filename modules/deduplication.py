@@ -0,0 +1,170 @@
+import re
+import zlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from config import DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE, DEDUP_CORPUS_MAX_CHUNKS
+from modules.tracing import span, get_tracer
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=DEDUP_NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=DEDUP_NUM_PERM).astype(np.uint64)
+
+def shingle_hashes(text, shingle_size=DEDUP_SHINGLE_SIZE):
+    """32-bit hashes of the word shingles in a chunk"""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < shingle_size:
+        shingles = {" ".join(tokens)} if tokens else set()
+    else:
+        shingles = {" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+def minhash_signature(text):
+    """MinHash signature of a chunk (None for chunks without any tokens)"""
+    hashes = shingle_hashes(text)
+    if hashes.size == 0:
+        return None
+    # a * h fits in 64 bits because a < 2^31 and h < 2^32
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+def estimated_similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity from the share of matching MinHash values"""
+    return float(np.mean(signature_a == signature_b))
+
+def _band_keys(signature, bands=DEDUP_BANDS):
+    rows = len(signature) // bands
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(bands)]
+
+def _chunk_pages(chunk):
+    # Pages are 0-based in metadata; layout chunks may span several
+    start = chunk.metadata.get('page', 0)
+    return range(start + 1, chunk.metadata.get('page_end', start) + 2)
+
+def deduplicate_chunks(chunks, threshold=DEDUP_THRESHOLD):
+    """Collapse near-identical chunks of one document into a single chunk
+
+    The kept chunk (the first occurrence) gets 'source_pages' listing every
+    page the text appeared on and 'duplicate_count'. Returns the kept chunks
+    and their MinHash signatures.
+    """
+    with span('ingest.dedupe', chunks_in=len(chunks)) as dedupe_span:
+        signatures = [minhash_signature(chunk.page_content) for chunk in chunks]
+
+        # LSH buckets propose candidates; the full signature confirms them
+        representative = list(range(len(chunks)))
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            for key in _band_keys(signature):
+                for j in buckets.get(key, []):
+                    if representative[j] == j and estimated_similarity(signature, signatures[j]) >= threshold:
+                        representative[i] = j
+                        break
+                if representative[i] != i:
+                    break
+            if representative[i] == i:
+                for key in _band_keys(signature):
+                    buckets.setdefault(key, []).append(i)
+
+        kept, kept_signatures, pages = [], [], {}
+        for i, chunk in enumerate(chunks):
+            pages.setdefault(representative[i], set()).update(_chunk_pages(chunk))
+        for i, chunk in enumerate(chunks):
+            if representative[i] != i:
+                continue
+            chunk.metadata['source_pages'] = sorted(pages[i])
+            chunk.metadata['duplicate_count'] = sum(1 for r in representative if r == i) - 1
+            kept.append(chunk)
+            kept_signatures.append(signatures[i])
+
+        removed = len(chunks) - len(kept)
+        dedupe_span.set(chunks_out=len(kept), removed=removed)
+        get_tracer().increment('dedup_chunks_removed', removed)
+    return kept, kept_signatures
+
+class CorpusEmbeddingIndex:
+    """Embeddings of chunks already indexed anywhere in the corpus, found by MinHash LSH
+
+    A chunk that is a near-duplicate of one embedded for another document
+    reuses that vector instead of calling the embedding API again, and records
+    where else the text appears.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, max_chunks=DEDUP_CORPUS_MAX_CHUNKS):
+        self.threshold = threshold
+        self.max_chunks = max_chunks
+        self._entries = OrderedDict()  # id -> (signature, vector, source, pages)
+        self._buckets = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.embedded = 0
+
+    def _find(self, signature):
+        for key in _band_keys(signature):
+            for entry_id in self._buckets.get(key, ()):
+                entry = self._entries.get(entry_id)
+                if entry and estimated_similarity(signature, entry[0]) >= self.threshold:
+                    return entry
+        return None
+
+    def _add(self, signature, vector, source, pages):
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (signature, vector, source, pages)
+        for key in _band_keys(signature):
+            self._buckets.setdefault(key, []).append(entry_id)
+
+        # Forget the oldest chunks once the index is full
+        while len(self._entries) > self.max_chunks:
+            old_id, (old_signature, _, _, _) = self._entries.popitem(last=False)
+            for key in _band_keys(old_signature):
+                bucket = self._buckets.get(key)
+                if bucket:
+                    bucket.remove(old_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def embed_documents(self, chunks, signatures, embeddings, source=None):
+        """Embed chunks, reusing vectors of near-duplicates already in the corpus"""
+        vectors = [None] * len(chunks)
+        to_embed = []
+        with self._lock:
+            for i, (chunk, signature) in enumerate(zip(chunks, signatures)):
+                match = self._find(signature) if signature is not None else None
+                if match is not None:
+                    vectors[i] = match[1]
+                    if match[2] != source:
+                        chunk.metadata['also_in'] = [{'source': match[2], 'pages': match[3]}]
+                else:
+                    to_embed.append(i)
+
+        if to_embed:
+            new_vectors = embeddings.embed_documents([chunks[i].page_content for i in to_embed])
+            for i, vector in zip(to_embed, new_vectors):
+                vectors[i] = vector
+
+        with self._lock:
+            for i in to_embed:
+                if signatures[i] is not None:
+                    self._add(signatures[i], vectors[i], source, chunks[i].metadata.get('source_pages'))
+            self.reused += len(chunks) - len(to_embed)
+            self.embedded += len(to_embed)
+
+        get_tracer().increment('embedded_chunks', len(to_embed))
+        get_tracer().increment('embeddings_reused', len(chunks) - len(to_embed))
+        return vectors
+
+_corpus_indexes = {}
+_corpus_lock = threading.Lock()
+
+def get_corpus_index(embedding_key):
+    """Get the corpus index for one embedding model (vectors from different models never mix)"""
+    with _corpus_lock:
+        if embedding_key not in _corpus_indexes:
+            _corpus_indexes[embedding_key] = CorpusEmbeddingIndex()
+        return _corpus_indexes[embedding_key]
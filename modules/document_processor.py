@@ -4,11 +4,13 @@ import glob
 import streamlit as st
 from datetime import datetime
 import fitz  # PyMuPDF
-from langchain.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-from modules.embeddings import create_vectorstore
 from modules.document_analyzer import detect_document_type
+from modules.document_registry import get_document_registry, get_session_id, file_content_hash
+from modules.tracing import span, get_tracer
+from modules.quota import quota_context
+from modules.statement_parser import parse_statements, has_statements, remember_statements
+from config import DEDUP_ENABLED, CHUNKER, CHUNK_SIZE, CHUNK_OVERLAP, SEARCH_INDEX_ENABLED, PRECOMPUTE_ENABLED, STATEMENT_PARSING
 from utils.pdf_utils import create_document_index
 
 def process_document_folder(folder_path):
@@ -40,6 +42,7 @@ def process_document_folder(folder_path):
             processed_docs[file_name] = {
                 'path': pdf_file,
                 'vectorstore': vectorstore,
+                'content_hash': vectorstore.content_hash,
                 'info': file_info,
                 'pages': num_pages,
                 'index': doc_index
@@ -60,48 +63,75 @@ def process_single_document(file_path):
         return None
     
     with st.spinner(f"Processing document: {os.path.basename(file_path)}"):
+        result = ingest_document(file_path)
+    
+    # Answer the standard questions in the background so the first clicks are instant
+    if PRECOMPUTE_ENABLED:
+        from modules.precompute import schedule_precompute
+        schedule_precompute(result[0].content_hash, result[1]['type'], file_path,
+                            label=f"Precompute answers for {os.path.basename(file_path)}", session_id=get_session_id())
+    return result
+
+def ingest_document(file_path):
+    """Build the index, info and TOC for a PDF without any UI calls"""
+    with span('ingest.document', file=os.path.basename(file_path)) as ingest_span:
         # Get document type and info
         doc_info = detect_document_type(file_path)
         
-        # Load the PDF
-        loader = PyPDFLoader(file_path)
-        documents = loader.load()
-        
-        # Add enhanced metadata to each document
-        for doc in documents:
-            if 'source' in doc.metadata and 'page' in doc.metadata:
-                doc.metadata['page_display'] = f"Page {doc.metadata['page'] + 1}"
-                doc.metadata['doc_type'] = doc_info['type']
-                doc.metadata['doc_year'] = doc_info['year']
-                doc.metadata['company'] = doc_info['company']
-                
-                # Extract section headers for better context
-                section_match = re.search(r'(?i)(PART\s+[IVX]+|Item\s+\d+[A-Za-z]*)', doc.page_content)
-                if section_match:
-                    doc.metadata['section'] = section_match.group(0)
-                
-                # Look for tables and financial data
-                if re.search(r'(?i)(table|figure|chart|financial|statement|balance sheet|income statement|cash flow)', doc.page_content):
-                    doc.metadata['content_type'] = 'financial_data'
+        # Create document index for navigation (the chunker also uses it for section boundaries)
+        with span('ingest.toc'):
+            doc_index = create_document_index(file_path)
         
-        # Use smarter text splitting - customize for financial documents
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=800,  # Smaller chunks for more precise retrieval
-            chunk_overlap=200,  # Larger overlap to maintain context
-            separators=["\n\n", "\n", ".", " ", ""],  # Prioritize splitting at paragraph boundaries
-            length_function=len
-        )
-        chunks = text_splitter.split_documents(documents)
+        # Reuse the shared index if any session already processed this exact file
+        registry = get_document_registry()
+        content_hash = file_content_hash(file_path)
+        page_texts = []  # Filled while chunking and reused for the search index
+        if registry.contains(content_hash):
+            get_tracer().increment('vectorstore_cache_hits')
+            ingest_span.set(cache_hit=True)
+            vectorstore = registry.handle(content_hash)
+        else:
+            get_tracer().increment('vectorstore_cache_misses')
+            ingest_span.set(cache_hit=False)
+            # LangChain and the embedding client are only loaded once a document is processed
+            from modules.embeddings import create_vectorstore
+            chunks = load_and_split_document(file_path, doc_info, doc_index, page_texts)
+            
+            # Collapse repeated boilerplate so it is embedded and retrieved once
+            signatures = None
+            if DEDUP_ENABLED:
+                from modules.deduplication import deduplicate_chunks
+                chunks, signatures = deduplicate_chunks(chunks)
+            ingest_span.set(chunks=len(chunks))
+            
+            # Stable chunk IDs let every answer record exactly which chunks it was based on
+            for i, chunk in enumerate(chunks):
+                chunk.metadata['chunk_id'] = f"{content_hash[:12]}-{i}"
+            
+            # Create vector store with embeddings (ingest has the lowest API quota priority)
+            with quota_context(priority='ingest'):
+                vectorstore = create_vectorstore(chunks, signatures=signatures, source=os.path.basename(file_path))
+            vectorstore = registry.register(content_hash, vectorstore, os.path.basename(file_path))
         
-        # Create vector store with embeddings
-        vectorstore = create_vectorstore(chunks)
+        # Full-text page index for corpus-wide search (kept per content hash like the vectorstore)
+        if SEARCH_INDEX_ENABLED:
+            from modules.search_index import get_search_index
+            search_index = get_search_index()
+            if not search_index.has_document(content_hash):
+                with span('ingest.search_index'):
+                    if page_texts:
+                        search_index.add_document(content_hash, file_path, page_texts)
+                    else:
+                        search_index.index_pdf(content_hash, file_path)
         
-        # Create document index for navigation
-        doc_index = create_document_index(file_path)
+        # Every period column of the statement tables, so one filing yields a series per metric
+        if STATEMENT_PARSING and not has_statements(content_hash):
+            remember_statements(content_hash, parse_statements(file_path, page_texts))
         
         # Get number of pages
         with fitz.open(file_path) as doc:
             num_pages = len(doc)
+        ingest_span.set(pages=num_pages)
         
         # Create file info dictionary
         file_info = {
@@ -112,5 +142,57 @@ def process_single_document(file_path):
             'company': doc_info['company'],
             'processed_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-        
-        return vectorstore, file_info, num_pages, doc_index
\ No newline at end of file
+    
+    return vectorstore, file_info, num_pages, doc_index
+
+def load_and_split_document(file_path, doc_info, doc_index=None, page_texts=None):
+    """Load a PDF and split it into chunks with enhanced metadata
+
+    If page_texts is a list, the text of every page is appended to it.
+    """
+    if CHUNKER == "layout":
+        from modules.chunking import chunk_pdf
+        with span('ingest.chunk') as chunk_span:
+            chunks = chunk_pdf(file_path, doc_info, doc_index=doc_index, page_texts=page_texts)
+            chunk_span.set(chunks=len(chunks))
+        return chunks
+    
+    from langchain.document_loaders import PyPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    
+    # Load the PDF
+    with span('ingest.parse_pdf') as parse_span:
+        loader = PyPDFLoader(file_path)
+        documents = loader.load()
+        parse_span.set(pages=len(documents))
+    if page_texts is not None:
+        page_texts.extend(doc.page_content for doc in documents)
+    
+    # Add enhanced metadata to each document
+    for doc in documents:
+        if 'source' in doc.metadata and 'page' in doc.metadata:
+            doc.metadata['page_display'] = f"Page {doc.metadata['page'] + 1}"
+            doc.metadata['doc_type'] = doc_info['type']
+            doc.metadata['doc_year'] = doc_info['year']
+            doc.metadata['company'] = doc_info['company']
+            
+            # Extract section headers for better context
+            section_match = re.search(r'(?i)(PART\s+[IVX]+|Item\s+\d+[A-Za-z]*)', doc.page_content)
+            if section_match:
+                doc.metadata['section'] = section_match.group(0)
+            
+            # Look for tables and financial data
+            if re.search(r'(?i)(table|figure|chart|financial|statement|balance sheet|income statement|cash flow)', doc.page_content):
+                doc.metadata['content_type'] = 'financial_data'
+    
+    # Use smarter text splitting - customize for financial documents
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,  # Smaller chunks for more precise retrieval
+        chunk_overlap=CHUNK_OVERLAP,  # Larger overlap to maintain context
+        separators=["\n\n", "\n", ".", " ", ""],  # Prioritize splitting at paragraph boundaries
+        length_function=len
+    )
+    with span('ingest.split') as split_span:
+        chunks = text_splitter.split_documents(documents)
+        split_span.set(chunks=len(chunks))
+    return chunks
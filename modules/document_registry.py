@@ -0,0 +1,288 @@
+import os
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from config import VECTORSTORE_MEMORY_BUDGET_MB, VECTORSTORE_CACHE_DIR, VECTORSTORE_MMAP
+from modules.tracing import span
+
+def file_content_hash(file_path, block_size=1024 * 1024):
+    """Compute a SHA-256 hash of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def estimate_vectorstore_bytes(vectorstore):
+    """Estimate the resident memory used by a FAISS vectorstore"""
+    if hasattr(vectorstore, 'resident_bytes'):
+        return vectorstore.resident_bytes()
+
+    total = 0
+    index = getattr(vectorstore, 'index', None)
+    if index is not None:
+        total += index.ntotal * index.d * 4  # float32 vectors
+
+    docstore = getattr(vectorstore, 'docstore', None)
+    for doc in getattr(docstore, '_dict', {}).values():
+        total += len(doc.page_content.encode('utf-8')) + len(str(doc.metadata))
+    return total
+
+class DocumentRegistry:
+    """Process-wide vectorstore store shared by all sessions.
+
+    Vectorstores are keyed by the content hash of their source file. Sessions
+    hold references to the documents they use; when resident memory exceeds the
+    budget, least recently used stores (unreferenced ones first) are written to
+    disk and dropped from memory, then reloaded transparently on next use.
+
+    With mmap enabled, new stores are written to disk straight away in the
+    memory-mapped layout and served from there, so other worker processes
+    find them by content hash and opening one is nearly free.
+    """
+
+    def __init__(self, memory_budget_bytes, cache_dir, mmap=VECTORSTORE_MMAP):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.cache_dir = cache_dir
+        self.mmap = mmap
+        self._lock = threading.RLock()
+        self._resident = OrderedDict()  # content hash -> vectorstore, in LRU order
+        self._sizes = {}
+        self._labels = {}
+        self._refs = {}  # content hash -> set of session ids
+        self._on_disk = set()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def _store_path(self, content_hash):
+        return os.path.join(self.cache_dir, content_hash)
+
+    def _is_persisted_mmap(self, content_hash):
+        from modules.mmap_store import is_mmap_store
+        from modules.embeddings import get_embedding_key
+        return is_mmap_store(self._store_path(content_hash), get_embedding_key())
+
+    def contains(self, content_hash):
+        """Check whether a document is registered, in memory or on disk"""
+        with self._lock:
+            found = content_hash in self._resident or content_hash in self._on_disk
+            if not found and self.mmap and self._is_persisted_mmap(content_hash):
+                # Written by another worker process or an earlier run
+                self._on_disk.add(content_hash)
+                found = True
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return found
+
+    def register(self, content_hash, vectorstore, label=None):
+        """Add a freshly built vectorstore to the registry"""
+        with self._lock:
+            if self.mmap:
+                self._persist(content_hash, vectorstore)
+                vectorstore = self._open(content_hash)
+            self._resident[content_hash] = vectorstore
+            self._resident.move_to_end(content_hash)
+            self._sizes[content_hash] = estimate_vectorstore_bytes(vectorstore)
+            self._labels[content_hash] = label or self._labels.get(content_hash, content_hash[:12])
+            self._refs.setdefault(content_hash, set())
+            self._evict_if_needed(protect=content_hash)
+        return SharedVectorstore(content_hash, self)
+
+    def handle(self, content_hash):
+        """Get a session-independent handle to a registered vectorstore"""
+        return SharedVectorstore(content_hash, self)
+
+    def get(self, content_hash):
+        """Return the vectorstore, reloading it from disk if it was evicted"""
+        with self._lock:
+            if content_hash in self._resident:
+                self._resident.move_to_end(content_hash)
+                return self._resident[content_hash]
+
+            if content_hash not in self._on_disk:
+                raise KeyError(f"Document {content_hash[:12]} is not registered")
+
+            with span('index.reload'):
+                vectorstore = self._open(content_hash)
+            self.reloads += 1
+            self._resident[content_hash] = vectorstore
+            self._sizes[content_hash] = estimate_vectorstore_bytes(vectorstore)
+            self._evict_if_needed(protect=content_hash)
+            return vectorstore
+
+    def acquire(self, content_hash, session_id):
+        """Record that a session is using a document"""
+        with self._lock:
+            self._refs.setdefault(content_hash, set()).add(session_id)
+
+    def release(self, content_hash, session_id):
+        """Record that a session no longer uses a document"""
+        with self._lock:
+            self._refs.get(content_hash, set()).discard(session_id)
+            self._evict_if_needed()
+
+    def sync_session(self, session_id, content_hashes):
+        """Make a session's references match the documents it currently holds"""
+        content_hashes = set(content_hashes)
+        with self._lock:
+            for content_hash, sessions in self._refs.items():
+                if session_id in sessions and content_hash not in content_hashes:
+                    sessions.discard(session_id)
+            for content_hash in content_hashes:
+                self._refs.setdefault(content_hash, set()).add(session_id)
+            self._evict_if_needed()
+
+    def release_session(self, session_id):
+        """Drop every reference held by a session"""
+        self.sync_session(session_id, ())
+
+    def resident_bytes(self):
+        """Total estimated memory of resident vectorstores"""
+        with self._lock:
+            return sum(self._sizes.get(h, 0) for h in self._resident)
+
+    def _evict_if_needed(self, protect=None):
+        """Move least recently used vectorstores to disk until under budget"""
+        while self.resident_bytes() > self.memory_budget_bytes:
+            candidates = [h for h in self._resident if h != protect]
+            if not candidates:
+                break
+
+            # Prefer documents no session is using, then fall back to plain LRU
+            unreferenced = [h for h in candidates if not self._refs.get(h)]
+            victim = (unreferenced or candidates)[0]
+            self._spill(victim)
+
+    def _persist(self, content_hash, vectorstore):
+        """Write a FAISS vectorstore to disk (memory-mapped layout when enabled)"""
+        if content_hash in self._on_disk:
+            return
+        path = self._store_path(content_hash)
+        with span('index.spill', mmap=self.mmap):
+            if self.mmap:
+                from modules.mmap_store import write_faiss_as_mmap
+                from modules.embeddings import get_embedding_key
+                os.makedirs(self.cache_dir, exist_ok=True)
+                write_faiss_as_mmap(path, vectorstore, get_embedding_key())
+            else:
+                os.makedirs(path, exist_ok=True)
+                vectorstore.save_local(path)
+        self._on_disk.add(content_hash)
+
+    def _open(self, content_hash):
+        """Open a persisted vectorstore; memory-mapped stores are read lazily"""
+        from modules.embeddings import get_embeddings
+        path = self._store_path(content_hash)
+        if self._is_persisted_mmap(content_hash):
+            from modules.mmap_store import MmapVectorStore
+            return MmapVectorStore(path, get_embeddings())
+
+        from langchain.vectorstores import FAISS
+        return FAISS.load_local(path, get_embeddings())
+
+    def _spill(self, content_hash):
+        """Persist a vectorstore to disk and drop it from memory"""
+        vectorstore = self._resident.pop(content_hash)
+        self._persist(content_hash, vectorstore)
+        self.evictions += 1
+
+    def forget(self, content_hash):
+        """Remove a document from memory and disk entirely"""
+        with self._lock:
+            self._resident.pop(content_hash, None)
+            self._sizes.pop(content_hash, None)
+            self._labels.pop(content_hash, None)
+            self._refs.pop(content_hash, None)
+            if content_hash in self._on_disk:
+                shutil.rmtree(self._store_path(content_hash), ignore_errors=True)
+                self._on_disk.discard(content_hash)
+
+    def stats(self):
+        """Per-document memory and reference information"""
+        with self._lock:
+            hashes = list(self._resident) + [h for h in self._on_disk if h not in self._resident]
+            return [{
+                'content_hash': h,
+                'label': self._labels.get(h, h[:12]),
+                'resident': h in self._resident,
+                'bytes': self._sizes.get(h, 0) if h in self._resident else 0,
+                'sessions': len(self._refs.get(h, ())),
+                'on_disk': h in self._on_disk
+            } for h in hashes]
+
+class SharedVectorstore:
+    """Lightweight handle that resolves to a registry vectorstore on each use"""
+
+    def __init__(self, content_hash, registry):
+        self.content_hash = content_hash
+        self._registry = registry
+
+    def resolve(self):
+        return self._registry.get(self.content_hash)
+
+    def __getattr__(self, name):
+        # Only called for attributes not defined on the handle itself
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        return f"SharedVectorstore({self.content_hash[:12]})"
+
+class SessionLease:
+    """Releases a session's document references when its state is garbage collected"""
+
+    def __init__(self, registry, session_id):
+        self.registry = registry
+        self.session_id = session_id
+        self.created_at = time.time()
+
+    def __del__(self):
+        try:
+            self.registry.release_session(self.session_id)
+        except Exception:
+            pass
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_document_registry():
+    """Get the process-wide document registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DocumentRegistry(VECTORSTORE_MEMORY_BUDGET_MB * 1024 * 1024, VECTORSTORE_CACHE_DIR)
+        return _registry
+
+def get_session_id():
+    """Identify the current Streamlit session, if any"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except Exception:
+        pass
+    return 'local'
+
+def sync_session_documents(session_state):
+    """Reference-count the documents held in a session's processed_docs"""
+    registry = get_document_registry()
+    session_id = get_session_id()
+
+    if '_registry_lease' not in session_state:
+        session_state['_registry_lease'] = SessionLease(registry, session_id)
+
+    content_hashes = [
+        doc_data['content_hash']
+        for doc_data in session_state.get('processed_docs', {}).values()
+        if doc_data.get('content_hash')
+    ]
+    registry.sync_session(session_id, content_hashes)
+    return registry
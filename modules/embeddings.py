@@ -1,13 +1,74 @@
 from langchain.vectorstores import FAISS
+from langchain.embeddings.base import Embeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from config import EMBEDDING_MODEL
+from config import EMBEDDING_MODEL, LLM_BACKEND, STUB_EMBEDDING_LATENCY_MS, QUOTA_ENABLED, EMBEDDING_BATCH_SIZE
+from modules.tracing import span, get_tracer, estimate_tokens
+from modules.quota import acquire_quota
+from modules.single_flight import coalesce, request_key
 
-def create_vectorstore(documents):
-    """Create a vector store from documents"""
-    embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
-    vectorstore = FAISS.from_documents(documents, embeddings)
+class QuotaEmbeddings(Embeddings):
+    """Sends embedding requests in batches, each waiting for the process-wide embedding quota"""
+
+    def __init__(self, embeddings, batch_size=EMBEDDING_BATCH_SIZE):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            acquire_quota('embedding', sum(estimate_tokens(t) for t in batch))
+            vectors.extend(self.embeddings.embed_documents(batch))
+        return vectors
+
+    def embed_query(self, text):
+        acquire_quota('embedding', estimate_tokens(text))
+        return self.embeddings.embed_query(text)
+
+def get_embeddings():
+    """Get the embedding model used for indexing and retrieval"""
+    if LLM_BACKEND == "stub":
+        from modules.stubs import StubEmbeddings
+        embeddings = StubEmbeddings(latency=STUB_EMBEDDING_LATENCY_MS / 1000)
+    else:
+        embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+    return QuotaEmbeddings(embeddings) if QUOTA_ENABLED else embeddings
+
+def get_embedding_key():
+    """Name of the embedding model, so vectors from different models never mix"""
+    return "stub" if LLM_BACKEND == "stub" else EMBEDDING_MODEL
+
+def create_vectorstore(documents, signatures=None, source=None):
+    """Create a vector store from documents
+
+    With MinHash signatures (from deduplicate_chunks), chunks that are
+    near-duplicates of ones already embedded for another document reuse
+    those vectors instead of being sent to the embedding API.
+    """
+    embeddings = get_embeddings()
+    texts = [doc.page_content for doc in documents]
+    
+    # Embed and build separately so the API calls and the FAISS build are timed apart
+    with span('embeddings.embed_documents', chunks=len(texts), chars=sum(len(t) for t in texts)):
+        # Sessions processing the same file at the same time share one set of embedding requests
+        key = request_key(get_embedding_key(), signatures is not None, *texts)
+        vectors = coalesce('embedding', key, _embed_texts, embeddings, documents, texts, signatures, source)
+    
+    with span('index.build', chunks=len(texts)):
+        vectorstore = FAISS.from_embeddings(
+            list(zip(texts, vectors)),
+            embeddings,
+            metadatas=[doc.metadata for doc in documents]
+        )
     return vectorstore
 
+def _embed_texts(embeddings, documents, texts, signatures, source):
+    if signatures is not None:
+        from modules.deduplication import get_corpus_index
+        return get_corpus_index(get_embedding_key()).embed_documents(documents, signatures, embeddings, source)
+    get_tracer().increment('embedded_chunks', len(texts))
+    return embeddings.embed_documents(texts)
+
 def get_retriever(vectorstore, k=8, score_threshold=0.7):
     """Get a retriever from a vector store"""
     return vectorstore.as_retriever(
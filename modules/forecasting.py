@@ -0,0 +1,407 @@
+import re
+import numpy as np
+import pandas as pd
+from modules.data_extraction import extract_numeric_value
+from modules.statement_parser import series_points
+
+MODEL_TYPES = ('linear', 'exponential', 'cagr')
+
+# Two-sided Student t critical values for 1-30 degrees of freedom,
+# with the normal quantile used beyond the table
+T_TABLE = {
+    0.80: ([3.078, 1.886, 1.638, 1.533, 1.476, 1.440, 1.415, 1.397, 1.383, 1.372,
+            1.363, 1.356, 1.350, 1.345, 1.341, 1.337, 1.333, 1.330, 1.328, 1.325,
+            1.323, 1.321, 1.319, 1.318, 1.316, 1.315, 1.314, 1.313, 1.311, 1.310], 1.282),
+    0.90: ([6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812,
+            1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734, 1.729, 1.725,
+            1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703, 1.701, 1.699, 1.697], 1.645),
+    0.95: ([12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+            2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+            2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042], 1.960),
+    0.99: ([63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250, 3.169,
+            3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878, 2.861, 2.845,
+            2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771, 2.763, 2.756, 2.750], 2.576),
+}
+
+def t_critical(dof, confidence=0.95):
+    """Look up two-sided t critical values for an array of degrees of freedom"""
+    if confidence not in T_TABLE:
+        raise ValueError(f"Unsupported confidence level: {confidence}")
+    table, z_value = T_TABLE[confidence]
+    dof = np.asarray(dof)
+    lookup = np.append(np.array(table), z_value)
+    idx = np.clip(dof.astype(int), 1, len(table) + 1) - 1
+    return np.where(dof >= 1, lookup[idx], np.nan)
+
+def panel_records_from_extracted_data(extracted_data, metric_names=None, entity_names=None):
+    """Flatten extracted data into (entity, metric, year, value) records"""
+    entity_names = entity_names or {}
+    records = []
+
+    for doc_name, doc_metrics in extracted_data.items():
+        entity = entity_names.get(doc_name) or doc_name
+        for metric_name, metric_data in doc_metrics.items():
+            if metric_names and metric_name not in metric_names:
+                continue
+            if not isinstance(metric_data, dict) or 'value' not in metric_data:
+                continue
+
+            year_str = metric_data.get('period', metric_data.get('year', '')) or ''
+            year_match = re.search(r'(\d{4})', str(year_str))
+            value = extract_numeric_value(metric_data['value'])
+            if year_match and value is not None:
+                records.append((entity, metric_name, int(year_match.group(1)), value))
+            
+            # Statement series come after the single value so they win for the same year
+            for year, series_value in series_points(metric_data):
+                records.append((entity, metric_name, year, series_value))
+
+    return records
+
+def build_metric_panel(records):
+    """Pack (entity, metric, year, value) records into padded, masked NumPy arrays"""
+    series = {}
+    for entity, metric, year, value in records:
+        if year is None or value is None:
+            continue
+        # Later records for the same year replace earlier ones
+        series.setdefault((entity, metric), {})[int(year)] = float(value)
+
+    keys = sorted(series, key=lambda k: (str(k[0]), str(k[1])))
+    max_len = max((len(points) for points in series.values()), default=0)
+
+    years = np.zeros((len(keys), max_len))
+    values = np.zeros((len(keys), max_len))
+    mask = np.zeros((len(keys), max_len), dtype=bool)
+
+    # Valid points are left-aligned and sorted by year
+    for i, key in enumerate(keys):
+        points = sorted(series[key].items())
+        n = len(points)
+        years[i, :n] = [year for year, _ in points]
+        values[i, :n] = [value for _, value in points]
+        mask[i, :n] = True
+
+    return {'keys': keys, 'years': years, 'values': values, 'mask': mask}
+
+def _batched_least_squares(x, y, mask):
+    """Closed-form simple linear regression for every row of a masked panel"""
+    w = mask.astype(float)
+    n = w.sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_mean = (w * x).sum(axis=1) / n
+        y_mean = (w * y).sum(axis=1) / n
+        dx = (x - x_mean[:, None]) * w
+        dy = (y - y_mean[:, None]) * w
+        sxx = (dx ** 2).sum(axis=1)
+        slope = np.where(sxx > 0, (dx * dy).sum(axis=1) / sxx, np.nan)
+        intercept = y_mean - slope * x_mean
+
+        fitted = intercept[:, None] + slope[:, None] * x
+        residuals = np.where(mask, y - fitted, 0.0)
+        sse = (residuals ** 2).sum(axis=1)
+        sst = (dy ** 2).sum(axis=1)
+        r_squared = np.where(sst > 0, 1 - sse / sst, np.where(sse == 0, 1.0, np.nan))
+
+        dof = n - 2
+        std_err = np.where(dof > 0, np.sqrt(sse / np.maximum(dof, 1)), np.nan)
+
+    return {
+        'n': n,
+        'slope': slope,
+        'intercept': intercept,
+        'x_mean': x_mean,
+        'sxx': sxx,
+        'fitted': fitted,
+        'residuals': residuals,
+        'r_squared': r_squared,
+        'std_err': std_err,
+        'dof': dof
+    }
+
+def _prediction_error(fit, future_x):
+    """Standard error of a new observation at future_x for each series"""
+    n = fit['n'][:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return fit['std_err'][:, None] * np.sqrt(
+            1 + 1 / n + (future_x - fit['x_mean'][:, None]) ** 2 / fit['sxx'][:, None]
+        )
+
+def _fit_linear(panel, future_years, confidence):
+    """Linear trend for every series"""
+    fit = _batched_least_squares(panel['years'], panel['values'], panel['mask'])
+    predictions = fit['intercept'][:, None] + fit['slope'][:, None] * future_years
+    margin = t_critical(fit['dof'], confidence)[:, None] * _prediction_error(fit, future_years)
+
+    return {
+        'predictions': predictions,
+        'lower_bound': predictions - margin,
+        'upper_bound': predictions + margin,
+        'fitted': np.where(panel['mask'], fit['fitted'], np.nan),
+        'residuals': fit['residuals'],
+        'r_squared': fit['r_squared'],
+        'params': {'slope': fit['slope'], 'intercept': fit['intercept']}
+    }
+
+def _fit_exponential(panel, future_years, confidence):
+    """Log-linear growth for every strictly positive series"""
+    mask = panel['mask']
+    values = panel['values']
+    positive = np.all(np.where(mask, values > 0, True), axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_values = np.where(mask & (values > 0), np.log(np.where(values > 0, values, 1.0)), 0.0)
+    fit = _batched_least_squares(panel['years'], log_values, mask)
+
+    log_pred = fit['intercept'][:, None] + fit['slope'][:, None] * future_years
+    margin = t_critical(fit['dof'], confidence)[:, None] * _prediction_error(fit, future_years)
+
+    # R² is reported on the original scale so models are comparable
+    w = mask.astype(float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        fitted = np.where(mask, np.exp(np.where(mask, fit['fitted'], 0.0)), np.nan)
+        y_mean = (w * values).sum(axis=1) / w.sum(axis=1)
+        sse = (np.where(mask, values - fitted, 0.0) ** 2).sum(axis=1)
+        sst = (np.where(mask, values - y_mean[:, None], 0.0) ** 2).sum(axis=1)
+        r_squared = np.where(sst > 0, 1 - sse / sst, np.where(sse == 0, 1.0, np.nan))
+
+    invalid = ~positive[:, None]
+    with np.errstate(over='ignore', invalid='ignore'):
+        predictions = np.exp(log_pred)
+        lower_bound = np.exp(log_pred - margin)
+        upper_bound = np.exp(log_pred + margin)
+
+    return {
+        'predictions': np.where(invalid, np.nan, predictions),
+        'lower_bound': np.where(invalid, np.nan, lower_bound),
+        'upper_bound': np.where(invalid, np.nan, upper_bound),
+        'fitted': np.where(invalid, np.nan, fitted),
+        'residuals': np.where(invalid, 0.0, np.where(mask, values - fitted, 0.0)),
+        'r_squared': np.where(positive, r_squared, np.nan),
+        'params': {'growth_rate': np.where(positive, np.exp(fit['slope']) - 1, np.nan)}
+    }
+
+def _fit_cagr(panel, future_years, confidence):
+    """Compound annual growth from the first to the last observation of each series"""
+    mask = panel['mask']
+    years = panel['years']
+    values = panel['values']
+    rows = np.arange(len(values))
+    n = mask.sum(axis=1)
+    last = np.maximum(n - 1, 0)
+
+    first_year, last_year = years[:, 0], years[rows, last]
+    first_value, last_value = values[:, 0], values[rows, last]
+    periods = last_year - first_year
+    valid = (n >= 2) & (periods > 0) & (first_value > 0) & (last_value > 0)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        cagr = np.where(valid, (last_value / first_value) ** (1 / np.where(periods > 0, periods, 1)) - 1, np.nan)
+        growth = 1 + cagr[:, None]
+        fitted = np.where(mask, first_value[:, None] * growth ** (years - first_year[:, None]), np.nan)
+        predictions = last_value[:, None] * growth ** (future_years - last_year[:, None])
+
+        # Log-scale dispersion around the compounding path, widening with the horizon
+        log_resid = np.where(mask & valid[:, None], np.log(np.abs(values / fitted)), 0.0)
+        dof = n - 2
+        spread = np.where(dof > 0, np.sqrt((log_resid ** 2).sum(axis=1) / np.maximum(dof, 1)), np.nan)
+        horizon = future_years - last_year[:, None]
+        margin = t_critical(dof, confidence)[:, None] * spread[:, None] * np.sqrt(horizon)
+
+        w = mask.astype(float)
+        y_mean = (w * values).sum(axis=1) / w.sum(axis=1)
+        sse = (np.where(mask, values - fitted, 0.0) ** 2).sum(axis=1)
+        sst = (np.where(mask, values - y_mean[:, None], 0.0) ** 2).sum(axis=1)
+        r_squared = np.where(sst > 0, 1 - sse / sst, np.where(sse == 0, 1.0, np.nan))
+
+    return {
+        'predictions': predictions,
+        'lower_bound': predictions * np.exp(-margin),
+        'upper_bound': predictions * np.exp(margin),
+        'fitted': fitted,
+        'residuals': np.where(mask & valid[:, None], values - fitted, 0.0),
+        'r_squared': np.where(valid, r_squared, np.nan),
+        'params': {'growth_rate': cagr}
+    }
+
+MODEL_FITTERS = {
+    'linear': _fit_linear,
+    'exponential': _fit_exponential,
+    'cagr': _fit_cagr
+}
+
+def fit_panel_models(panel, years_to_predict=3, models=MODEL_TYPES, confidence=0.95):
+    """Fit every model to every series of a panel in one vectorized pass"""
+    mask = panel['mask']
+    n = mask.sum(axis=1)
+    if not len(n):
+        return {'keys': [], 'n_points': n, 'future_years': np.zeros((0, years_to_predict)),
+                'confidence': confidence, 'models': {}}
+
+    last_year = panel['years'][np.arange(len(n)), n - 1]
+    future_years = last_year[:, None] + np.arange(1, years_to_predict + 1)[None, :]
+
+    # Series with fewer than two points cannot support any trend
+    usable = (n >= 2)[:, None]
+    results = {}
+    for model_type in models:
+        result = MODEL_FITTERS[model_type](panel, future_years, confidence)
+        for key in ('predictions', 'lower_bound', 'upper_bound'):
+            result[key] = np.where(usable, result[key], np.nan)
+        result['r_squared'] = np.where(usable[:, 0], result['r_squared'], np.nan)
+        results[model_type] = result
+
+    return {
+        'keys': panel['keys'],
+        'n_points': n,
+        'future_years': future_years,
+        'confidence': confidence,
+        'models': results
+    }
+
+def forecast_table(forecast):
+    """Convert batched forecasts into a long-format DataFrame"""
+    keys = forecast['keys']
+    future_years = forecast['future_years']
+    if not keys:
+        return pd.DataFrame(columns=['Entity', 'Metric', 'Model', 'Year', 'Projected Value',
+                                     'Lower Bound', 'Upper Bound', 'R²', 'Data Points'])
+
+    horizon = future_years.shape[1]
+    entities = np.repeat([k[0] for k in keys], horizon)
+    metrics = np.repeat([k[1] for k in keys], horizon)
+    n_points = np.repeat(forecast['n_points'], horizon)
+
+    frames = []
+    for model_type, result in forecast['models'].items():
+        frames.append(pd.DataFrame({
+            'Entity': entities,
+            'Metric': metrics,
+            'Model': model_type,
+            'Year': future_years.ravel().astype(int),
+            'Projected Value': result['predictions'].ravel(),
+            'Lower Bound': result['lower_bound'].ravel(),
+            'Upper Bound': result['upper_bound'].ravel(),
+            'R²': np.repeat(result['r_squared'], horizon),
+            'Data Points': n_points
+        }))
+
+    table = pd.concat(frames, ignore_index=True)
+    return table.dropna(subset=['Projected Value']).reset_index(drop=True)
+
+def forecast_extracted_data(extracted_data, years_to_predict=3, models=MODEL_TYPES,
+                            metric_names=None, entity_names=None, confidence=0.95):
+    """Project every metric of every entity in the extracted data at once"""
+    records = panel_records_from_extracted_data(extracted_data, metric_names, entity_names)
+    panel = build_metric_panel(records)
+    return fit_panel_models(panel, years_to_predict, models, confidence)
+
+INTERVAL_METHODS = ('analytic', 'bootstrap', 'monte_carlo')
+DEFAULT_PERCENTILES = (2.5, 10, 25, 50, 75, 90, 97.5)
+
+def _simulation_inputs(panel, model_type):
+    """Transform a panel into the regression space used for simulation"""
+    if model_type == 'linear':
+        return panel['values'], np.ones(len(panel['keys']), dtype=bool)
+    if model_type == 'exponential':
+        mask = panel['mask']
+        values = panel['values']
+        positive = np.all(np.where(mask, values > 0, True), axis=1)
+        return np.where(mask & (values > 0), np.log(np.where(values > 0, values, 1.0)), 0.0), positive
+    raise ValueError(f"Simulated intervals are not available for model type: {model_type}")
+
+def _bootstrap_paths(fit, x, mask, future_x, n_paths, rng):
+    """Residual bootstrap: refit on resampled residuals, then add a resampled shock"""
+    n_series, n_obs = x.shape
+    n = fit['n'].astype(int)
+
+    # Inflate residuals to account for the two fitted parameters
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inflation = np.where(n > 2, np.sqrt(n / np.maximum(n - 2, 1)), 0.0)
+    residuals = fit['residuals'] * inflation[:, None]
+
+    # Residuals are left-aligned, so uniform draws scaled by each series' length index valid slots
+    rows = np.arange(n_series)[:, None, None]
+    draw = (rng.random((n_series, n_paths, n_obs)) * n[:, None, None]).astype(int)
+    synthetic = fit['fitted'][:, None, :] + residuals[rows, draw]
+
+    # Batched least squares over every (series, path) pair at once
+    refit = _batched_least_squares(
+        np.broadcast_to(x[:, None, :], synthetic.shape).reshape(-1, n_obs),
+        synthetic.reshape(-1, n_obs),
+        np.broadcast_to(mask[:, None, :], synthetic.shape).reshape(-1, n_obs)
+    )
+    slope = refit['slope'].reshape(n_series, n_paths, 1)
+    intercept = refit['intercept'].reshape(n_series, n_paths, 1)
+
+    horizon = future_x.shape[1]
+    shock_draw = (rng.random((n_series, n_paths, horizon)) * n[:, None, None]).astype(int)
+    shocks = residuals[rows, shock_draw]
+    return intercept + slope * future_x[:, None, :] + shocks
+
+def _monte_carlo_paths(fit, future_x, n_paths, rng):
+    """Parametric simulation from the sampling distribution of the OLS fit"""
+    n_series = len(fit['n'])
+    horizon = future_x.shape[1]
+    dof = np.maximum(fit['dof'], 1)
+
+    # Draw the noise scale from its scaled inverse chi-square distribution
+    sigma = fit['std_err'][:, None] * np.sqrt(dof[:, None] / rng.chisquare(dof[:, None], (n_series, n_paths)))
+
+    # Level (at the mean year) and slope are independent under a centered design
+    with np.errstate(divide='ignore', invalid='ignore'):
+        level_scale = sigma / np.sqrt(fit['n'])[:, None]
+        slope_scale = sigma / np.sqrt(fit['sxx'])[:, None]
+    level = (fit['intercept'] + fit['slope'] * fit['x_mean'])[:, None] + level_scale * rng.standard_normal((n_series, n_paths))
+    slope = fit['slope'][:, None] + slope_scale * rng.standard_normal((n_series, n_paths))
+
+    offset = future_x[:, None, :] - fit['x_mean'][:, None, None]
+    noise = sigma[:, :, None] * rng.standard_normal((n_series, n_paths, horizon))
+    return level[:, :, None] + slope[:, :, None] * offset + noise
+
+def simulate_prediction_bands(panel, years_to_predict=3, model_type='linear', method='bootstrap',
+                              n_paths=2000, percentiles=DEFAULT_PERCENTILES, seed=None):
+    """Simulate future paths for every series and summarize them as percentile bands
+
+    All series and paths are generated as a single (series, paths, horizon) array,
+    so memory grows with len(series) * n_paths * max(history, horizon).
+    """
+    if method not in ('bootstrap', 'monte_carlo'):
+        raise ValueError(f"Unknown simulation method: {method}")
+
+    n = panel['mask'].sum(axis=1)
+    if not len(n):
+        return {'keys': [], 'future_years': np.zeros((0, years_to_predict)), 'percentiles': {}}
+
+    rng = np.random.default_rng(seed)
+    last_year = panel['years'][np.arange(len(n)), n - 1]
+    future_years = last_year[:, None] + np.arange(1, years_to_predict + 1)[None, :]
+
+    target, usable = _simulation_inputs(panel, model_type)
+    fit = _batched_least_squares(panel['years'], target, panel['mask'])
+    fit['fitted'] = np.where(panel['mask'], fit['fitted'], 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if method == 'bootstrap':
+            paths = _bootstrap_paths(fit, panel['years'], panel['mask'], future_years, n_paths, rng)
+        else:
+            paths = _monte_carlo_paths(fit, future_years, n_paths, rng)
+
+    if model_type == 'exponential':
+        with np.errstate(over='ignore'):
+            paths = np.exp(paths)
+
+    # Bands need enough residual degrees of freedom to mean anything
+    usable = usable & (n > 2)
+    bands = np.percentile(paths, percentiles, axis=1)
+    bands = np.where(usable[None, :, None], bands, np.nan)
+
+    return {
+        'keys': panel['keys'],
+        'future_years': future_years,
+        'method': method,
+        'model_type': model_type,
+        'n_paths': n_paths,
+        'percentiles': {p: bands[i] for i, p in enumerate(percentiles)}
+    }
@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import JOBS_DIR, JOB_WORKERS, JOB_RETENTION_SECONDS, JOB_RETENTION_COUNT, PROFILE_ENABLED
+from modules.quota import quota_context
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+class JobContext:
+    """Handle passed to a running job for progress reporting and cancellation"""
+
+    def __init__(self, manager, job_id):
+        self._manager = manager
+        self.job_id = job_id
+
+    def update(self, progress=None, message=None):
+        """Report progress (0-1) and a status message"""
+        self._manager._update(self.job_id, progress=progress, message=message)
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job has been cancelled"""
+        if self._manager._cancel_events[self.job_id].is_set():
+            raise JobCancelled()
+
+class JobManager:
+    """Runs ingestion and extraction jobs on worker threads with persistent records.
+
+    Each job is stored as JSON in the jobs directory so status survives reruns
+    and restarts; jobs that were active when the process stopped are marked as
+    interrupted on startup. Finished records older than retention_seconds, or
+    beyond the newest retention_count, are deleted on startup and whenever a
+    job finishes.
+    """
+
+    def __init__(self, jobs_dir, workers, retention_seconds=JOB_RETENTION_SECONDS, retention_count=JOB_RETENTION_COUNT):
+        self.jobs_dir = jobs_dir
+        self.retention_seconds = retention_seconds
+        self.retention_count = retention_count
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job-worker")
+        self._lock = threading.RLock()
+        self._jobs = {}
+        self._cancel_events = {}
+        self._load_records()
+
+    def _record_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _load_records(self):
+        for file_name in os.listdir(self.jobs_dir):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.jobs_dir, file_name)) as f:
+                    job = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if job['status'] in ACTIVE_STATUSES:
+                job['status'] = 'failed'
+                job['error'] = 'Interrupted by a restart'
+                job['finished_at'] = time.time()
+            self._jobs[job['id']] = job
+            self._cancel_events[job['id']] = threading.Event()
+        self._prune()
+
+    def _prune(self):
+        """Delete finished job records past the retention age or count"""
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j['status'] not in ACTIVE_STATUSES),
+                              key=lambda j: j.get('finished_at') or j['created_at'], reverse=True)
+            cutoff = time.time() - self.retention_seconds
+            expired = [j['id'] for i, j in enumerate(finished)
+                       if i >= self.retention_count or (j.get('finished_at') or j['created_at']) < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+                del self._cancel_events[job_id]
+                try:
+                    os.remove(self._record_path(job_id))
+                except OSError:
+                    pass
+
+    def _save(self, job):
+        # Write to a temp file first so a crash never leaves a half-written record
+        path = self._record_path(job['id'])
+        with open(path + '.tmp', 'w') as f:
+            json.dump(job, f, default=str)
+        os.replace(path + '.tmp', path)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            for key, value in fields.items():
+                if value is not None:
+                    job[key] = value
+            self._save(job)
+
+    def submit(self, kind, func, params, label=None, session_id=None):
+        """Queue a job; func(context, **params) returns a JSON-serializable result"""
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'label': label or kind,
+            'params': params,
+            'session_id': session_id,
+            'status': 'queued',
+            'progress': 0.0,
+            'message': 'Waiting for a worker',
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'error': None,
+            'result': None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._cancel_events[job_id] = threading.Event()
+            self._save(job)
+        self._executor.submit(self._run, job_id, func, params)
+        return job_id
+
+    def _run(self, job_id, func, params):
+        context = JobContext(self, job_id)
+        if self._cancel_events[job_id].is_set():
+            self._update(job_id, status='cancelled', finished_at=time.time(), message='Cancelled before start')
+            return
+
+        self._update(job_id, status='running', started_at=time.time(), message='Started')
+        try:
+            # API quota is shared fairly between sessions, so charge the job's requests to the session that queued it
+            with quota_context(session_id=self._jobs[job_id]['session_id']):
+                result = func(context, **params)
+            self._update(job_id, status='succeeded', progress=1.0, result=result,
+                         finished_at=time.time(), message='Done')
+        except JobCancelled:
+            self._update(job_id, status='cancelled', finished_at=time.time(), message='Cancelled')
+        except Exception as e:
+            self._update(job_id, status='failed', error=str(e), finished_at=time.time(), message='Failed')
+        self._prune()
+
+    def cancel(self, job_id):
+        """Request cancellation; running jobs stop at their next checkpoint"""
+        with self._lock:
+            if job_id in self._cancel_events and self._jobs[job_id]['status'] in ACTIVE_STATUSES:
+                self._cancel_events[job_id].set()
+                self._update(job_id, message='Cancelling...')
+                return True
+        return False
+
+    def get(self, job_id):
+        """Snapshot of one job record"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self, session_id=None, kinds=None):
+        """Jobs newest first, optionally filtered by session and kind"""
+        with self._lock:
+            jobs = [dict(j) for j in self._jobs.values()
+                    if (session_id is None or j['session_id'] == session_id)
+                    and (kinds is None or j['kind'] in kinds)]
+        return sorted(jobs, key=lambda j: j['created_at'], reverse=True)
+
+def ingest_files_job(context, file_paths, profile=False):
+    """Job: ingest PDFs one at a time, reporting progress per file"""
+    from modules.document_processor import ingest_document
+    from utils.profiling import profile_block
+
+    documents = {}
+    with profile_block(f"ingest-{context.job_id}", profile or PROFILE_ENABLED) as profile_result:
+        for i, file_path in enumerate(file_paths):
+            context.check_cancelled()
+            context.update(progress=i / len(file_paths), message=f"Processing {i + 1}/{len(file_paths)}: {os.path.basename(file_path)}")
+
+            vectorstore, file_info, num_pages, doc_index = ingest_document(file_path)
+            documents[os.path.basename(file_path)] = {
+                'path': file_path,
+                'content_hash': vectorstore.content_hash,
+                'info': file_info,
+                'pages': num_pages,
+                'index': doc_index
+            }
+    return {'documents': documents, 'profile': profile_result}
+
+def extract_metrics_job(context, doc_name, content_hash, doc_type, file_path=None):
+    """Job: extract standardized metrics for one document"""
+    from modules.document_registry import get_document_registry
+    from modules.precompute import get_standard_metrics
+
+    def report(done, total, metric):
+        context.check_cancelled()
+        context.update(progress=done / total, message=f"Extracted {done}/{total}: {metric}")
+
+    metrics = get_standard_metrics(get_document_registry().handle(content_hash), content_hash, doc_type,
+                                   file_path, progress_callback=report)
+    return {'document': doc_name, 'metrics': metrics}
+
+def apply_job_result(session_state, job):
+    """Merge a finished job's result into a session's documents or extracted data"""
+    from modules.document_registry import get_document_registry
+
+    if job['kind'] == 'ingest':
+        registry = get_document_registry()
+        for doc_name, doc_data in job['result']['documents'].items():
+            if not registry.contains(doc_data['content_hash']):
+                continue
+            session_state.processed_docs[doc_name] = dict(doc_data, vectorstore=registry.handle(doc_data['content_hash']))
+            if not session_state.current_doc:
+                session_state.current_doc = doc_name
+    elif job['kind'] == 'extract':
+        session_state.extracted_data.setdefault(job['result']['document'], {}).update(job['result']['metrics'])
+
+    session_state.setdefault('applied_jobs', set()).add(job['id'])
+
+def apply_finished_jobs(session_state, session_id):
+    """Pick up results of this session's jobs that finished since the last rerun"""
+    applied = session_state.setdefault('applied_jobs', set())
+    for job in get_job_manager().list_jobs(session_id=session_id):
+        if job['status'] == 'succeeded' and job['id'] not in applied:
+            apply_job_result(session_state, job)
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """Get the process-wide job manager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(JOBS_DIR, JOB_WORKERS)
+        return _manager
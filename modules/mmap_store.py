@@ -0,0 +1,149 @@
+import os
+import json
+import shutil
+import uuid
+import numpy as np
+from langchain.schema import Document
+from langchain.schema.vectorstore import VectorStore
+
+VECTORS_FILE = "vectors.npy"
+NORMS_FILE = "norms.npy"
+OFFSETS_FILE = "offsets.npy"
+CHUNKS_FILE = "chunks.jsonl"
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+
+def is_mmap_store(path, embedding_key=None):
+    """Check whether a directory holds a complete store built with the given embedding model"""
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        return False
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return meta.get('version') == FORMAT_VERSION and (embedding_key is None or meta.get('embedding') == embedding_key)
+
+def write_mmap_store(path, texts, vectors, metadatas, embedding_key):
+    """Write vectors, norms and an offset-indexed chunk file, then move them into place atomically"""
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, VECTORS_FILE), vectors)
+    np.save(os.path.join(tmp_path, NORMS_FILE), np.einsum('ij,ij->i', vectors, vectors))
+
+    # One JSON record per chunk; offsets[i]:offsets[i + 1] is the byte range of chunk i
+    offsets = [0]
+    with open(os.path.join(tmp_path, CHUNKS_FILE), 'wb') as f:
+        for text, metadata in zip(texts, metadatas):
+            record = json.dumps({'page_content': text, 'metadata': metadata}, default=str).encode('utf-8') + b"\n"
+            f.write(record)
+            offsets.append(offsets[-1] + len(record))
+    np.save(os.path.join(tmp_path, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+
+    # meta.json is written last so a half-written store is never picked up
+    with open(os.path.join(tmp_path, META_FILE), 'w') as f:
+        json.dump({'version': FORMAT_VERSION, 'embedding': embedding_key,
+                   'count': len(texts), 'dimension': int(vectors.shape[1]) if len(texts) else 0}, f)
+
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another process (or an older store) got there first
+        if is_mmap_store(path, embedding_key):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(tmp_path, path)
+
+def write_faiss_as_mmap(path, vectorstore, embedding_key):
+    """Convert an in-memory LangChain FAISS store to the memory-mapped layout"""
+    count = vectorstore.index.ntotal
+    vectors = vectorstore.index.reconstruct_n(0, count) if count else np.zeros((0, vectorstore.index.d), dtype=np.float32)
+    docs = [vectorstore.docstore.search(vectorstore.index_to_docstore_id[i]) for i in range(count)]
+    write_mmap_store(path, [d.page_content for d in docs], vectors, [d.metadata for d in docs], embedding_key)
+
+class MmapVectorStore(VectorStore):
+    """Read-only vector store over memory-mapped files
+
+    Vectors are mapped read-only, so opening a store costs almost nothing and
+    the OS page cache is shared by every process using the same files. Chunk
+    text and metadata are read from the side file only for the hits a search
+    returns. Scores are squared L2 distances, like the FAISS flat index.
+    """
+
+    def __init__(self, path, embedding):
+        self.path = path
+        self._embedding = embedding
+        self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode='r')
+        self.norms = np.load(os.path.join(path, NORMS_FILE), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE))
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def resident_bytes(self):
+        """Private memory held by this store (mapped pages belong to the page cache)"""
+        return self.offsets.nbytes
+
+    def get_documents(self, indices):
+        """Read chunks by position from the side file"""
+        docs = []
+        with open(os.path.join(self.path, CHUNKS_FILE), 'rb') as f:
+            for i in indices:
+                f.seek(int(self.offsets[i]))
+                record = json.loads(f.read(int(self.offsets[i + 1] - self.offsets[i])))
+                docs.append(Document(page_content=record['page_content'], metadata=record['metadata']))
+        return docs
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, fetch_k=20, **kwargs):
+        if len(self) == 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        distances = self.norms - 2 * (self.vectors @ query) + float(query @ query)
+
+        n = min(k if filter is None else max(k, fetch_k), len(self))
+        top = np.argpartition(distances, n - 1)[:n] if n < len(self) else np.arange(len(self))
+        top = top[np.argsort(distances[top], kind='stable')]
+
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            top = [i for i in top if distances[i] <= score_threshold]
+
+        results = list(zip(self.get_documents(top), (float(distances[i]) for i in top)))
+        if filter is not None:
+            filter = {key: value if isinstance(value, list) else [value] for key, value in filter.items()}
+            results = [(doc, score) for doc, score in results
+                       if all(doc.metadata.get(key) in value for key, value in filter.items())]
+        return results[:k]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, fetch_k=20, **kwargs):
+        return self.similarity_search_with_score_by_vector(
+            self._embedding.embed_query(query), k, filter=filter, fetch_k=fetch_k, **kwargs
+        )
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, fetch_k=20, **kwargs):
+        results = self.similarity_search_with_score_by_vector(embedding, k, filter=filter, fetch_k=fetch_k, **kwargs)
+        return [doc for doc, _ in results]
+
+    def similarity_search(self, query, k=4, filter=None, fetch_k=20, **kwargs):
+        results = self.similarity_search_with_score(query, k, filter=filter, fetch_k=fetch_k, **kwargs)
+        return [doc for doc, _ in results]
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("MmapVectorStore is read-only; build a new store instead")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, path=None, embedding_key=None, **kwargs):
+        if path is None:
+            raise ValueError("MmapVectorStore.from_texts needs a path to write to")
+        texts = list(texts)
+        write_mmap_store(path, texts, embedding.embed_documents(texts),
+                         metadatas or [{} for _ in texts], embedding_key)
+        return cls(path, embedding)
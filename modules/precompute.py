@@ -0,0 +1,121 @@
+import copy
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import EXAMPLE_QUESTIONS, PRECOMPUTE_WORKERS, PRECOMPUTE_METRICS
+from modules.tracing import span, get_tracer
+from modules.quota import quota_context
+
+def answer_and_cache(qa_chain, content_hash, question):
+    """Answer a Q&A question and cache it (the text and its provenance) as the Analysis tab does"""
+    from modules.answer_cache import get_answer_cache
+    from modules.qa_chain import extract_text_from_response, provenance_from_docs
+
+    response_obj = qa_chain.invoke(question)
+    provenance = provenance_from_docs(response_obj.get('source_documents', [])) if isinstance(response_obj, dict) else None
+    answer = extract_text_from_response(response_obj)
+    get_answer_cache().put(content_hash, question, answer, provenance=provenance)
+    return {'answer': answer, 'provenance': provenance}
+
+def metrics_question(doc_type):
+    """Answer cache key text for a document's standard metrics (they depend only on its type)"""
+    return f"standard metrics: {doc_type or 'Annual Report'}"
+
+def cache_metrics(content_hash, doc_type, metrics, file_path=None):
+    """Verify extracted standard metrics against the page text, add their statement series and cache them"""
+    from modules.answer_cache import get_answer_cache
+    from modules.verification import verify_extracted_metrics, annotate_metrics
+    from modules.statement_parser import attach_series, statements_for
+
+    annotate_metrics(metrics, verify_extracted_metrics(content_hash, metrics, file_path))
+    attach_series(metrics, statements_for(content_hash, file_path))
+    get_answer_cache().put(content_hash, metrics_question(doc_type), metrics, kind='metrics')
+    return metrics
+
+def cached_metrics(content_hash, doc_type):
+    """A copy of the document's cached standard metrics, or None"""
+    from modules.answer_cache import get_answer_cache
+
+    cached = get_answer_cache().get(content_hash, metrics_question(doc_type), kind='metrics')
+    return copy.deepcopy(cached['answer']) if cached is not None else None
+
+def get_standard_metrics(vectorstore, content_hash, doc_type, file_path=None, progress_callback=None):
+    """Standard metrics of a document from the cache, extracting (and caching) them on a miss"""
+    from modules.qa_chain import create_qa_chain
+    from modules.data_extraction import extract_standardized_financials, standard_metric_names, cached_comparison_metrics
+
+    metrics = cached_metrics(content_hash, doc_type)
+    if metrics is None:
+        qa_chain = create_qa_chain(vectorstore)
+        # Values the comparison matrix already found are verified and reused rather than asked for again
+        known = cached_comparison_metrics(content_hash, standard_metric_names(doc_type)) if content_hash else {}
+        metrics = cache_metrics(content_hash, doc_type,
+                                extract_standardized_financials(qa_chain, doc_type, progress_callback, known), file_path)
+    return metrics
+
+def precompute_document_job(context, content_hash, doc_type, file_path=None, questions=None, metrics=PRECOMPUTE_METRICS):
+    """Job: answer the example questions and extract the standard metrics of a processed document
+
+    Runs at most PRECOMPUTE_WORKERS LLM calls at a time and stores every
+    result in the answer cache, so the first click on an example question or
+    on Extract Standard Metrics is served without waiting for the LLM.
+    Anything already cached is skipped.
+    """
+    from modules.answer_cache import get_answer_cache
+    from modules.document_registry import get_document_registry
+    from modules.data_extraction import extract_metric, standard_metric_names
+    from modules.jobs import JobCancelled
+    from modules.qa_chain import create_qa_chain
+
+    answer_cache = get_answer_cache()
+    questions = [q for q in (questions or EXAMPLE_QUESTIONS) if not answer_cache.contains(content_hash, q)]
+    metric_names = standard_metric_names(doc_type) if metrics and not answer_cache.contains(content_hash, metrics_question(doc_type), kind='metrics') else []
+    total = len(questions) + len(metric_names)
+    if not total:
+        return {'questions': 0, 'metrics': 0, 'failed': 0}
+
+    qa_chain = create_qa_chain(get_document_registry().handle(content_hash))
+    extracted, failed = {}, 0
+    with span('precompute.document', questions=len(questions), metrics=len(metric_names)) as precompute_span:
+        executor = ThreadPoolExecutor(max_workers=PRECOMPUTE_WORKERS, thread_name_prefix="precompute")
+        try:
+            # Worker threads inherit the job's quota session; speculative answers queue behind interactive ones
+            with quota_context(priority='extraction'):
+                futures = {executor.submit(contextvars.copy_context().run, answer_and_cache, qa_chain, content_hash, q): ('question', q)
+                           for q in questions}
+                futures.update({executor.submit(contextvars.copy_context().run, extract_metric, qa_chain, m): ('metric', m)
+                                for m in metric_names})
+            for done, future in enumerate(as_completed(futures), start=1):
+                context.check_cancelled()
+                kind, name = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    # One failed call should not discard the rest; the analyst can still ask it later
+                    failed += 1
+                    get_tracer().increment('precompute_failures')
+                    continue
+                if kind == 'metric':
+                    extracted[name] = result
+                context.update(progress=done / total, message=f"Precomputed {done}/{total}: {name}")
+        except JobCancelled:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+        # Only a complete set is cached; a partial one would hide the missing metrics
+        if metric_names and len(extracted) == len(metric_names):
+            cache_metrics(content_hash, doc_type, {m: extracted[m] for m in metric_names}, file_path)
+        precompute_span.set(failed=failed)
+
+    get_tracer().increment('precomputed_answers', total - failed)
+    return {'questions': len(questions), 'metrics': len(metric_names), 'failed': failed}
+
+def schedule_precompute(content_hash, doc_type, file_path=None, label=None, session_id=None):
+    """Queue the precompute job for a processed document"""
+    from modules.jobs import get_job_manager
+
+    return get_job_manager().submit(
+        'precompute', precompute_document_job,
+        {'content_hash': content_hash, 'doc_type': doc_type, 'file_path': file_path},
+        label=label or "Precompute answers", session_id=session_id
+    )
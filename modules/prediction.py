@@ -1,6 +1,8 @@
 import re
 import numpy as np
 from modules.data_extraction import extract_numeric_value
+from modules.forecasting import t_critical, build_metric_panel, simulate_prediction_bands
+from modules.statement_parser import series_points
 
 def predict_future_performance(extracted_data, metric_name, years_to_predict=3):
     """Simple prediction of future values based on historical data"""
@@ -8,6 +10,7 @@ def predict_future_performance(extracted_data, metric_name, years_to_predict=3):
     historical_values = []
     years = []
     
+    points = {}
     for doc_name, doc_metrics in extracted_data.items():
         if metric_name in doc_metrics:
             metric_data = doc_metrics[metric_name]
@@ -21,14 +24,16 @@ def predict_future_performance(extracted_data, metric_name, years_to_predict=3):
                 # Extract value
                 value = extract_numeric_value(metric_data['value'])
                 if value is not None:
-                    historical_values.append(value)
-                    years.append(year)
+                    points[year] = value
+            
+            # Every period column of the filing's statements (these take precedence for their years)
+            points.update(series_points(metric_data))
     
     # Sort by year
-    if not years or not historical_values:
+    if not points:
         return None, None, None, None
     
-    years, historical_values = zip(*sorted(zip(years, historical_values)))
+    years, historical_values = zip(*sorted(points.items()))
     
     # Need at least 2 data points for prediction
     if len(historical_values) < 2:
@@ -72,11 +77,23 @@ def calculate_growth_rate(values):
     cagr = (end_value / start_value) ** (1 / num_periods) - 1
     return cagr
 
-def create_advanced_prediction(historical_data, years_to_predict=3, model_type='linear'):
+def create_advanced_prediction(historical_data, years_to_predict=3, model_type='linear', interval_method='analytic', n_paths=2000):
     """Create more advanced prediction models"""
     if len(historical_data) < 3:
         return None
     
+    if interval_method != 'analytic':
+        prediction = create_advanced_prediction(historical_data, years_to_predict, model_type)
+        if prediction:
+            # Replace the closed-form bounds with simulated 95% percentile bands
+            panel = build_metric_panel([('series', 'value', year, value) for year, value in historical_data])
+            bands = simulate_prediction_bands(panel, years_to_predict, model_type, interval_method, n_paths)
+            prediction['lower_bound'] = bands['percentiles'][2.5][0]
+            prediction['upper_bound'] = bands['percentiles'][97.5][0]
+            prediction['bands'] = {p: values[0] for p, values in bands['percentiles'].items()}
+            prediction['interval_method'] = interval_method
+        return prediction
+    
     # Unpack years and values
     years, values = zip(*sorted(historical_data))
     years = np.array(years)
@@ -98,8 +115,8 @@ def create_advanced_prediction(historical_data, years_to_predict=3, model_type='
         # Standard error of prediction
         pred_err = std_err * np.sqrt(1 + 1/n + (future_years - mean_x)**2 / np.sum((years - mean_x)**2))
         
-        # 95% confidence interval
-        t_value = 2.0  # Approximate t-value for 95% confidence
+        # 95% confidence interval using the t distribution with n-2 degrees of freedom
+        t_value = float(t_critical(n - 2))
         lower_bound = predicted_values - t_value * pred_err
         upper_bound = predicted_values + t_value * pred_err
         
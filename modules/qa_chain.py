@@ -1,9 +1,16 @@
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import Document
 from langchain_google_genai import ChatGoogleGenerativeAI
 from modules.embeddings import get_retriever
-from config import LLM_MODEL, LLM_TEMPERATURE, RETRIEVER_K, RETRIEVER_SCORE_THRESHOLD
-import json
+from modules.tracing import span, get_tracer, estimate_tokens
+from modules.single_flight import coalesce, request_key
+from modules.quota import acquire_quota, get_quota_scheduler
+from config import LLM_MODEL, LLM_TEMPERATURE, LLM_BACKEND, STUB_LLM_LATENCY_MS, RETRIEVER_K, RETRIEVER_SCORE_THRESHOLD, INSIGHTS_CONTEXT_CHUNKS
+import re
+import time
+from typing import Optional
 
 def extract_text_from_response(response_obj):
     """Helper function to extract text from response object"""
@@ -18,9 +25,130 @@ def extract_text_from_response(response_obj):
     else:
         return str(response_obj)
 
+class LLMTracingHandler(BaseCallbackHandler):
+    """Records an llm.generate span with prompt and response token counts for every LLM call"""
+
+    def __init__(self):
+        self._starts = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        # Chat models fall back to this hook with their messages rendered as text
+        self._starts[run_id] = (time.perf_counter(), sum(estimate_tokens(p) for p in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start_time, prompt_tokens = self._starts.pop(run_id, (time.perf_counter(), 0))
+        response_tokens = sum(estimate_tokens(g.text) for gens in response.generations for g in gens)
+
+        # Prefer the provider's own counts when it reports them
+        usage = (response.llm_output or {}).get('token_usage') or {}
+        prompt_tokens = usage.get('prompt_tokens', prompt_tokens)
+        response_tokens = usage.get('completion_tokens', response_tokens)
+
+        tracer = get_tracer()
+        tracer.record('llm.generate', time.perf_counter() - start_time,
+                      prompt_tokens=prompt_tokens, response_tokens=response_tokens)
+        tracer.increment('llm_calls')
+        tracer.increment('prompt_tokens', prompt_tokens)
+        tracer.increment('response_tokens', response_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        start_time, prompt_tokens = self._starts.pop(run_id, (time.perf_counter(), 0))
+        get_tracer().record('llm.generate', time.perf_counter() - start_time,
+                            prompt_tokens=prompt_tokens, error=type(error).__name__)
+        get_tracer().increment('llm_errors')
+
+class QuotaCallbackHandler(BaseCallbackHandler):
+    """Waits for the process-wide LLM quota before every call and records the tokens it used"""
+
+    def __init__(self):
+        self._grants = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        prompt_tokens = sum(estimate_tokens(p) for p in prompts)
+        self._grants[run_id] = (acquire_quota('llm', prompt_tokens), prompt_tokens)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        grant, prompt_tokens = self._grants.pop(run_id, (None, 0))
+        if grant is not None:
+            response_tokens = sum(estimate_tokens(g.text) for gens in response.generations for g in gens)
+            get_quota_scheduler('llm').settle(grant, prompt_tokens + response_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._grants.pop(run_id, None)
+
+def retrieve_with_scores(retriever, question):
+    """Retrieve documents like the retriever does, keeping each chunk's similarity score
+
+    Returns copies of the documents with 'score' (L2 distance, lower is
+    closer) added to their metadata, so the stored chunks are never modified.
+    """
+    if retriever.search_type != "similarity":
+        return retriever.get_relevant_documents(question)
+    results = retriever.vectorstore.similarity_search_with_score(question, **retriever.search_kwargs)
+    return [Document(page_content=doc.page_content, metadata=dict(doc.metadata, score=float(score)))
+            for doc, score in results]
+
+def provenance_from_docs(docs):
+    """Chunk IDs, pages, sections and scores of the documents an answer was based on"""
+    provenance = []
+    for doc in docs:
+        start = doc.metadata.get('page', 0) + 1  # metadata pages are 0-based
+        end = doc.metadata.get('page_end', start - 1) + 1
+        provenance.append({
+            'chunk_id': doc.metadata.get('chunk_id'),
+            'page': start,
+            'pages': doc.metadata.get('source_pages') or list(range(start, end + 1)),
+            'page_display': doc.metadata.get('page_display'),
+            'section': doc.metadata.get('section'),
+            'score': doc.metadata.get('score')
+        })
+    return provenance
+
+def provenance_pages(provenance):
+    """Distinct 1-based pages cited by an answer's provenance, closest chunks first"""
+    ranked = sorted(provenance, key=lambda p: p['score'] if p['score'] is not None else float('inf'))
+    pages = []
+    for entry in ranked:
+        for page in entry['pages']:
+            if page not in pages:
+                pages.append(page)
+    return pages
+
+class TracedRetrievalQA(RetrievalQA):
+    """RetrievalQA that records a span around the retrieval step and keeps similarity scores
+
+    Identical questions about the same document asked concurrently (e.g. by
+    several sessions) share one retrieval and LLM call.
+    """
+
+    content_hash: Optional[str] = None  # Document the retriever searches, for request coalescing
+
+    def _call(self, inputs, run_manager=None):
+        key = None
+        if self.content_hash:
+            key = request_key(self.content_hash, inputs[self.input_key], self.combine_documents_chain.llm_chain.prompt.template,
+                              LLM_BACKEND, LLM_MODEL, LLM_TEMPERATURE, sorted(self.retriever.search_kwargs.items()))
+        result = coalesce('qa', key, super()._call, inputs, run_manager=run_manager)
+        return dict(result)
+
+    def _get_docs(self, question, *, run_manager):
+        with span('qa.retrieval') as retrieval_span:
+            docs = retrieve_with_scores(self.retriever, question)
+            retrieval_span.set(chunks=len(docs), context_chars=sum(len(d.page_content) for d in docs))
+        return docs
+
+def get_llm():
+    """Get the LLM used for question answering and extraction"""
+    # The quota handler runs first so time spent queueing is not counted as generation time
+    callbacks = [QuotaCallbackHandler(), LLMTracingHandler()]
+    if LLM_BACKEND == "stub":
+        from modules.stubs import StubLLM
+        return StubLLM(latency=STUB_LLM_LATENCY_MS / 1000, callbacks=callbacks)
+    return ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=LLM_TEMPERATURE, callbacks=callbacks)
+
 def create_qa_chain(vectorstore):
     """Create the QA chain with LLM model"""
-    llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=LLM_TEMPERATURE)
+    llm = get_llm()
     
     # Create an improved prompt that asks for source references and confidence levels
     custom_prompt_template = """
@@ -58,16 +186,71 @@ def create_qa_chain(vectorstore):
     )
     
     # Use custom retrieval QA with improved retrieval settings
-    qa_chain = RetrievalQA.from_chain_type(
+    qa_chain = TracedRetrievalQA.from_chain_type(
         llm=llm,
         chain_type="stuff",
         retriever=retriever,
+        # invoke() also returns 'source_documents' for provenance_from_docs
+        return_source_documents=True,
+        content_hash=getattr(vectorstore, 'content_hash', None),
         chain_type_kwargs={
             "prompt": prompt
         }
     )
     return qa_chain
 
+def answer_question(vectorstore, question):
+    """Answer a question and return citations, confidence and per-stage timings"""
+    from modules.answer_cache import get_answer_cache
+
+    # Answers depend only on the document content, so any session's earlier answer is reused
+    content_hash = getattr(vectorstore, 'content_hash', None)
+    cached = get_answer_cache().get(content_hash, question, kind='answer')
+    if cached is not None:
+        return dict(cached['answer'], timings={}, cached=True)
+
+    # Concurrent identical questions share one computation (and its timings)
+    key = request_key(content_hash, question, LLM_BACKEND, LLM_MODEL, LLM_TEMPERATURE) if content_hash else None
+    result, timings = coalesce('answer', key, _compute_answer, vectorstore, content_hash, question)
+    return dict(result, timings=timings, cached=False)
+
+def _compute_answer(vectorstore, content_hash, question):
+    from modules.answer_cache import get_answer_cache
+
+    qa_chain = create_qa_chain(vectorstore)
+    timings = {}
+    
+    # Run retrieval and generation separately so each stage can be timed
+    with span('qa.retrieval') as retrieval_span:
+        source_docs = retrieve_with_scores(qa_chain.retriever, question)
+        retrieval_span.set(chunks=len(source_docs))
+    timings['retrieval'] = retrieval_span.duration
+    
+    with span('qa.generate') as generate_span:
+        answer = qa_chain.combine_documents_chain.run(input_documents=source_docs, question=question)
+    timings['llm'] = generate_span.duration
+    
+    citations = []
+    for doc in source_docs:
+        citations.append({
+            'page': doc.metadata.get('page_display'),
+            'pages': doc.metadata.get('source_pages'),  # Every page a deduplicated chunk appeared on
+            'section': doc.metadata.get('section'),
+            'snippet': doc.page_content[:200]
+        })
+    
+    confidence_scores = re.findall(r"confidence score[:\s]*(\d+)", answer, re.IGNORECASE)
+    confidence = sum(int(score) for score in confidence_scores) / len(confidence_scores) if confidence_scores else None
+    
+    result = {
+        'answer': answer,
+        'citations': citations,
+        'provenance': provenance_from_docs(source_docs),
+        'confidence': confidence
+    }
+    get_answer_cache().put(content_hash, question, result, kind='answer')
+    return result, timings
+
 def verify_financial_data(qa_chain, data_point, expected_value=None):
     """Double-check a specific financial data point"""
     verification_prompt = f"""
@@ -83,7 +266,8 @@ def verify_financial_data(qa_chain, data_point, expected_value=None):
     This is for critical verification, so precision is essential.
     """
     # Use invoke() and extract text from response
-    response_obj = qa_chain.invoke(verification_prompt)
+    with span('qa.verify'):
+        response_obj = qa_chain.invoke(verification_prompt)
     return extract_text_from_response(response_obj)
 
 def cross_check_data(qa_chain, data_point):
@@ -97,21 +281,67 @@ def cross_check_data(qa_chain, data_point):
     
     for query in variations:
         # Use invoke() and extract text from response
-        response_obj = qa_chain.invoke(query)
+        with span('qa.cross_check'):
+            response_obj = qa_chain.invoke(query)
         results.append(extract_text_from_response(response_obj))
     
     return results
 
-def generate_financial_insights(qa_chain, extracted_data):
-    """Generate intelligent financial insights based on the data"""
-    # Create a summary of the extracted data
-    data_summary = json.dumps(extracted_data, indent=2)
+def format_metrics_table(extracted_data):
+    """Compact pipe-separated table of extracted metrics for prompts
+
+    Accepts one document's metrics ({metric: details}) or several documents'
+    ({document: {metric: details}}, each under a [document] line). Metrics
+    that were not found are listed on one line instead of taking a row each.
+    """
+    documents = extracted_data
+    if extracted_data and all(isinstance(v, dict) and 'value' in v for v in extracted_data.values()):
+        documents = {None: extracted_data}
+    
+    lines = ["metric | value | period | page | verified"]
+    for doc_name, metrics in documents.items():
+        if doc_name is not None:
+            lines.append(f"[{doc_name}]")
+        missing = []
+        for metric, details in metrics.items():
+            value = str(details.get('value', '')).strip()
+            if not value or value.lower().startswith('not found'):
+                missing.append(metric)
+                continue
+            verified = details.get('verified')
+            lines.append(" | ".join([metric, value, str(details.get('period', '')), str(details.get('page', '')),
+                                     '' if verified is None else ('yes' if verified else 'no')]))
+        if missing:
+            lines.append("Not found: " + ", ".join(missing))
+    return "\n".join(lines)
+
+def generate_financial_insights(extracted_data, vectorstore=None, context_chunks=INSIGHTS_CONTEXT_CHUNKS):
+    """Generate intelligent financial insights based on the data
+
+    The metrics go to the LLM directly as a compact table. With a vectorstore,
+    up to context_chunks passages retrieved for the reported metrics are added
+    as supporting context. Returns the insights text.
+    """
+    data_table = format_metrics_table(extracted_data)
+    
+    passages = ""
+    if vectorstore is not None and context_chunks:
+        found = [line.split(" | ")[0] for line in data_table.splitlines()[1:] if " | " in line]
+        if found:
+            retriever = get_retriever(vectorstore, k=context_chunks, score_threshold=RETRIEVER_SCORE_THRESHOLD)
+            with span('qa.insights.retrieval') as retrieval_span:
+                docs = retrieve_with_scores(retriever, " ".join(found))
+                retrieval_span.set(chunks=len(docs))
+            passages = "\n\n".join(f"[{doc.metadata.get('page_display', 'Page ?')}] {doc.page_content}" for doc in docs)
     
     insights_prompt = f"""
     Based on the following financial data extracted from the document, generate 5 key insights:
     
-    {data_summary}
-    
+    {data_table}
+    """ + (f"""
+    Supporting passages from the document:
+    {passages}
+    """ if passages else "") + """
     For each insight:
     1. Provide a clear, concise statement of the insight
     2. Explain why this is significant for investors or analysts
@@ -128,6 +358,10 @@ def generate_financial_insights(qa_chain, extracted_data):
     Confidence: [score]/5
     """
     
-    # Use invoke() and return the result
-    response_obj = qa_chain.invoke(insights_prompt)
-    return response_obj
\ No newline at end of file
+    # Called directly: no retrieval with the prompt as query and no unrelated chunks stuffed around the data
+    prompt_tokens = estimate_tokens(insights_prompt)
+    with span('qa.insights', prompt_chars=len(insights_prompt), prompt_tokens=prompt_tokens,
+              data_chars=len(data_table), passages=bool(passages)):
+        response_obj = get_llm().invoke(insights_prompt)
+    get_tracer().increment('insights_prompt_tokens', prompt_tokens)
+    return extract_text_from_response(getattr(response_obj, 'content', response_obj))
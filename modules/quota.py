@@ -0,0 +1,175 @@
+import time
+import itertools
+import threading
+import contextvars
+from collections import deque, Counter
+from contextlib import contextmanager
+from config import (QUOTA_ENABLED, QUOTA_WINDOW_SECONDS, LLM_RPM, LLM_TPM,
+                    EMBEDDING_RPM, EMBEDDING_TPM)
+from modules.tracing import get_tracer
+
+# Highest first: an analyst waiting on an answer beats bulk extraction, which beats ingestion
+PRIORITIES = ('interactive', 'extraction', 'ingest')
+
+_quota_context = contextvars.ContextVar('quota_context', default={})
+
+@contextmanager
+def quota_context(priority=None, session_id=None):
+    """Set the priority class and session that requests made inside the block are charged to"""
+    current = _quota_context.get()
+    token = _quota_context.set({
+        'priority': priority or current.get('priority'),
+        'session_id': session_id or current.get('session_id')
+    })
+    try:
+        yield
+    finally:
+        _quota_context.reset(token)
+
+def current_quota_context():
+    """(priority, session_id) of the calling code, defaulting to an interactive request of the current session"""
+    context = _quota_context.get()
+    session_id = context.get('session_id')
+    if session_id is None:
+        from modules.document_registry import get_session_id
+        session_id = get_session_id()
+    return context.get('priority') or 'interactive', session_id
+
+class _Ticket:
+    def __init__(self, rank, session_id, seq):
+        self.rank = rank
+        self.session_id = session_id
+        self.seq = seq
+
+class QuotaScheduler:
+    """Grants requests within requests-per-minute and tokens-per-minute budgets
+
+    Usage is tracked over a sliding window. When the budget is exhausted,
+    callers queue and are served by priority class, then by whichever
+    session has used the least of the current window (so one session's bulk
+    work cannot starve another's), then in arrival order. A request larger
+    than the whole token budget is let through once the window is empty.
+    """
+
+    def __init__(self, name, rpm=0, tpm=0, window=QUOTA_WINDOW_SECONDS):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._cond = threading.Condition()
+        self._granted = deque()  # [granted_at, tokens, session_id], oldest first
+        self._tokens = 0
+        self._waiting = []
+        self._seq = itertools.count()
+
+    def _expire(self, now):
+        expired = False
+        while self._granted and now - self._granted[0][0] >= self.window:
+            self._tokens -= self._granted.popleft()[1]
+            expired = True
+        if expired and self._waiting:
+            # Session usage fell, which can change the queue head
+            self._cond.notify_all()
+
+    def _delay(self, tokens, now):
+        """Seconds until a request of this many tokens fits both budgets"""
+        delay = 0.0
+        if self.rpm and len(self._granted) >= self.rpm:
+            delay = self._granted[len(self._granted) - self.rpm][0] + self.window - now
+        if self.tpm and self._granted and self._tokens + tokens > self.tpm:
+            excess, freed = self._tokens + tokens - self.tpm, 0
+            for granted_at, granted_tokens, _ in self._granted:
+                freed += granted_tokens
+                if freed >= excess:
+                    break
+            delay = max(delay, granted_at + self.window - now)
+        return delay
+
+    def _next(self):
+        usage = Counter(session_id for _, _, session_id in self._granted)
+        return min(self._waiting, key=lambda t: (t.rank, usage[t.session_id], t.seq))
+
+    def _publish(self):
+        tracer = get_tracer()
+        tracer.set_gauge(f'quota_{self.name}_queue_depth', len(self._waiting))
+        tracer.set_gauge(f'quota_{self.name}_window_requests', len(self._granted))
+        tracer.set_gauge(f'quota_{self.name}_window_tokens', self._tokens)
+
+    def acquire(self, tokens=0, priority='interactive', session_id=None):
+        """Block until the request fits the budget; returns a grant for settle()"""
+        ticket = _Ticket(PRIORITIES.index(priority), session_id, next(self._seq))
+        start_time = time.monotonic()
+        with self._cond:
+            self._waiting.append(ticket)
+            self._publish()
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._expire(now)
+                    if self._next() is ticket:
+                        delay = self._delay(tokens, now)
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        # Woken when a request is granted or leaves the queue, and at the next grant expiry
+                        # (which lowers a session's usage and can make this request the head)
+                        self._cond.wait(self._granted[0][0] + self.window - now if self._granted else None)
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+            grant = [time.monotonic(), tokens, session_id]
+            self._granted.append(grant)
+            self._tokens += tokens
+            self._publish()
+
+        waited = time.monotonic() - start_time
+        tracer = get_tracer()
+        tracer.record(f'quota.{self.name}.wait', waited, priority=priority)
+        tracer.increment(f'quota_{self.name}_{priority}_requests')
+        if waited >= 0.01:
+            tracer.increment(f'quota_{self.name}_throttled')
+        return grant
+
+    def settle(self, grant, tokens):
+        """Replace a grant's estimated tokens with the actual count (e.g. once the response is in)"""
+        with self._cond:
+            if time.monotonic() - grant[0] < self.window:
+                self._tokens += tokens - grant[1]
+            grant[1] = tokens
+            self._publish()
+
+    def stats(self):
+        with self._cond:
+            self._expire(time.monotonic())
+            return {
+                'queue_depth': len(self._waiting),
+                'waiting': dict(Counter(PRIORITIES[t.rank] for t in self._waiting)),
+                'window_requests': len(self._granted),
+                'window_tokens': self._tokens,
+                'rpm': self.rpm,
+                'tpm': self.tpm
+            }
+
+QUOTA_LIMITS = {
+    'llm': (LLM_RPM, LLM_TPM),
+    'embedding': (EMBEDDING_RPM, EMBEDDING_TPM)
+}
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_quota_scheduler(name):
+    """Get the process-wide scheduler for a Gemini API ('llm' or 'embedding')"""
+    with _schedulers_lock:
+        if name not in _schedulers:
+            rpm, tpm = QUOTA_LIMITS[name]
+            _schedulers[name] = QuotaScheduler(name, rpm, tpm)
+        return _schedulers[name]
+
+def acquire_quota(name, tokens=0):
+    """Wait for budget for one request made by the calling code; None when quotas are disabled"""
+    if not QUOTA_ENABLED:
+        return None
+    priority, session_id = current_quota_context()
+    return get_quota_scheduler(name).acquire(tokens, priority, session_id)
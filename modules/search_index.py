@@ -0,0 +1,165 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from config import SEARCH_INDEX_PATH, SEARCH_SNIPPET_TOKENS
+from modules.tracing import span
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    content_hash TEXT PRIMARY KEY, source TEXT, label TEXT, page_count INTEGER, indexed_at REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text, content_hash UNINDEXED, page UNINDEXED, tokenize = 'unicode61'
+);
+"""
+
+QUERY_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+def build_match_query(query):
+    """Turn a search box query into an FTS5 MATCH expression
+
+    "quoted text" is a phrase, a trailing * makes a prefix query, OR and NOT
+    are passed through, and every other word must appear on the page. Terms
+    are quoted so punctuation such as '$' or '-' never breaks the syntax.
+    """
+    terms = []
+    for phrase, word in QUERY_TERM.findall(query):
+        if phrase:
+            phrase = phrase.strip()
+            if phrase:
+                terms.append(f'"{phrase}"')
+        elif word in ('OR', 'NOT'):
+            if terms:
+                terms.append(word)
+        elif word.endswith('*') and word.strip('*'):
+            terms.append(f'"{word.strip("*")}"*')
+        else:
+            word = word.replace('"', '')
+            if word:
+                terms.append(f'"{word}"')
+
+    while terms and terms[-1] in ('OR', 'NOT'):
+        terms.pop()
+    return " ".join(terms)
+
+class PageSearchIndex:
+    """SQLite FTS5 index over the text of every page of every processed document
+
+    Pages are stored once per content hash, so a file processed by several
+    sessions (or again after a restart) is indexed only once. Searches return
+    ranked pages with a highlighted snippet.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL lets other worker processes read while one is indexing
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def has_document(self, content_hash):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM documents WHERE content_hash = ?", (content_hash,)).fetchone() is not None
+
+    def add_document(self, content_hash, source, page_texts, label=None):
+        """Index a document's pages (page_texts in page order, page numbers are 1-based)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE content_hash = ?", (content_hash,))
+            self._conn.executemany(
+                "INSERT INTO pages (text, content_hash, page) VALUES (?, ?, ?)",
+                [(text, content_hash, page_number) for page_number, text in enumerate(page_texts, start=1)]
+            )
+            self._conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+                               (content_hash, source, label or os.path.basename(source), len(page_texts), time.time()))
+
+    def index_pdf(self, content_hash, file_path, label=None):
+        """Extract page text with PyMuPDF and index it"""
+        import fitz  # PyMuPDF
+
+        with fitz.open(file_path) as doc:
+            page_texts = [page.get_text("text") for page in doc]
+        self.add_document(content_hash, file_path, page_texts, label)
+        return len(page_texts)
+
+    def get_page_texts(self, content_hash, pages=None):
+        """Stored text of a document's pages as {page: text} (all pages when pages is None)"""
+        sql = "SELECT page, text FROM pages WHERE content_hash = ?"
+        params = [content_hash]
+        if pages is not None:
+            pages = list(pages)
+            if not pages:
+                return {}
+            sql += f" AND page IN ({', '.join('?' * len(pages))})"
+            params.extend(pages)
+        with self._lock:
+            return dict(self._conn.execute(sql, params).fetchall())
+
+    def forget(self, content_hash):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE content_hash = ?", (content_hash,))
+            self._conn.execute("DELETE FROM documents WHERE content_hash = ?", (content_hash,))
+
+    def search(self, query, content_hashes=None, limit=20):
+        """Best matching pages for a query, optionally limited to some documents
+
+        Returns dicts with content_hash, source, label, page (1-based), snippet
+        (matches wrapped in ** for markdown) and score (lower is better).
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        # FTS5's built-in rank (bm25) is cheaper than calling bm25() and joining in the same query
+        sql = ("SELECT content_hash, page, snippet(pages, 0, '**', '**', '…', ?), rank "
+               "FROM pages WHERE pages MATCH ?")
+        params = [SEARCH_SNIPPET_TOKENS, match]
+        if content_hashes is not None:
+            content_hashes = list(content_hashes)
+            if not content_hashes:
+                return []
+            sql += f" AND content_hash IN ({', '.join('?' * len(content_hashes))})"
+            params.extend(content_hashes)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        with span('search.pages') as search_span:
+            with self._lock:
+                try:
+                    rows = self._conn.execute(sql, params).fetchall()
+                except sqlite3.OperationalError as e:
+                    raise ValueError(f"Invalid search query: {e}")
+                hit_hashes = list({row[0] for row in rows})
+                documents = {h: (source, label) for h, source, label in self._conn.execute(
+                    f"SELECT content_hash, source, label FROM documents WHERE content_hash IN ({', '.join('?' * len(hit_hashes))})",
+                    hit_hashes
+                )} if hit_hashes else {}
+            search_span.set(hits=len(rows))
+
+        return [{
+            'content_hash': content_hash,
+            'source': documents.get(content_hash, (None, None))[0],
+            'label': documents.get(content_hash, (None, content_hash[:12]))[1],
+            'page': page,
+            'snippet': " ".join(snippet.split()),
+            'score': score
+        } for content_hash, page, snippet, score in rows]
+
+    def stats(self):
+        with self._lock:
+            documents, pages = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(page_count), 0) FROM documents").fetchone()
+        return {'documents': documents, 'pages': pages}
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+def get_search_index():
+    """Get the process-wide page search index"""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = PageSearchIndex(SEARCH_INDEX_PATH)
+        return _search_index
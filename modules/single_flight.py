@@ -0,0 +1,75 @@
+import hashlib
+import threading
+from config import SINGLE_FLIGHT_ENABLED
+from modules.tracing import get_tracer
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Runs at most one call per key at a time; identical concurrent calls share its result
+
+    The first caller for a key runs the function, later callers with the
+    same key wait for it and receive the same result (or exception) instead
+    of repeating the request. Nothing is kept once the call finishes, so it
+    never serves stale results. Counters: <name>_calls (calls made) and
+    <name>_coalesced (calls that shared another's result).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            get_tracer().increment(f'{self.name}_coalesced')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        get_tracer().increment(f'{self.name}_calls')
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+def request_key(*parts):
+    """Compact key for a request from its parts (document hash, prompt, parameters)"""
+    return hashlib.sha1("\x1f".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+def get_single_flight(name):
+    """Get the process-wide single-flight group for a kind of request"""
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+def coalesce(name, key, func, *args, **kwargs):
+    """Run func through the named group, or directly when coalescing is disabled"""
+    if not SINGLE_FLIGHT_ENABLED or key is None:
+        return func(*args, **kwargs)
+    return get_single_flight(name).do(key, func, *args, **kwargs)
@@ -0,0 +1,158 @@
+import re
+import threading
+from collections import OrderedDict
+from config import STATEMENT_CACHE_ENTRIES
+from modules.verification import SCALES, PAGE_SCALE_PATTERN, METRIC_NAMES, LABEL_TO_METRIC, normalize_label
+from modules.tracing import span
+
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+YEAR_TOKEN = re.compile(r"^(?:FY|Fiscal)?'?((?:19|20)\d{2})[,:]?$", re.IGNORECASE)
+NUMBER_TOKEN = re.compile(r"^\(?\$?\(?(-?\d{1,3}(?:,\d{3})+(?:\.\d+)?|-?\d+(?:\.\d+)?)\)?%?$")
+NUMBER_CHARS = re.compile(r"\d[\d,]*\.\d+|\d{1,3}(?:,\d{3})+")
+DASHES = {'—', '–', '-', '$—', '$-'}
+MIN_NUMBERS_PER_PAGE = 6  # Pages with fewer formatted numbers are not statements
+
+# Row labels that only make sense under their section header ("Earnings per share:" / "Basic")
+SECTION_QUALIFIERS = {'basic', 'diluted'}
+
+def _rows(words, tolerance=3.0):
+    """Group PyMuPDF words into visual rows by vertical position, left to right"""
+    rows = []
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        middle = (word[1] + word[3]) / 2
+        if rows and abs(rows[-1][0] - middle) <= tolerance:
+            rows[-1][1].append(word)
+        else:
+            rows.append([middle, [word]])
+    return [sorted(row, key=lambda w: w[0]) for _, row in rows]
+
+def _header_columns(row):
+    """Year columns of a header row as [(year, x_center, x_right)], or None"""
+    columns = []
+    for x0, _, x1, _, text, *_ in row:
+        match = YEAR_TOKEN.match(text)
+        if match:
+            columns.append((int(match.group(1)), (x0 + x1) / 2, x1))
+    years = [year for year, _, _ in columns]
+    if len(columns) < 2 or len(set(years)) != len(years):
+        return None
+    return columns
+
+def _parse_number(text):
+    if text in DASHES:
+        return None
+    match = NUMBER_TOKEN.match(text)
+    if not match:
+        return None
+    value = float(match.group(1).replace(',', ''))
+    return -value if text.startswith('(') or text.endswith(')') else value
+
+def parse_page_statements(words, text):
+    """Line items with one value per year column on a page: [(label, {year: value})]
+
+    Numbers are assigned to the nearest year column (by right edge or centre,
+    so both right-aligned and centred layouts work) and scaled by the page's
+    "(in millions)" header, except per-share amounts. Rows labelled only
+    "Basic" or "Diluted" take the label of the section header above them, so
+    the basic share count is not mistaken for basic earnings per share.
+    """
+    scale_match = PAGE_SCALE_PATTERN.search(text)
+    page_scale = SCALES[scale_match.group(1).lower()] if scale_match else 1.0
+
+    items, columns, section = [], None, ""
+    for row in _rows(words):
+        header = _header_columns(row)
+        if header:
+            columns = header
+            continue
+        if not columns:
+            continue
+
+        gap = min(abs(a[1] - b[1]) for a, b in zip(columns, columns[1:]))
+        label_words, values = [], {}
+        for x0, _, x1, _, token, *_ in row:
+            is_value = token in DASHES or NUMBER_TOKEN.match(token)
+            # Numbers well left of the first column (e.g. note references) are part of the label
+            if not is_value or (x1 < columns[0][1] - gap and not values):
+                if not values and token != '$':
+                    label_words.append(token)
+                continue
+            year, distance = min(((year, min(abs(x1 - right), abs((x0 + x1) / 2 - centre)))
+                                  for year, centre, right in columns), key=lambda c: c[1])
+            if distance <= gap * 0.6 and year not in values:
+                values[year] = _parse_number(token)
+
+        label = " ".join(label_words)
+        values = {year: value for year, value in values.items() if value is not None}
+        if label and not values:
+            section = label
+        elif normalize_label(label) in SECTION_QUALIFIERS:
+            label = f"{section} {label}".strip()
+        if label and len(values) >= 2:
+            scale = 1.0 if 'per share' in label.lower() or LABEL_TO_METRIC.get(normalize_label(label)) == 'EPS (Basic)' else page_scale
+            items.append((label, {year: value * scale for year, value in values.items()}))
+    return items
+
+def parse_statements(file_path, page_texts=None):
+    """Multi-year series for the standard metrics found in a PDF's statement tables
+
+    Returns {metric: {'label', 'page' (1-based), 'series': [[year, value], ...]}}.
+    Only pages with at least two years and several formatted numbers are
+    parsed word by word; when a line item appears more than once, the
+    occurrence with the most years wins.
+    """
+    import fitz  # PyMuPDF
+
+    statements = {}
+    with span('statements.parse') as parse_span, fitz.open(file_path) as doc:
+        parsed_pages = 0
+        for page_index, page in enumerate(doc):
+            text = page_texts[page_index] if page_texts and page_index < len(page_texts) else page.get_text("text")
+            if len(set(YEAR_PATTERN.findall(text))) < 2 or len(NUMBER_CHARS.findall(text)) < MIN_NUMBERS_PER_PAGE:
+                continue
+            parsed_pages += 1
+            for label, values in parse_page_statements(page.get_text("words"), text):
+                metric = LABEL_TO_METRIC.get(normalize_label(label))
+                if metric and len(values) > len(statements.get(metric, {}).get('series', [])):
+                    statements[metric] = {'label': label, 'page': page_index + 1,
+                                           'series': sorted([year, value] for year, value in values.items())}
+        parse_span.set(pages=parsed_pages, metrics=len(statements))
+    return statements
+
+def attach_series(metrics, statements):
+    """Add each metric's statement series (and where it came from) to extracted metric data"""
+    for metric, details in metrics.items():
+        found = statements.get(METRIC_NAMES.get(metric, metric))
+        if found:
+            details['series'] = found['series']
+            details['series_source'] = {'label': found['label'], 'page': found['page']}
+    return metrics
+
+def series_points(details):
+    """(year, value) points of a metric's statement series"""
+    return [(int(year), float(value)) for year, value in details.get('series') or []]
+
+_statements = OrderedDict()  # content hash -> parse_statements() result
+_statements_lock = threading.Lock()
+
+def remember_statements(content_hash, statements):
+    with _statements_lock:
+        _statements[content_hash] = statements
+        _statements.move_to_end(content_hash)
+        while len(_statements) > STATEMENT_CACHE_ENTRIES:
+            _statements.popitem(last=False)
+
+def has_statements(content_hash):
+    """Whether a document's statements were parsed in this process"""
+    with _statements_lock:
+        return content_hash in _statements
+
+def statements_for(content_hash, file_path=None):
+    """Parsed statements of a document, from ingestion or by parsing file_path again"""
+    with _statements_lock:
+        statements = _statements.get(content_hash)
+    if statements is None and file_path:
+        statements = parse_statements(file_path)
+        if content_hash:
+            remember_statements(content_hash, statements)
+    return statements or {}
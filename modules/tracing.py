@@ -0,0 +1,202 @@
+import os
+import math
+import json
+import time
+import uuid
+import threading
+from collections import deque
+from contextlib import contextmanager
+from config import TRACE_FILE, TRACE_WINDOW, TRACE_MAX_BYTES
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for Gemini models)"""
+    return max(1, len(text) // 4) if text else 0
+
+class Span:
+    """One timed stage; attributes can be added while it is open"""
+
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = 'ok'
+        self.start_time = time.time()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_record(self):
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start_time,
+            'duration': self.duration,
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+class Tracer:
+    """Collects stage spans and counters, optionally appending spans to a JSONL file
+
+    Durations for each stage are kept in a bounded window so percentiles stay
+    cheap to compute no matter how long the process runs. The span file is
+    rolled over to <file>.1 once it reaches max_bytes, so at most two files
+    are kept.
+    """
+
+    def __init__(self, trace_file=None, window=1000, max_bytes=TRACE_MAX_BYTES):
+        self.trace_file = trace_file
+        self.window = window
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._file = None
+        self._local = threading.local()
+        self._durations = {}
+        self._totals = {}
+        self._counters = {}
+        self._gauges = {}
+        if trace_file:
+            os.makedirs(os.path.dirname(trace_file) or '.', exist_ok=True)
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time a stage; nested spans share the trace id of the outermost one"""
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent.trace_id if parent else uuid.uuid4().hex[:16],
+                    parent.span_id if parent else None, attributes)
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.attributes['error'] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            stack.pop()
+            self._finish(span)
+
+    def record(self, name, duration, **attributes):
+        """Record a span whose start and end were observed elsewhere (e.g. callbacks)"""
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent.trace_id if parent else uuid.uuid4().hex[:16],
+                    parent.span_id if parent else None, attributes)
+        span.start_time = time.time() - duration
+        span.duration = duration
+        self._finish(span)
+
+    def _finish(self, span):
+        with self._lock:
+            self._durations.setdefault(span.name, deque(maxlen=self.window)).append(span.duration)
+            count, total = self._totals.get(span.name, (0, 0.0))
+            self._totals[span.name] = (count + 1, total + span.duration)
+        if self.trace_file:
+            self._write(json.dumps(span.to_record(), default=str) + "\n")
+
+    def _write(self, line):
+        """Append a span line, rolling the file over when it is full (outside the stats lock)"""
+        with self._file_lock:
+            if self._file is None:
+                self._file = open(self.trace_file, 'a')
+            if self.max_bytes and self._file.tell() + len(line) > self.max_bytes:
+                self._file.close()
+                os.replace(self.trace_file, self.trace_file + '.1')
+                self._file = open(self.trace_file, 'a')
+            self._file.write(line)
+            self._file.flush()
+
+    def increment(self, name, value=1):
+        """Add to a counter such as cache hits or prompt tokens"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def set_gauge(self, name, value):
+        """Set a value that goes up and down, such as a queue depth"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def gauges(self):
+        with self._lock:
+            return dict(self._gauges)
+
+    def stage_stats(self):
+        """Count, p50 and p95 (seconds) per stage over the recent window"""
+        with self._lock:
+            windows = {name: sorted(values) for name, values in self._durations.items()}
+            totals = dict(self._totals)
+
+        stats = {}
+        for name, values in sorted(windows.items()):
+            stats[name] = {
+                'count': totals[name][0],
+                'total': totals[name][1],
+                'p50': _percentile(values, 50),
+                'p95': _percentile(values, 95)
+            }
+        return stats
+
+    def prometheus_text(self):
+        """Render stage summaries and counters in the Prometheus text format"""
+        lines = [
+            "# HELP finsight_stage_seconds Duration of pipeline stages",
+            "# TYPE finsight_stage_seconds summary"
+        ]
+        for name, stats in self.stage_stats().items():
+            for quantile, key in (('0.5', 'p50'), ('0.95', 'p95')):
+                lines.append(f'finsight_stage_seconds{{stage="{name}",quantile="{quantile}"}} {stats[key]:.6f}')
+            lines.append(f'finsight_stage_seconds_sum{{stage="{name}"}} {stats["total"]:.6f}')
+            lines.append(f'finsight_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+
+        for name, value in sorted(self.counters().items()):
+            metric = f"finsight_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        for name, value in sorted(self.gauges().items()):
+            metric = f"finsight_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text exposition to a file (e.g. for node_exporter's textfile collector)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(path + '.tmp', path)
+        return path
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(pct / 100 * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+_tracer = Tracer(TRACE_FILE or None, TRACE_WINDOW, TRACE_MAX_BYTES)
+
+def get_tracer():
+    """Get the process-wide tracer"""
+    return _tracer
+
+def span(name, **attributes):
+    """Shortcut for get_tracer().span(...)"""
+    return _tracer.span(name, **attributes)
@@ -0,0 +1,228 @@
+import re
+from config import VERIFY_PAGE_WINDOW, VERIFY_ROW_LOOKBACK_LINES
+from modules.tracing import span, get_tracer
+
+SCALES = {
+    'billion': 1e9, 'billions': 1e9, 'bn': 1e9, 'b': 1e9,
+    'million': 1e6, 'millions': 1e6, 'mn': 1e6, 'm': 1e6,
+    'thousand': 1e3, 'thousands': 1e3, 'k': 1e3
+}
+
+# A number (signs, currency symbols and parentheses are ignored: values are compared as magnitudes)
+# with an optional unit word and percent sign
+NUMBER_PATTERN = re.compile(
+    r"(?<![\d.,])(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\)?"
+    r"(?:\s?(?P<unit>billions?|millions?|thousands?|bn|mn|[BMK])\b)?\s?(?P<percent>%)?",
+    re.IGNORECASE
+)
+PAGE_SCALE_PATTERN = re.compile(r"(?i)in (billions|millions|thousands)")
+PAGE_REFERENCE_PATTERN = re.compile(r"\d+")
+LABEL_STOPWORDS = {'and', 'of', 'the', 'in', 'for', 'from', 'to', 'total'}
+# Words that make a row a different line item than a metric whose name lacks them ("Cost of revenue", "Total current assets")
+LABEL_QUALIFIERS = {'cost', 'costs', 'per', 'share', 'other', 'current', 'noncurrent', 'deferred', 'accrued', 'gross'}
+LETTERS = re.compile(r"[A-Za-z]")
+
+# Statement line items (lower-case row labels) for each standard metric
+LINE_ITEMS = {
+    'Total Revenue': ('total revenue', 'total revenues', 'revenue', 'revenues', 'net revenue', 'net revenues',
+                      'net sales', 'total net sales', 'total net revenue', 'total net revenues'),
+    'Net Income': ('net income', 'net income (loss)', 'net earnings', 'net income attributable to common stockholders'),
+    'Operating Income': ('operating income', 'operating income (loss)', 'income from operations', 'income (loss) from operations'),
+    'Total Assets': ('total assets',),
+    'Total Liabilities': ('total liabilities',),
+    'Cash and Cash Equivalents': ('cash and cash equivalents',),
+    'Operating Expenses': ('total operating expenses', 'operating expenses', 'total costs and expenses'),
+    'R&D Expenses': ('research and development', 'research and development expenses'),
+    'EPS (Basic)': ('basic earnings per share', 'earnings per share basic', 'basic net income per share',
+                    'net income per share basic', 'earnings per common share basic', 'net income per common share basic',
+                    'basic eps', 'eps (basic)')
+}
+# Other names the standard metric lists use for the same line items
+METRIC_NAMES = {'Revenue': 'Total Revenue', 'EPS': 'EPS (Basic)'}
+LABEL_TO_METRIC = {label: metric for metric, labels in LINE_ITEMS.items() for label in labels}
+
+def normalize_label(label):
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z&() ]", " ", label.lower())).strip(" :")
+
+def parse_amount(text):
+    """Parse a value such as '$57,704.9 million' or '(12.5)%' into (amount, precision, is_percent)
+
+    precision is half a unit of the last displayed digit, at the value's scale.
+    Returns None when the text has no number.
+    """
+    match = NUMBER_PATTERN.search(text)
+    if not match:
+        return None
+    number = match.group('number').replace(',', '')
+    decimals = len(number.split('.')[1]) if '.' in number else 0
+    scale = SCALES.get((match.group('unit') or '').lower(), 1.0)
+    amount = float(number) * scale
+    return amount, 0.5 * 10 ** -decimals * scale, bool(match.group('percent'))
+
+def claimed_pages(page_field):
+    """Page numbers in an extracted 'page' field such as 'Page 12' or '12, 14'"""
+    return [int(p) for p in PAGE_REFERENCE_PATTERN.findall(str(page_field or '')) if int(p) > 0]
+
+def label_tokens(metric):
+    return [t for t in re.findall(r"[a-z]+", metric.lower()) if t not in LABEL_STOPWORDS and len(t) > 2]
+
+def row_label(text, start, lookback_lines=VERIFY_ROW_LOOKBACK_LINES):
+    """Label of the row a number at text[start] belongs to
+
+    The words after the last number on the same line ("Net income   6,676.6"
+    or "... while operating income was 7.9"). When the number is alone on its
+    line, as for table cells extracted one per line, the nearest line above
+    with words, skipping the row's other numeric cells.
+    """
+    line_end = start
+    for _ in range(lookback_lines + 1):
+        line_start = text.rfind('\n', 0, line_end) + 1
+        segment, pieces, previous_end = text[line_start:line_end], [], 0
+        for match in NUMBER_PATTERN.finditer(segment):
+            pieces.append(segment[previous_end:match.start()])
+            previous_end = match.end()
+        pieces = [p for p in pieces + [segment[previous_end:]] if LETTERS.search(p)]
+        if pieces:
+            return " ".join(pieces[-1].split())
+        if line_start == 0:
+            break
+        line_end = line_start - 1
+    return ""
+
+def label_matches(metric, label):
+    """Whether a row label names the metric: a known line item for it, or all of its label words"""
+    normalized = normalize_label(label)
+    mapped = LABEL_TO_METRIC.get(normalized)
+    if mapped is not None:
+        return mapped == METRIC_NAMES.get(metric, metric)
+
+    words = set(re.findall(r"[a-z]+", normalized))
+    tokens = label_tokens(metric)
+    metric_words = set(re.findall(r"[a-z]+", metric.lower()))
+    return bool(tokens) and all(t in words for t in tokens) and not (words & LABEL_QUALIFIERS) - metric_words
+
+def parse_page(text):
+    """Numbers on a page with their positions, parsed once and shared by every metric"""
+    page_scale_match = PAGE_SCALE_PATTERN.search(text)
+    page_scale = SCALES[page_scale_match.group(1).lower()] if page_scale_match else None
+
+    numbers = []
+    for match in NUMBER_PATTERN.finditer(text):
+        number = match.group('number').replace(',', '')
+        decimals = len(number.split('.')[1]) if '.' in number else 0
+        unit = (match.group('unit') or '').lower()
+        is_percent = bool(match.group('percent'))
+        if unit:
+            scales = (SCALES[unit],)
+        elif is_percent or not page_scale:
+            scales = (1.0,)
+        else:
+            # Bare numbers follow the page's "(in millions)" header, or are literal amounts
+            scales = (page_scale, 1.0)
+        start, end = match.span('number')
+        numbers.append((float(number), 0.5 * 10 ** -decimals, scales, is_percent, start, end))
+    return {'text': text, 'numbers': numbers}
+
+def find_amount(page, target, metric):
+    """Locations on a parsed page where a number equals the target amount within display precision
+
+    label_match is set only when the number's own row is labelled with the metric.
+    """
+    amount, precision, is_percent = target
+    amount = abs(amount)
+    text = page['text']
+
+    matches = []
+    for value, half_unit, scales, number_is_percent, start, end in page['numbers']:
+        if number_is_percent != is_percent:
+            continue
+        if any(abs(value * scale - amount) <= half_unit * scale + precision for scale in scales):
+            label = row_label(text, start)
+            matches.append({
+                'position': start,
+                'text': " ".join(text[max(0, start - 60):end + 20].split()),
+                'label': label,
+                'label_match': label_matches(metric, label)
+            })
+    return matches
+
+def _page_texts(content_hash, file_path, pages=None):
+    """Page text from the search index, falling back to reading the PDF"""
+    from modules.search_index import get_search_index
+
+    texts = get_search_index().get_page_texts(content_hash, pages) if content_hash else {}
+    if not texts and file_path:
+        import fitz  # PyMuPDF
+        with fitz.open(file_path) as doc:
+            wanted = set(pages) if pages is not None else None
+            texts = {i + 1: page.get_text("text") for i, page in enumerate(doc) if wanted is None or i + 1 in wanted}
+    return texts
+
+def verify_value(metric, details, pages, page_window=VERIFY_PAGE_WINDOW):
+    """Check one extracted value against the page text around its claimed page
+
+    Returns a dict with status ('verified', 'number_only', 'other_pages',
+    'not_found' or 'no_value'), the verified flag, matches on the searched
+    pages and pages elsewhere in the document where the value appears.
+    pages maps page numbers to parse_page() results.
+    """
+    target = parse_amount(str(details.get('value', '')))
+    if target is None:
+        return {'status': 'no_value', 'verified': False, 'matches': [], 'other_pages': [], 'method': 'local'}
+
+    claimed = claimed_pages(details.get('page'))
+    window = {p + offset for p in claimed for offset in range(-page_window, page_window + 1)} if claimed else set(pages)
+
+    matches, other_pages = [], set()
+    for page, parsed in sorted(pages.items()):
+        for match in find_amount(parsed, target, metric):
+            if page in window:
+                matches.append(dict(match, page=page))
+            elif match['label_match']:
+                other_pages.add(page)
+
+    if any(m['label_match'] for m in matches):
+        status = 'verified'
+    elif matches:
+        status = 'number_only'
+    elif other_pages:
+        status = 'other_pages'
+    else:
+        status = 'not_found'
+    return {
+        'status': status,
+        'verified': status == 'verified',
+        'matches': sorted(matches, key=lambda m: not m['label_match']),
+        'other_pages': sorted(other_pages),
+        'method': 'local'
+    }
+
+def verify_extracted_metrics(content_hash, metrics, file_path=None, llm_fallback=None):
+    """Verify every extracted metric of a document against its page text
+
+    llm_fallback(metric, details), when given, is called only for metrics
+    that cannot be verified locally; its text is kept as 'llm_response'.
+    """
+    with span('verify.local', metrics=len(metrics)) as verify_span:
+        pages = {page: parse_page(text) for page, text in _page_texts(content_hash, file_path).items()}
+        results = {metric: verify_value(metric, details, pages) for metric, details in metrics.items()}
+        verified = sum(1 for r in results.values() if r['verified'])
+        verify_span.set(verified=verified, pages=len(pages))
+
+    get_tracer().increment('verify_local_verified', verified)
+    if llm_fallback is not None:
+        for metric, result in results.items():
+            if result['verified'] or result['status'] == 'no_value':
+                continue
+            get_tracer().increment('verify_llm_fallbacks')
+            result['llm_response'] = llm_fallback(metric, metrics[metric])
+            result['method'] = 'llm'
+    return results
+
+def annotate_metrics(metrics, results):
+    """Record verification outcomes on the extracted metrics themselves"""
+    for metric, result in results.items():
+        if metric in metrics:
+            metrics[metric]['verified'] = result['verified']
+            metrics[metric]['verified_pages'] = sorted({m['page'] for m in result['matches'] if m['label_match']})
+    return metrics
@@ -1,20 +1,27 @@
+import hashlib
+import json
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 from modules.data_extraction import extract_numeric_value
+from config import DASHBOARD_MAX_POINTS, DASHBOARD_MAX_COMPANIES
 
-def create_financial_dashboard(extracted_data):
-    """Create a dynamic financial dashboard from extracted data"""
-    st.header("Financial Dashboard")
-    
+def extracted_data_hash(extracted_data):
+    """Content hash of extracted data, used to key dashboard caches"""
+    payload = json.dumps(extracted_data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_dashboard_frame(data_hash, _extracted_data):
+    """Build the tidy dashboard DataFrame (cached on the content hash)"""
     # Organize data for visualization
     metrics = []
     values = []
     years = []
     companies = []
     
-    for doc_name, doc_metrics in extracted_data.items():
+    for doc_name, doc_metrics in _extracted_data.items():
         for metric_name, metric_data in doc_metrics.items():
             # Try to convert value to number for visualization
             value = extract_numeric_value(metric_data['value'])
@@ -22,53 +29,96 @@ def create_financial_dashboard(extracted_data):
                 metrics.append(metric_name)
                 values.append(value)
                 years.append(metric_data.get('period', metric_data.get('year', 'Unknown')))
-                companies.append(extracted_data[doc_name].get('company', doc_name))
+                companies.append(_extracted_data[doc_name].get('company', doc_name))
     
-    if not metrics:
-        st.info("No numerical data available for dashboard visualization")
-        return
-    
-    # Create a DataFrame for visualization
-    df = pd.DataFrame({
+    return pd.DataFrame({
         'Metric': metrics,
         'Value': values,
         'Year': years,
         'Company': companies
     })
+
+def downsample_dashboard_frame(df, max_points=DASHBOARD_MAX_POINTS, max_companies=DASHBOARD_MAX_COMPANIES):
+    """Aggregate a dashboard DataFrame so charts stay small in the browser"""
+    if len(df) <= max_points:
+        return df
+    
+    # Collapse duplicate observations first
+    df = df.groupby(['Metric', 'Company', 'Year'], as_index=False)['Value'].mean()
+    
+    # Keep the companies with the most data points and fold the rest into "Other"
+    company_counts = df['Company'].value_counts()
+    if len(company_counts) > max_companies:
+        keep = set(company_counts.index[:max_companies - 1])
+        df = df.assign(Company=df['Company'].where(df['Company'].isin(keep), 'Other'))
+        df = df.groupby(['Metric', 'Company', 'Year'], as_index=False)['Value'].mean()
+    
+    # As a last resort, keep the most recent periods per metric and company
+    if len(df) > max_points:
+        per_group = max(1, max_points // max(1, df.groupby(['Metric', 'Company']).ngroups))
+        df = (df.sort_values('Year')
+                .groupby(['Metric', 'Company'], as_index=False)
+                .tail(per_group))
+    
+    return df.reset_index(drop=True)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_dashboard_figures(data_hash, _df):
+    """Build dashboard figure specs (cached on the content hash)"""
+    plot_df = downsample_dashboard_frame(_df)
+    
+    # Plot as a horizontal bar chart
+    bar_fig = px.bar(
+        plot_df, 
+        x='Value', 
+        y='Metric', 
+        color='Company', 
+        barmode='group',
+        title='Key Financial Metrics Comparison',
+        height=500
+    )
+    
+    # Create a scatter plot for metrics by year
+    scatter_fig = px.scatter(
+        plot_df,
+        x='Year',
+        y='Value',
+        size='Value',
+        color='Company',
+        hover_name='Metric',
+        size_max=60,
+        title='Financial Metrics Over Time'
+    )
+    
+    return bar_fig.to_dict(), scatter_fig.to_dict(), len(plot_df)
+
+def create_financial_dashboard(extracted_data):
+    """Create a dynamic financial dashboard from extracted data"""
+    st.header("Financial Dashboard")
+    
+    # Rebuild the data model and figures only when the extracted data changes
+    data_hash = extracted_data_hash(extracted_data)
+    df = build_dashboard_frame(data_hash, extracted_data)
+    
+    if df.empty:
+        st.info("No numerical data available for dashboard visualization")
+        return
+    
+    bar_spec, scatter_spec, plotted_points = build_dashboard_figures(data_hash, df)
     
     # Create visualizations
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Key Financial Metrics")
-        
-        # Plot as a horizontal bar chart
-        fig = px.bar(
-            df, 
-            x='Value', 
-            y='Metric', 
-            color='Company', 
-            barmode='group',
-            title='Key Financial Metrics Comparison',
-            height=500
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(bar_spec, use_container_width=True)
     
     with col2:
         st.subheader("Metrics by Company/Year")
-        
-        # Create a scatter plot for metrics by year
-        scatter_fig = px.scatter(
-            df,
-            x='Year',
-            y='Value',
-            size='Value',
-            color='Company',
-            hover_name='Metric',
-            size_max=60,
-            title='Financial Metrics Over Time'
-        )
-        st.plotly_chart(scatter_fig, use_container_width=True)
+        st.plotly_chart(scatter_spec, use_container_width=True)
+    
+    if plotted_points < len(df):
+        st.caption(f"Charts aggregated from {len(df)} to {plotted_points} points")
     
     # Show the raw data
     with st.expander("View Raw Data"):
@@ -91,7 +141,7 @@ def plot_metric_comparison(comparison_df, metric_name):
     except Exception as e:
         st.warning(f"Could not create visualization: {str(e)}")
 
-def plot_financial_projection(prediction_data):
+def plot_financial_projection(prediction_data, bands=None):
     """Plot a financial projection with confidence intervals"""
     if not prediction_data:
         return
@@ -117,6 +167,10 @@ def plot_financial_projection(prediction_data):
         labels={'Value': 'Value', 'Year': 'Year'}
     )
     
+    # Shade uncertainty bands, widest first so narrower bands sit on top
+    if bands:
+        add_uncertainty_bands(fig, bands['years'], bands['percentiles'])
+    
     # Customize
     fig.update_layout(
         xaxis_title="Year",
@@ -126,6 +180,31 @@ def plot_financial_projection(prediction_data):
     
     st.plotly_chart(fig, use_container_width=True)
 
+def add_uncertainty_bands(fig, years, percentiles):
+    """Add shaded percentile bands to a projection figure"""
+    years = list(years)
+    lower_levels = sorted(p for p in percentiles if p < 50)
+    
+    for i, lower_p in enumerate(lower_levels):
+        upper_p = 100 - lower_p
+        if upper_p not in percentiles:
+            continue
+        
+        lower = list(percentiles[lower_p])
+        upper = list(percentiles[upper_p])
+        if any(pd.isna(v) for v in lower + upper):
+            continue
+        
+        fig.add_trace(go.Scatter(
+            x=years + years[::-1],
+            y=upper + lower[::-1],
+            fill='toself',
+            fillcolor=f'rgba(99, 110, 250, {0.12 + 0.08 * i:.2f})',
+            line=dict(width=0),
+            hoverinfo='skip',
+            name=f'{upper_p - lower_p:g}% band'
+        ))
+
 def create_metric_timeseries(df, metric_name):
     """Create a time series visualization of a specific metric"""
     # Filter for the specific metric
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from modules.tracing import span
+
+# Bump when the schema changes; PRAGMA user_version records it in the file
+SNAPSHOT_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY, position INTEGER, content_hash TEXT, path TEXT,
+    pages INTEGER, info TEXT, toc TEXT, digest TEXT
+);
+CREATE TABLE IF NOT EXISTS extracted (name TEXT PRIMARY KEY, data TEXT, digest TEXT);
+CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, content_hash TEXT, created_at REAL, entry TEXT);
+"""
+
+def _digest(*values):
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _connect(path, read_only=False):
+    """Open a snapshot and check its format version (0 means a new, empty file)"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True) if read_only else sqlite3.connect(path)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        conn.close()
+        raise ValueError(f"{path} is not a workspace snapshot ({e})")
+
+    if version > SNAPSHOT_VERSION or (read_only and version == 0):
+        conn.close()
+        if version == 0:
+            raise ValueError(f"{path} is not a workspace snapshot")
+        raise ValueError(f"{path} was written by a newer version (snapshot format {version}, supported {SNAPSHOT_VERSION})")
+    return conn
+
+def save_snapshot(path, session_state):
+    """Write documents, extracted metrics and cached answers to a snapshot file
+
+    Only rows whose content changed since the last save are rewritten, so
+    saving an existing workspace after a small change is quick. Indexes are
+    stored as content-hash references to the shared vectorstore cache.
+    """
+    from modules.answer_cache import get_answer_cache
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    processed_docs = session_state.get('processed_docs', {})
+    extracted_data = session_state.get('extracted_data', {})
+    stats = {'written': 0, 'unchanged': 0, 'deleted': 0}
+
+    with span('workspace.save', documents=len(processed_docs)) as save_span:
+        conn = _connect(path)
+        try:
+            with conn:
+                conn.executescript(SCHEMA)
+                conn.execute(f"PRAGMA user_version = {SNAPSHOT_VERSION}")
+
+                existing = dict(conn.execute("SELECT name, digest FROM documents"))
+                for position, (name, doc_data) in enumerate(processed_docs.items()):
+                    row = (position, doc_data.get('content_hash'), doc_data.get('path'), doc_data.get('pages'),
+                           json.dumps(doc_data.get('info'), default=str), json.dumps(doc_data.get('index'), default=str))
+                    digest = _digest(*row)
+                    if existing.pop(name, None) == digest:
+                        stats['unchanged'] += 1
+                        continue
+                    conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (name, *row, digest))
+                    stats['written'] += 1
+                conn.executemany("DELETE FROM documents WHERE name = ?", [(name,) for name in existing])
+                stats['deleted'] += len(existing)
+
+                existing = dict(conn.execute("SELECT name, digest FROM extracted"))
+                for name, data in extracted_data.items():
+                    data_json = json.dumps(data, sort_keys=True, default=str)
+                    digest = _digest(data_json)
+                    if existing.pop(name, None) == digest:
+                        stats['unchanged'] += 1
+                        continue
+                    conn.execute("INSERT OR REPLACE INTO extracted VALUES (?, ?, ?)", (name, data_json, digest))
+                    stats['written'] += 1
+                conn.executemany("DELETE FROM extracted WHERE name = ?", [(name,) for name in existing])
+                stats['deleted'] += len(existing)
+
+                # Answers never change once cached; only new (or re-generated) ones are written
+                existing = dict(conn.execute("SELECT key, created_at FROM answers"))
+                content_hashes = {d.get('content_hash') for d in processed_docs.values() if d.get('content_hash')}
+                for entry in get_answer_cache().entries_for(content_hashes):
+                    if existing.get(entry['key']) == entry['created_at']:
+                        stats['unchanged'] += 1
+                        continue
+                    conn.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)",
+                                 (entry['key'], entry['content_hash'], entry['created_at'], json.dumps(entry, default=str)))
+                    stats['written'] += 1
+
+                conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+                    ('saved_at', str(time.time())),
+                    ('current_doc', session_state.get('current_doc') or '')
+                ])
+        finally:
+            conn.close()
+        save_span.set(**stats)
+    return stats
+
+def load_snapshot(path, session_state):
+    """Restore a snapshot into a session without loading any index
+
+    Documents whose index is in the shared cache get a registry handle that
+    opens the index on first use; the others are reported as missing so they
+    can be processed again.
+    """
+    from modules.answer_cache import get_answer_cache
+    from modules.document_registry import get_document_registry
+
+    if not os.path.exists(path):
+        raise ValueError(f"Snapshot not found: {path}")
+
+    with span('workspace.load') as load_span:
+        conn = _connect(path, read_only=True)
+        try:
+            registry = get_document_registry()
+
+            processed_docs, missing = {}, []
+            for name, content_hash, doc_path, pages, info, toc in conn.execute(
+                    "SELECT name, content_hash, path, pages, info, toc FROM documents ORDER BY position"):
+                if not content_hash or not registry.contains(content_hash):
+                    missing.append(name)
+                    continue
+                processed_docs[name] = {
+                    'path': doc_path,
+                    'vectorstore': registry.handle(content_hash),
+                    'content_hash': content_hash,
+                    'info': json.loads(info),
+                    'pages': pages,
+                    'index': json.loads(toc)
+                }
+
+            extracted_data = {name: json.loads(data) for name, data in conn.execute("SELECT name, data FROM extracted")}
+            answers = [json.loads(entry) for (entry,) in conn.execute("SELECT entry FROM answers")]
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+        finally:
+            conn.close()
+
+        get_answer_cache().load(answers)
+        session_state.processed_docs.update(processed_docs)
+        session_state.extracted_data.update(extracted_data)
+        if meta.get('current_doc') in session_state.processed_docs:
+            session_state.current_doc = meta['current_doc']
+        elif not session_state.current_doc and processed_docs:
+            session_state.current_doc = next(iter(processed_docs))
+
+        load_span.set(documents=len(processed_docs), missing=len(missing), answers=len(answers))
+    return {'documents': len(processed_docs), 'missing': missing,
+            'extracted': len(extracted_data), 'answers': len(answers)}
@@ -0,0 +1,297 @@
+"""Async HTTP query service over processed documents.
+
+    python service.py --port 8765 --workers 4
+    python service.py --stub-llm   # offline, deterministic models
+
+Endpoints (JSON in, JSON out):
+    GET  /health
+    GET  /documents
+    POST /ingest           {"path": "reports/acme-2022.pdf", "name": "optional name"}
+    POST /ask              {"document": "acme-2022.pdf", "question": "..."}
+    POST /extract-metrics  {"document": "acme-2022.pdf"}
+    POST /compare          {"documents": ["a.pdf", "b.pdf"], "metric": "Net Income"}
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BODY_BYTES = 1024 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+
+class ServiceError(Exception):
+    """Error that maps directly to an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class DocumentStore:
+    """Documents loaded once and shared by every request"""
+
+    def __init__(self):
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, doc_data):
+        with self._lock:
+            self._docs[name] = doc_data
+
+    def get(self, name):
+        with self._lock:
+            if name not in self._docs:
+                raise ServiceError(404, f"Unknown document: {name}")
+            return self._docs[name]
+
+    def summary(self):
+        with self._lock:
+            return [{
+                'name': name,
+                'company': doc['info']['company'],
+                'type': doc['info']['type'],
+                'year': doc['info']['year'],
+                'pages': doc['pages']
+            } for name, doc in self._docs.items()]
+
+def _require(payload, *fields):
+    """Check that a JSON payload has the required fields"""
+    missing = [f for f in fields if not payload.get(f)]
+    if missing:
+        raise ServiceError(400, f"Missing field(s): {', '.join(missing)}")
+
+def ingest(store, payload):
+    """Process a PDF and make it available to other endpoints"""
+    from modules.document_processor import ingest_document
+
+    _require(payload, 'path')
+    path = payload['path']
+    if not os.path.exists(path):
+        raise ServiceError(404, f"File not found: {path}")
+
+    start_time = time.perf_counter()
+    vectorstore, file_info, num_pages, doc_index = ingest_document(path)
+    name = payload.get('name') or file_info['name']
+    store.add(name, {
+        'path': path,
+        'vectorstore': vectorstore,
+        'content_hash': vectorstore.content_hash,
+        'info': file_info,
+        'pages': num_pages,
+        'index': doc_index
+    })
+    return {'document': name, 'info': file_info, 'pages': num_pages,
+            'timings': {'ingest': time.perf_counter() - start_time}}
+
+def ask(store, payload):
+    """Answer a question about one document"""
+    from modules.qa_chain import answer_question
+
+    _require(payload, 'document', 'question')
+    doc_data = store.get(payload['document'])
+    result = answer_question(doc_data['vectorstore'], payload['question'])
+    result['document'] = payload['document']
+    return result
+
+def extract_metrics(store, payload):
+    """Extract the standard metrics for a document's type"""
+    from modules.qa_chain import create_qa_chain
+    from modules.data_extraction import extract_standardized_financials
+
+    _require(payload, 'document')
+    doc_data = store.get(payload['document'])
+
+    start_time = time.perf_counter()
+    qa_chain = create_qa_chain(doc_data['vectorstore'])
+    metrics = extract_standardized_financials(qa_chain, doc_data['info']['type'])
+    return {'document': payload['document'], 'metrics': metrics,
+            'timings': {'extraction': time.perf_counter() - start_time}}
+
+def compare(store, payload):
+    """Compare one metric across several documents"""
+    from modules.data_extraction import compare_documents
+
+    _require(payload, 'documents', 'metric')
+    documents = {name: store.get(name) for name in payload['documents']}
+
+    start_time = time.perf_counter()
+    results = compare_documents(documents, payload['metric'])
+    return {'metric': payload['metric'], 'results': results,
+            'timings': {'comparison': time.perf_counter() - start_time}}
+
+ROUTES = {
+    ('POST', '/ingest'): ingest,
+    ('POST', '/ask'): ask,
+    ('POST', '/extract-metrics'): extract_metrics,
+    ('POST', '/compare'): compare
+}
+
+class QueryService:
+    """Bounded request queue drained by a fixed pool of workers"""
+
+    def __init__(self, workers, queue_size):
+        self.store = DocumentStore()
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query-worker")
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            handler, payload, enqueued_at, future = await self.queue.get()
+            queue_wait = time.perf_counter() - enqueued_at
+            try:
+                result = await loop.run_in_executor(self.executor, handler, self.store, payload)
+                result.setdefault('timings', {})['queue_wait'] = queue_wait
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def dispatch(self, method, path, payload):
+        """Route a request, queueing heavy work for the worker pool"""
+        if (method, path) == ('GET', '/health'):
+            return {'status': 'ok', 'queue_depth': self.queue.qsize(), 'workers': self.workers}
+        if (method, path) == ('GET', '/documents'):
+            return {'documents': self.store.summary()}
+
+        handler = ROUTES.get((method, path))
+        if handler is None:
+            known_paths = {p for _, p in ROUTES} | {'/health', '/documents'}
+            raise ServiceError(405 if path in known_paths else 404, f"No route for {method} {path}")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((handler, payload, time.perf_counter(), future))
+        except asyncio.QueueFull:
+            raise ServiceError(503, "Request queue is full, retry later")
+        return await future
+
+    async def handle_connection(self, reader, writer):
+        start_time = time.perf_counter()
+        try:
+            method, path, payload = await _read_request(reader)
+            result = await self.dispatch(method, path, payload)
+            result.setdefault('timings', {})['total'] = time.perf_counter() - start_time
+            status, body = 200, result
+        except ServiceError as e:
+            status, body = e.status, {'error': e.message}
+        except Exception as e:
+            status, body = 500, {'error': str(e)}
+
+        try:
+            _write_response(writer, status, body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+async def _read_request(reader):
+    """Parse a minimal HTTP/1.1 request with an optional JSON body"""
+    request_line = (await reader.readline()).decode('latin-1').strip()
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise ServiceError(400, "Malformed request line")
+    method, target, _ = parts
+
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1')
+        if line in ('\r\n', '\n', ''):
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0) or 0)
+    if length > MAX_BODY_BYTES:
+        raise ServiceError(413, "Request body too large")
+
+    payload = {}
+    if length:
+        try:
+            payload = json.loads(await reader.readexactly(length))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise ServiceError(400, "Body must be valid JSON")
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "Body must be a JSON object")
+
+    return method.upper(), target.split('?', 1)[0], payload
+
+def _write_response(writer, status, body):
+    data = json.dumps(body, default=str).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode('latin-1') + data)
+
+async def serve(host, port, workers, queue_size):
+    service = QueryService(workers, queue_size)
+    service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Serving on http://{host}:{port} with {workers} workers (queue size {queue_size})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP query service over processed financial documents")
+    parser.add_argument("--host", help="Interface to bind")
+    parser.add_argument("--port", type=int, help="Port to listen on")
+    parser.add_argument("--workers", type=int, help="Concurrent requests doing LLM or ingest work")
+    parser.add_argument("--queue-size", type=int, help="Pending requests accepted before returning 503")
+    parser.add_argument("--stub-llm", action="store_true", help="Use deterministic offline LLM and embeddings")
+    args = parser.parse_args(argv)
+
+    # The backend is read from config at import time, so set it before anything loads
+    if args.stub_llm:
+        os.environ["FINSIGHT_LLM_BACKEND"] = "stub"
+    else:
+        from dotenv import load_dotenv
+        load_dotenv()
+        if not os.getenv("GOOGLE_API_KEY"):
+            print("GOOGLE_API_KEY is not set (use --stub-llm to run offline)", file=sys.stderr)
+            return 2
+
+    from config import SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS, SERVICE_QUEUE_SIZE
+    try:
+        asyncio.run(serve(
+            args.host or SERVICE_HOST,
+            args.port or SERVICE_PORT,
+            args.workers or SERVICE_WORKERS,
+            args.queue_size or SERVICE_QUEUE_SIZE
+        ))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
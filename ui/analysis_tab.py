@@ -1,8 +1,11 @@
 import streamlit as st
 import re
+import json
+from modules.answer_cache import get_answer_cache
 from modules.qa_chain import create_qa_chain, generate_financial_insights
-from modules.data_extraction import extract_standardized_financials
+from modules.precompute import answer_and_cache, get_standard_metrics
 from ui.components import display_confidence, display_source_page
+from config import EXAMPLE_QUESTIONS
 
 def render_analysis_tab():
     """Render the financial analysis tab"""
@@ -13,15 +16,7 @@ def render_analysis_tab():
     
     # Provide some example questions
     st.markdown("### Example questions:")
-    example_questions = [
-        "What were the total revenues in the most recent fiscal year?",
-        "How did advertising revenue change compared to the previous year?",
-        "What are the key risks mentioned in the report?",
-        "Summarize the company's financial performance",
-        "What is the company's R&D spending?"
-    ]
-    
-    for q in example_questions:
+    for q in EXAMPLE_QUESTIONS:
         if st.button(q, key=f"q_{q}"):
             user_question = q
             st.session_state.user_question = q
@@ -33,24 +28,19 @@ def render_analysis_tab():
     else:
         user_question = st.text_input("Or type your own question:")
     
+    answer_cache = get_answer_cache()
+    content_hash = current_doc_data.get('content_hash')
+    
     if user_question:
-        qa_chain = create_qa_chain(current_doc_data['vectorstore'])
+        cached = answer_cache.get(content_hash, user_question)
         with st.spinner("Analyzing with Gemini 1.5 Flash..."):
-            # Using invoke() and handling the response properly
-            response_obj = qa_chain.invoke(user_question)
-            
-            # Extract the text response from the dictionary returned by invoke()
-            if isinstance(response_obj, dict):
-                if 'result' in response_obj:
-                    response_text = response_obj['result']
-                else:
-                    # Try common keys or convert the whole response to string
-                    response_text = response_obj.get('answer', 
-                                  response_obj.get('output_text',
-                                  response_obj.get('output',
-                                  str(response_obj))))
-            else:
-                response_text = str(response_obj)
+            # Answers for this document and question are reused across reruns, sessions and restores
+            # (example questions may already have been precomputed after ingestion)
+            if cached is None:
+                qa_chain = create_qa_chain(current_doc_data['vectorstore'])
+                cached = answer_and_cache(qa_chain, content_hash, user_question)
+            response_text = str(cached['answer'])
+            provenance = cached.get('provenance')
             
             st.write("### Answer")
             st.write(response_text)
@@ -62,13 +52,18 @@ def render_analysis_tab():
                 st.write("### Overall Confidence")
                 display_confidence(avg_confidence)
             
-            # Add source verification
-            mentioned_pages = re.findall(r"Page (\d+)", response_text)
-            if mentioned_pages:
-                display_source_page(current_doc_data['path'], mentioned_pages)
+            # Source pages come from the retrieved chunks; older cached answers fall back to the text
+            if provenance:
+                display_source_page(current_doc_data['path'], provenance=provenance)
+            else:
+                mentioned_pages = re.findall(r"Page (\d+)", response_text)
+                if mentioned_pages:
+                    display_source_page(current_doc_data['path'], mentioned_pages)
     
     # Financial insights button
     st.subheader("Automated Financial Insights")
+    include_passages = st.checkbox("Include supporting passages from the document", value=True, key="insights_passages",
+                                   help="Adds a few retrieved passages about the reported metrics to the prompt")
     if st.button("Generate Financial Insights"):
         # Check if we have extracted data
         if st.session_state.current_doc in st.session_state.extracted_data:
@@ -76,31 +71,26 @@ def render_analysis_tab():
         else:
             # Extract standardized financial data first
             with st.spinner("Extracting key financial data..."):
-                qa_chain = create_qa_chain(current_doc_data['vectorstore'])
-                extracted_data = extract_standardized_financials(qa_chain, current_doc_data['info']['type'])
+                extracted_data = get_standard_metrics(current_doc_data['vectorstore'], content_hash,
+                                                      current_doc_data['info']['type'], current_doc_data['path'])
                 
                 # Store for future use
                 if st.session_state.current_doc not in st.session_state.extracted_data:
                     st.session_state.extracted_data[st.session_state.current_doc] = extracted_data
         
-        # Generate insights
+        # Generate insights (cached for the same document and extracted data)
+        insights_key = json.dumps([extracted_data, include_passages], sort_keys=True)
+        cached = answer_cache.get(content_hash, insights_key, kind='insights')
         with st.spinner("Generating intelligent financial insights..."):
-            qa_chain = create_qa_chain(current_doc_data['vectorstore'])
-            
-            # Updated to use invoke() and handle the response properly
-            insights_obj = generate_financial_insights(qa_chain, extracted_data)
-            
-            # Extract the text response
-            if isinstance(insights_obj, dict):
-                if 'result' in insights_obj:
-                    insights_text = insights_obj['result']
-                else:
-                    insights_text = insights_obj.get('answer',
-                                   insights_obj.get('output_text',
-                                   insights_obj.get('output',
-                                   str(insights_obj))))
+            if cached is not None:
+                insights_text = cached['answer']
             else:
-                insights_text = str(insights_obj)
+                insights_text = generate_financial_insights(
+                    extracted_data, current_doc_data['vectorstore'] if include_passages else None
+                )
+            
+            if cached is None:
+                answer_cache.put(content_hash, insights_key, insights_text, kind='insights')
             
             st.subheader("Key Financial Insights")
             st.markdown(insights_text)
\ No newline at end of file
@@ -2,9 +2,17 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import re
-from modules.data_extraction import compare_documents, extract_numeric_value, extract_text_from_response
+import time
+from modules.data_extraction import (compare_documents, compare_documents_matrix, extract_numeric_value,
+                                     extract_text_from_response, is_found, cell_to_metric)
 from modules.prediction import predict_future_performance
+from modules.forecasting import (
+    panel_records_from_extracted_data, build_metric_panel, fit_panel_models, forecast_table,
+    simulate_prediction_bands, MODEL_TYPES
+)
+from modules.backtesting import backtest_panel, backtest_table, select_best_forecasts
 from modules.visualization import plot_metric_comparison, plot_financial_projection
+from config import COMPARISON_METRICS
 
 def render_comparison_tab():
     """Render the comparison and prediction tab"""
@@ -18,6 +26,10 @@ def render_comparison_tab():
     
     # Financial projections
     render_financial_projections()
+    
+    # Portfolio-wide projections across all extracted documents
+    if st.session_state.extracted_data:
+        render_portfolio_projections()
 
 def render_document_comparison():
     """Render the document comparison section"""
@@ -28,17 +40,13 @@ def render_document_comparison():
     doc_options = list(st.session_state.processed_docs.keys())
     selected_docs = st.multiselect("Select documents to compare:", doc_options, default=[st.session_state.current_doc])
     
+    comparison_mode = st.radio("Comparison mode:", ["Single metric", "Metric matrix"], horizontal=True)
+    if comparison_mode == "Metric matrix":
+        render_metric_matrix(selected_docs)
+        return
+    
     # Select metric for comparison
-    comparison_metric = st.selectbox("Select metric to compare:", [
-        "Total Revenue", 
-        "Net Income", 
-        "Operating Income", 
-        "EPS", 
-        "R&D Expenses",
-        "Cash and Cash Equivalents",
-        "Total Assets",
-        "Total Liabilities"
-    ])
+    comparison_metric = st.selectbox("Select metric to compare:", COMPARISON_METRICS)
     
     if st.button("Compare Documents") and selected_docs:
         with st.spinner("Comparing documents..."):
@@ -83,6 +91,48 @@ def render_document_comparison():
             except Exception as e:
                 st.warning(f"Could not create visualization: {str(e)}")
 
+def render_metric_matrix(selected_docs):
+    """Compare many metrics across many documents, filling the table as cells complete"""
+    metrics = st.multiselect("Select metrics to compare:", COMPARISON_METRICS, default=COMPARISON_METRICS)
+    
+    if st.button("Build Comparison Matrix") and selected_docs and metrics:
+        docs_to_compare = {doc: st.session_state.processed_docs[doc] for doc in selected_docs}
+        total = len(metrics) * len(docs_to_compare)
+        
+        st.write("### Comparison Matrix")
+        matrix = pd.DataFrame("…", index=metrics, columns=list(docs_to_compare))
+        table_placeholder = st.empty()
+        table_placeholder.dataframe(matrix)
+        progress_bar = st.progress(0.0, text=f"0/{total} cells")
+        
+        detail_rows = []
+        for done, (doc_name, metric, cell) in enumerate(compare_documents_matrix(docs_to_compare, metrics), start=1):
+            matrix.loc[metric, doc_name] = cell['value']
+            # Found values join the extracted data used by projections and the dashboard (standard extraction wins)
+            if is_found(cell['value']):
+                st.session_state.extracted_data.setdefault(doc_name, {}).setdefault(metric, cell_to_metric(cell))
+            detail_rows.append({
+                'Document': doc_name,
+                'Company': cell['company'] or 'Unknown',
+                'Metric': metric,
+                'Value': cell['value'],
+                'Year': cell['year'] or 'Unknown',
+                'Page': cell['page'],
+                'Confidence': cell['confidence']
+            })
+            table_placeholder.dataframe(matrix)
+            progress_bar.progress(done / total, text=f"{done}/{total} cells")
+        
+        with st.expander("Pages, periods and confidence"):
+            details_df = pd.DataFrame(detail_rows)
+            st.dataframe(details_df)
+        st.download_button(
+            label="Download CSV",
+            data=pd.DataFrame(detail_rows).to_csv(index=False),
+            file_name="comparison_matrix.csv",
+            mime="text/csv"
+        )
+
 def render_financial_projections():
     """Render the financial projections section"""
     st.subheader("Financial Projections")
@@ -100,6 +150,14 @@ def render_financial_projections():
         
         projection_years = st.slider("Years to project:", min_value=1, max_value=5, value=3)
         
+        interval_labels = {
+            "Analytic (t-interval)": 'analytic',
+            "Residual bootstrap": 'bootstrap',
+            "Monte Carlo": 'monte_carlo'
+        }
+        interval_choice = st.selectbox("Uncertainty bands:", list(interval_labels.keys()))
+        interval_method = interval_labels[interval_choice]
+        
         if st.button("Generate Projection"):
             with st.spinner("Generating financial projection..."):
                 # Get the extracted data
@@ -131,7 +189,8 @@ def render_financial_projections():
                         
                         # Create visualization
                         st.write("### Projection Visualization")
-                        plot_financial_projection(prediction_result)
+                        bands = projection_bands(extracted_data, prediction_metric, projection_years, interval_method)
+                        plot_financial_projection(prediction_result, bands)
                         
                         # Show model quality
                         if r_squared < 0.7:
@@ -159,14 +218,87 @@ def render_financial_projections():
         
         if st.button("Extract Data Now"):
             with st.spinner("Extracting standardized financial data..."):
-                from modules.qa_chain import create_qa_chain
-                from modules.data_extraction import extract_standardized_financials
+                from modules.precompute import get_standard_metrics
                 
                 current_doc_data = st.session_state.processed_docs[st.session_state.current_doc]
-                qa_chain = create_qa_chain(current_doc_data['vectorstore'])
-                extracted_data = extract_standardized_financials(qa_chain, current_doc_data['info']['type'])
+                extracted_data = get_standard_metrics(current_doc_data['vectorstore'], current_doc_data.get('content_hash'),
+                                                      current_doc_data['info']['type'], current_doc_data['path'])
                 
                 # Store for future use
                 if st.session_state.current_doc not in st.session_state.extracted_data:
                     st.session_state.extracted_data[st.session_state.current_doc] = extracted_data
-                    st.success("Data extracted! You can now generate projections.")
\ No newline at end of file
+                    st.success("Data extracted! You can now generate projections.")
+
+def projection_bands(extracted_data, metric_name, years_to_predict, interval_method):
+    """Compute shaded uncertainty bands for a single linear projection"""
+    # Treat every document as one series, matching predict_future_performance
+    records = [
+        ('projection', metric, year, value)
+        for _, metric, year, value in panel_records_from_extracted_data(extracted_data, [metric_name])
+    ]
+    panel = build_metric_panel(records)
+    if not panel['keys']:
+        return None
+    
+    if interval_method == 'analytic':
+        forecast = fit_panel_models(panel, years_to_predict, ('linear',))
+        result = forecast['models']['linear']
+        percentiles = {2.5: result['lower_bound'][0], 97.5: result['upper_bound'][0]}
+    else:
+        simulation = simulate_prediction_bands(panel, years_to_predict, 'linear', interval_method)
+        percentiles = {p: values[0] for p, values in simulation['percentiles'].items()}
+        forecast = simulation
+    
+    return {'years': forecast['future_years'][0], 'percentiles': percentiles}
+
+def render_portfolio_projections():
+    """Render batched projections for every metric of every company"""
+    st.subheader("Portfolio Projections")
+    st.markdown("Project all extracted metrics for all companies at once using linear, exponential and CAGR models.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        portfolio_years = st.slider("Years to project:", min_value=1, max_value=5, value=3, key="portfolio_years")
+    with col2:
+        selected_models = st.multiselect("Models:", list(MODEL_TYPES), default=list(MODEL_TYPES))
+    
+    auto_select = st.checkbox("Use the best model per series (rolling-origin backtest)", value=True)
+    
+    if st.button("Project All Metrics") and selected_models:
+        # Group documents by company so each company forms one series per metric
+        entity_names = {
+            doc_name: doc_data['info']['company']
+            for doc_name, doc_data in st.session_state.processed_docs.items()
+            if doc_data['info'].get('company')
+        }
+        
+        start_time = time.perf_counter()
+        records = panel_records_from_extracted_data(st.session_state.extracted_data, entity_names=entity_names)
+        panel = build_metric_panel(records)
+        forecast = fit_panel_models(panel, portfolio_years, tuple(selected_models))
+        projection_df = forecast_table(forecast)
+        
+        backtest = None
+        if auto_select:
+            backtest = backtest_panel(panel, horizon=portfolio_years, models=tuple(selected_models))
+            projection_df = select_best_forecasts(projection_df, backtest)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        
+        if projection_df.empty:
+            st.warning("Insufficient historical data for projection. Need at least 2 data points per metric.")
+            return
+        
+        st.dataframe(projection_df, use_container_width=True)
+        st.caption(f"Projected {len(forecast['keys'])} series with {len(selected_models)} models in {elapsed_ms:.1f} ms")
+        
+        if backtest is not None:
+            with st.expander("Backtest Results"):
+                st.markdown("Mean absolute percentage error (MAPE) and prediction-interval coverage from rolling-origin evaluation. Lower MAPE is better; coverage should be close to 95%.")
+                st.dataframe(backtest_table(backtest), use_container_width=True)
+        
+        st.download_button(
+            label="Download Projections CSV",
+            data=projection_df.to_csv(index=False),
+            file_name="portfolio_projections.csv",
+            mime="text/csv"
+        )
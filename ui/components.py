@@ -1,5 +1,11 @@
 import streamlit as st
 from utils.pdf_utils import display_pdf_page
+from config import SOURCE_PAGE_PRELOAD
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_pdf_page(pdf_path, page_num):
+    """Rendered page image, cached so switching between source pages is instant"""
+    return display_pdf_page(pdf_path, page_num)
 
 def display_confidence(score):
     """Display a visual confidence indicator"""
@@ -14,12 +20,41 @@ def display_confidence(score):
     except:
         return st.error("Invalid confidence score")
 
-def display_source_page(pdf_path, mentioned_pages):
-    """Display source page from the PDF"""
+def display_source_page(pdf_path, mentioned_pages=None, provenance=None):
+    """Display source pages from the PDF
+
+    With provenance from the QA chain, the pages of the retrieved chunks are
+    offered closest first and the top ones are rendered ahead of time;
+    otherwise the pages mentioned in the answer text are used.
+    """
+    from modules.qa_chain import provenance_pages
+    
     st.write("### Source Verification")
-    selected_page = st.selectbox("View source page:", options=[int(p) for p in set(mentioned_pages)])
+    entries = {}
+    if provenance:
+        pages = provenance_pages(provenance)
+        for entry in provenance:
+            for page in entry['pages']:
+                entries.setdefault(page, entry)
+    else:
+        pages = sorted({int(p) for p in mentioned_pages or []})
+    if not pages:
+        return
+    
+    def page_label(page):
+        entry = entries.get(page)
+        if not entry:
+            return f"Page {page}"
+        section = f" · {entry['section']}" if entry.get('section') else ""
+        score = f" · distance {entry['score']:.2f}" if entry.get('score') is not None else ""
+        return f"Page {page}{section}{score}"
+    
+    for page in pages[:SOURCE_PAGE_PRELOAD]:
+        cached_pdf_page(pdf_path, page)
+    
+    selected_page = st.selectbox("View source page:", options=pages, format_func=page_label)
     if selected_page:
-        st.markdown(display_pdf_page(pdf_path, selected_page), unsafe_allow_html=True)
+        st.markdown(cached_pdf_page(pdf_path, selected_page), unsafe_allow_html=True)
 
 def display_data_table(data_df):
     """Display a DataFrame with enhanced styling"""
@@ -74,24 +109,28 @@ def create_error_box(message):
     """Create an error box with standardized styling"""
     st.error(message)
 
-def create_page_navigator(pdf_path, total_pages):
-    """Create a page navigator for browsing PDF pages"""
+def _step_page(key, step, total_pages):
+    st.session_state[key] = min(max(st.session_state[key] + step, 1), total_pages)
+
+def create_page_navigator(pdf_path, total_pages, key="browser_page"):
+    """Create a page navigator for browsing PDF pages
+
+    The current page lives in st.session_state[key], so other widgets (e.g.
+    search results) can jump to a page by setting it before a rerun.
+    """
     st.subheader("Document Browser")
     
+    # Keep the page in range when switching to a shorter document
+    st.session_state[key] = min(max(st.session_state.get(key, 1), 1), total_pages)
+    
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        page_num = st.slider("Select page:", min_value=1, max_value=total_pages, value=1)
+        page_num = st.slider("Select page:", min_value=1, max_value=max(total_pages, 2), key=key)
     
     with col2:
-        prev_button = st.button("Previous Page")
-        next_button = st.button("Next Page")
-    
-    # Handle navigation
-    if prev_button and page_num > 1:
-        page_num -= 1
-    elif next_button and page_num < total_pages:
-        page_num += 1
+        st.button("Previous Page", on_click=_step_page, args=(key, -1, total_pages))
+        st.button("Next Page", on_click=_step_page, args=(key, 1, total_pages))
     
     # Display the selected page
     st.markdown("### Document Page")
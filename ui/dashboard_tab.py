@@ -1,20 +1,7 @@
 import streamlit as st
 from modules.visualization import create_financial_dashboard
-from modules.qa_chain import create_qa_chain, generate_financial_insights
-from modules.data_extraction import extract_standardized_financials
-
-def extract_text_from_response(response_obj):
-    """Helper function to extract text from response object"""
-    if isinstance(response_obj, dict):
-        if 'result' in response_obj:
-            return response_obj['result']
-        else:
-            return response_obj.get('answer',
-                       response_obj.get('output_text',
-                       response_obj.get('output',
-                       str(response_obj))))
-    else:
-        return str(response_obj)
+from modules.qa_chain import generate_financial_insights
+from modules.precompute import get_standard_metrics
 
 def render_dashboard_tab():
     """Render the financial dashboard tab"""
@@ -29,13 +16,8 @@ def render_dashboard_tab():
         
         if st.button("Generate Dashboard Insights"):
             with st.spinner("Generating AI-powered insights..."):
-                # Combine all extracted data for analysis
-                current_doc_data = st.session_state.processed_docs[st.session_state.current_doc]
-                qa_chain = create_qa_chain(current_doc_data['vectorstore'])
-                
-                # Updated to use invoke() and handle the response properly
-                insights_obj = generate_financial_insights(qa_chain, st.session_state.extracted_data)
-                insights = extract_text_from_response(insights_obj)
+                # All documents' metrics go to the LLM as one compact table (no retrieval across documents)
+                insights = generate_financial_insights(st.session_state.extracted_data)
                 
                 st.markdown(insights)
     else:
@@ -44,8 +26,8 @@ def render_dashboard_tab():
         if st.button("Extract Data for Dashboard"):
             with st.spinner("Extracting standardized financial data..."):
                 current_doc_data = st.session_state.processed_docs[st.session_state.current_doc]
-                qa_chain = create_qa_chain(current_doc_data['vectorstore'])
-                extracted_data = extract_standardized_financials(qa_chain, current_doc_data['info']['type'])
+                extracted_data = get_standard_metrics(current_doc_data['vectorstore'], current_doc_data.get('content_hash'),
+                                                      current_doc_data['info']['type'], current_doc_data['path'])
                 
                 # Store for future use
                 if st.session_state.current_doc not in st.session_state.extracted_data:
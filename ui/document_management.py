@@ -2,8 +2,13 @@ import streamlit as st
 import os
 import pandas as pd
 import glob
+import time
 from modules.document_processor import process_single_document, process_document_folder
 from modules.document_analyzer import detect_document_type
+from modules.document_registry import get_session_id
+from modules.jobs import get_job_manager, ingest_files_job
+from ui.job_status import render_job_status
+from ui.components import create_page_navigator
 from config import DEFAULT_SINGLE_DOC_PATH, DEFAULT_FOLDER_PATH
 
 def render_document_management():
@@ -18,6 +23,9 @@ def render_document_management():
     else:
         render_folder_mode()
     
+    # Progress of ingest jobs running in the background
+    render_job_status(['ingest', 'precompute'], "ingest")
+    
     # Document selection (only show if we have processed documents)
     if st.session_state.processed_docs:
         st.subheader("Select Document to Analyze")
@@ -31,6 +39,55 @@ def render_document_management():
         if selected_doc != st.session_state.current_doc:
             st.session_state.current_doc = selected_doc
             st.success(f"Switched to document: {selected_doc}")
+        
+        # Full-text search across documents and a browser to jump to the hits
+        render_document_search()
+        
+        if st.checkbox("Show document browser", key="show_document_browser"):
+            current_doc_data = st.session_state.processed_docs[st.session_state.current_doc]
+            create_page_navigator(current_doc_data['path'], current_doc_data['pages'])
+
+def render_document_search():
+    """Render corpus-wide page search with snippets and page jumps"""
+    from modules.search_index import get_search_index
+    
+    st.subheader("Search Documents")
+    query = st.text_input(
+        "Search page text:", key="page_search_query",
+        help='Use quotes for phrases and a trailing * for prefixes, e.g. "goodwill impairment" amortiz*'
+    )
+    search_all = st.checkbox("Include documents outside this workspace", key="page_search_all")
+    if not query:
+        return
+    
+    names_by_hash = {doc_data.get('content_hash'): name for name, doc_data in st.session_state.processed_docs.items()}
+    content_hashes = None if search_all else [h for h in names_by_hash if h]
+    
+    start_time = time.perf_counter()
+    try:
+        hits = get_search_index().search(query, content_hashes=content_hashes)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    st.caption(f"{len(hits)} matching page(s) in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+    
+    for i, hit in enumerate(hits):
+        col1, col2 = st.columns([5, 1])
+        # Escape $ so amounts are not rendered as LaTeX
+        snippet = hit['snippet'].replace('$', '\\$')
+        with col1:
+            st.markdown(f"**{hit['label']}**, page {hit['page']}: {snippet}")
+        doc_name = names_by_hash.get(hit['content_hash'])
+        if doc_name:
+            with col2:
+                st.button("Open page", key=f"page_search_open_{i}", on_click=open_search_hit, args=(doc_name, hit['page']))
+
+def open_search_hit(doc_name, page):
+    """Switch to a search hit's document and show its page in the browser"""
+    # Runs as a button callback, before the selector and browser widgets are created
+    st.session_state.current_doc = doc_name
+    st.session_state.browser_page = page
+    st.session_state.show_document_browser = True
 
 def render_single_file_mode():
     """Render single file mode UI"""
@@ -54,8 +111,15 @@ def render_single_file_mode():
         if doc_info['year']:
             st.info(f"Year: {doc_info['year']}")
         
+        run_in_background = st.checkbox("Run in background", key="single_file_background",
+                                        help="Keep using the app while the document is processed")
+        
         # Process the document button
         if st.button("Process Document"):
+            if run_in_background:
+                submit_ingest_job([file_path], f"Process {file_name}")
+                return
+            
             result = process_single_document(file_path)
             
             if result:
@@ -66,6 +130,7 @@ def render_single_file_mode():
                     file_name: {
                         'path': file_path,
                         'vectorstore': vectorstore,
+                        'content_hash': vectorstore.content_hash,
                         'info': file_info,
                         'pages': num_pages,
                         'index': doc_index
@@ -103,8 +168,15 @@ def render_folder_mode():
                 file_size = os.path.getsize(pdf) / (1024 * 1024)  # Convert to MB
                 st.write(f"- {file_name} ({file_size:.2f} MB)")
         
+        run_in_background = st.checkbox("Run in background", key="folder_background",
+                                        help="Keep using the app while the folder is processed")
+        
         # Process all documents button
         if st.button("Process All Documents"):
+            if run_in_background:
+                submit_ingest_job(pdf_files, f"Process {len(pdf_files)} files from {os.path.basename(os.path.normpath(folder_path))}")
+                return
+            
             processed_docs = process_document_folder(folder_path)
             
             if processed_docs:
@@ -129,4 +201,13 @@ def render_folder_mode():
                 summary_df = pd.DataFrame(summary_data)
                 st.dataframe(summary_df)
     else:
-        st.error(f"Folder not found: {folder_path}")
\ No newline at end of file
+        st.error(f"Folder not found: {folder_path}")
+
+def submit_ingest_job(file_paths, label):
+    """Queue PDFs for background processing"""
+    if not file_paths:
+        st.error("No PDF files to process")
+        return
+    params = {'file_paths': file_paths, 'profile': st.session_state.get('profile_enabled', False)}
+    get_job_manager().submit('ingest', ingest_files_job, params, label=label, session_id=get_session_id())
+    st.success("Queued for background processing. Progress is shown under Background Jobs.")
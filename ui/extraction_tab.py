@@ -1,9 +1,14 @@
 import streamlit as st
 import re
 import pandas as pd
-from modules.qa_chain import create_qa_chain, cross_check_data
-from modules.data_extraction import extract_standardized_financials, extract_table_data
+from modules.qa_chain import create_qa_chain, verify_financial_data, provenance_from_docs
+from modules.data_extraction import extract_table_data
+from modules.document_registry import get_session_id
+from modules.jobs import get_job_manager, extract_metrics_job
+from modules.verification import verify_extracted_metrics, annotate_metrics
+from modules.precompute import get_standard_metrics
 from ui.components import display_confidence, display_source_page
+from ui.job_status import render_job_status
 from config import EXTRACTION_TEMPLATES
 
 def extract_text_from_response(response_obj):
@@ -73,23 +78,41 @@ def render_extraction_tab():
             st.write("### Extracted Data")
             st.write(response_text)
             
-            # Add source verification
-            mentioned_pages = re.findall(r"Page (\d+)", response_text)
-            if mentioned_pages:
-                display_source_page(current_doc_data['path'], mentioned_pages)
+            # Add source verification from the chunks the answer was based on
+            provenance = provenance_from_docs(response_obj.get('source_documents', []))
+            if provenance:
+                display_source_page(current_doc_data['path'], provenance=provenance)
     
     # Standardized extraction
     st.subheader("Extract Standardized Financial Data")
     st.markdown("Extract key financial metrics in a standardized format for analysis and comparison.")
     
-    if st.button("Extract Standard Metrics"):
+    run_in_background = st.checkbox("Run in background", key="extract_background",
+                                    help="Keep using the app while metrics are extracted")
+    
+    extract_clicked = st.button("Extract Standard Metrics")
+    if extract_clicked and run_in_background:
+        get_job_manager().submit(
+            'extract', extract_metrics_job,
+            {
+                'doc_name': st.session_state.current_doc,
+                'content_hash': current_doc_data['content_hash'],
+                'doc_type': current_doc_data['info']['type'],
+                'file_path': current_doc_data['path']
+            },
+            label=f"Extract metrics from {st.session_state.current_doc}",
+            session_id=get_session_id()
+        )
+        st.success("Queued for background extraction. Results are added to extracted data when the job finishes.")
+    elif extract_clicked:
         with st.spinner("Extracting standardized financial data..."):
-            qa_chain = create_qa_chain(current_doc_data['vectorstore'])
-            extracted_data = extract_standardized_financials(qa_chain, current_doc_data['info']['type'])
+            # Served from the answer cache when precomputed; otherwise every value is extracted,
+            # checked against the page text around its claimed page (no LLM calls) and cached
+            extracted_data = get_standard_metrics(current_doc_data['vectorstore'], current_doc_data.get('content_hash'),
+                                                  current_doc_data['info']['type'], current_doc_data['path'])
             
-            # Store for future use
-            if st.session_state.current_doc not in st.session_state.extracted_data:
-                st.session_state.extracted_data[st.session_state.current_doc] = extracted_data
+            # Store for future use (replacing any values the comparison matrix added for these metrics)
+            st.session_state.extracted_data.setdefault(st.session_state.current_doc, {}).update(extracted_data)
             
             # Display as a table
             st.write("### Standardized Financial Data")
@@ -102,7 +125,9 @@ def render_extraction_tab():
                     'Value': details['value'],
                     'Period': details['period'],
                     'Page': details['page'],
-                    'Confidence': details['confidence']
+                    'Confidence': details['confidence'],
+                    'Verified': details.get('verified'),
+                    'Statement Years': ", ".join(str(year) for year, _ in details.get('series', []))
                 })
             
             df = pd.DataFrame(data_rows)
@@ -117,6 +142,13 @@ def render_extraction_tab():
                 mime="text/csv"
             )
     
+    # Progress of extraction jobs running in the background
+    render_job_status(['extract'], "extract")
+    
+    # Check extracted values against the document text
+    if st.session_state.current_doc in st.session_state.extracted_data:
+        render_metric_verification(current_doc_data)
+    
     # Table extraction
     st.subheader("Extract Financial Tables")
     st.markdown("Extract complete tables from financial statements.")
@@ -139,4 +171,48 @@ def render_extraction_tab():
             # Add source verification
             mentioned_pages = re.findall(r"Page (\d+)", table_data)
             if mentioned_pages:
-                display_source_page(current_doc_data['path'], mentioned_pages)
\ No newline at end of file
+                display_source_page(current_doc_data['path'], mentioned_pages)
+
+VERIFICATION_LABELS = {
+    'verified': "✅ Verified",
+    'number_only': "⚠️ Number found without label",
+    'other_pages': "⚠️ Found on other pages",
+    'not_found': "❌ Not found",
+    'no_value': "— No value"
+}
+
+def render_metric_verification(current_doc_data):
+    """Verify extracted metrics against page text, asking the LLM only about failures"""
+    st.subheader("Verify Extracted Metrics")
+    st.markdown("Look up each value near its cited page in the document text.")
+    
+    use_llm = st.checkbox("Ask the LLM about values that cannot be verified locally", key="verify_llm_fallback")
+    if not st.button("Verify Metrics"):
+        return
+    
+    metrics = st.session_state.extracted_data[st.session_state.current_doc]
+    llm_fallback = None
+    if use_llm:
+        qa_chain = create_qa_chain(current_doc_data['vectorstore'])
+        
+        def llm_fallback(metric, details):
+            return verify_financial_data(qa_chain, f"{metric}: {details['value']}", details['value'])
+    
+    with st.spinner("Verifying metrics..."):
+        results = verify_extracted_metrics(current_doc_data.get('content_hash'), metrics, current_doc_data['path'], llm_fallback)
+    annotate_metrics(metrics, results)
+    
+    st.dataframe(pd.DataFrame([{
+        'Metric': metric,
+        'Value': metrics[metric]['value'],
+        'Cited Page': metrics[metric]['page'],
+        'Result': VERIFICATION_LABELS[result['status']],
+        'Found On': ", ".join(str(p) for p in sorted({m['page'] for m in result['matches']})),
+        'Other Pages': ", ".join(str(p) for p in result['other_pages'][:5]),
+        'Context': result['matches'][0]['text'] if result['matches'] else ""
+    } for metric, result in results.items()]))
+    
+    for metric, result in results.items():
+        if result.get('llm_response'):
+            with st.expander(f"LLM check: {metric}"):
+                st.write(result['llm_response'])
@@ -0,0 +1,56 @@
+import streamlit as st
+import time
+from modules.jobs import get_job_manager, apply_job_result, ACTIVE_STATUSES
+from modules.document_registry import get_session_id
+from ui.profile_view import render_profile_summary
+
+STATUS_ICONS = {
+    'queued': '⏳',
+    'running': '🔄',
+    'succeeded': '✅',
+    'failed': '❌',
+    'cancelled': '⛔'
+}
+
+def render_job_status(kinds, key_prefix):
+    """Render progress of background jobs with refresh, cancel and load controls"""
+    manager = get_job_manager()
+    session_id = get_session_id()
+    jobs = manager.list_jobs(kinds=kinds)
+    if not jobs:
+        return
+
+    st.subheader("Background Jobs")
+    show_all = st.checkbox("Show jobs from other sessions", key=f"{key_prefix}_show_all_jobs")
+    if not show_all:
+        jobs = [j for j in jobs if j['session_id'] == session_id]
+
+    active = sum(1 for j in jobs if j['status'] in ACTIVE_STATUSES)
+    col1, col2 = st.columns([1, 4])
+    with col1:
+        st.button("Refresh", key=f"{key_prefix}_refresh_jobs")
+    with col2:
+        if active:
+            st.caption(f"{active} job(s) in progress. Keep working in other tabs and refresh to see updates.")
+
+    applied = st.session_state.setdefault('applied_jobs', set())
+    for job in jobs[:10]:
+        st.markdown(f"{STATUS_ICONS.get(job['status'], '')} **{job['label']}** — {job['message']}")
+
+        if job['status'] in ACTIVE_STATUSES:
+            st.progress(min(max(job['progress'], 0.0), 1.0))
+            if st.button("Cancel", key=f"{key_prefix}_cancel_{job['id']}"):
+                manager.cancel(job['id'])
+                st.rerun()
+        elif job['status'] == 'failed':
+            st.error(f"Error: {job['error']}")
+        elif job['status'] == 'succeeded':
+            elapsed = (job['finished_at'] or time.time()) - (job['started_at'] or job['created_at'])
+            st.caption(f"Finished in {elapsed:.1f} s")
+            if job['result'].get('profile'):
+                with st.expander("Profile"):
+                    render_profile_summary(job['result']['profile'])
+            # Results from other (e.g. reloaded) sessions can be pulled in on demand
+            if job['id'] not in applied and st.button("Load results", key=f"{key_prefix}_load_{job['id']}"):
+                apply_job_result(st.session_state, job)
+                st.rerun()
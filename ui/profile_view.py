@@ -0,0 +1,18 @@
+import streamlit as st
+
+def render_profile_summary(profile, container=st):
+    """Show the hotspots and memory use from a profile_block result"""
+    container.caption(
+        f"{profile['name']}: {profile['duration']:.2f} s, peak traced memory {profile['peak_memory_mb']:.1f} MB"
+    )
+    container.table([
+        {
+            'Function': row['function'],
+            'Calls': row['calls'],
+            'Self (ms)': round(row['self_s'] * 1000, 1),
+            'Cumulative (ms)': round(row['cumulative_s'] * 1000, 1)
+        }
+        for row in profile['hotspots']
+    ])
+    container.caption(f"pstats: {profile['pstats_path']}")
+    container.caption(f"Flame graph input: {profile['collapsed_path']}")
@@ -0,0 +1,142 @@
+"""Import-time report broken down by subsystem.
+
+Runs each scenario in a fresh interpreter with ``-X importtime`` and sums the
+self time of every imported module into the subsystem that owns it, so cold
+start can be tracked as a regression metric:
+
+    python -m utils.import_report
+    python -m utils.import_report --json import_times.json
+    python -m utils.import_report --baseline import_times.json --max-regression 20
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What the first paint pays for versus everything the tabs eventually need
+SCENARIOS = {
+    'cold_start': "import app",
+    'all_tabs': "import app; " + "; ".join(f"import {m}" for m in [
+        'ui.document_management', 'ui.analysis_tab', 'ui.extraction_tab',
+        'ui.comparison_tab', 'ui.dashboard_tab'
+    ])
+}
+
+# Top-level package prefixes mapped to the subsystem they belong to
+SUBSYSTEM_PREFIXES = [
+    ('app', ('app', 'config', 'ui', 'modules', 'utils')),
+    ('streamlit', ('streamlit', 'tornado', 'altair', 'pyarrow', 'pydeck', 'watchdog')),
+    ('llm', ('langchain', 'langchain_core', 'langchain_google_genai', 'langsmith', 'google',
+             'grpc', 'proto', 'pydantic', 'pydantic_core', 'openai', 'tiktoken')),
+    ('vector index', ('faiss',)),
+    ('pdf', ('fitz', 'PyMuPDF', 'pypdf')),
+    ('dataframes', ('numpy', 'pandas', 'pytz', 'dateutil')),
+    ('plotting', ('plotly', 'matplotlib', 'seaborn')),
+]
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def subsystem_for(module_name):
+    """Map a module name to the subsystem that owns it"""
+    top_level = module_name.split('.')[0]
+    for subsystem, prefixes in SUBSYSTEM_PREFIXES:
+        if top_level in prefixes:
+            return subsystem
+    return 'other'
+
+def parse_importtime(stderr_text):
+    """Sum self import time (in ms) per subsystem from -X importtime output
+
+    Each module is charged to the subsystem of the outermost non-app module
+    that pulled it in, so transitive dependencies (e.g. SQLAlchemy loaded by
+    LangChain) count against the subsystem that caused them.
+    """
+    entries = []
+    for line in stderr_text.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            entries.append((depth, match.group(4), int(match.group(1))))
+
+    # importtime prints children before parents, so walk it backwards to see parents first
+    totals = {}
+    chain = []
+    for depth, module_name, self_us in reversed(entries):
+        del chain[depth:]
+        chain.append(module_name)
+        owner = next((subsystem_for(m) for m in chain if subsystem_for(m) != 'app'), 'app')
+        totals[owner] = totals.get(owner, 0.0) + self_us / 1000
+    return totals
+
+def measure_scenario(code, repeats=3):
+    """Run a scenario in fresh interpreters and keep the fastest total"""
+    best = None
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT_DIR, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Scenario failed: {code}\n{result.stderr[-2000:]}")
+        totals = parse_importtime(result.stderr)
+        if best is None or sum(totals.values()) < sum(best.values()):
+            best = totals
+    return best
+
+def build_report(repeats=3):
+    """Measure every scenario"""
+    report = {}
+    for name, code in SCENARIOS.items():
+        by_subsystem = measure_scenario(code, repeats)
+        report[name] = {
+            'total_ms': round(sum(by_subsystem.values()), 1),
+            'subsystems_ms': {k: round(v, 1) for k, v in sorted(by_subsystem.items(), key=lambda kv: -kv[1])}
+        }
+    return report
+
+def compare_to_baseline(report, baseline, max_regression_pct):
+    """Return scenarios whose total import time regressed beyond the allowed percentage"""
+    regressions = []
+    for name, result in report.items():
+        if name not in baseline:
+            continue
+        previous = baseline[name]['total_ms']
+        if previous and (result['total_ms'] - previous) / previous * 100 > max_regression_pct:
+            regressions.append((name, previous, result['total_ms']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import time by subsystem")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreter runs per scenario")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previously written JSON report")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="Allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.repeats)
+
+    for name, result in report.items():
+        print(f"{name}: {result['total_ms']:.1f} ms")
+        for subsystem, ms in result['subsystems_ms'].items():
+            print(f"  {subsystem:<14} {ms:>9.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.max_regression)
+        for name, previous, current in regressions:
+            print(f"REGRESSION {name}: {previous:.1f} ms -> {current:.1f} ms")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
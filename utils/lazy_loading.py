@@ -0,0 +1,62 @@
+import time
+import importlib
+import threading
+
+# Modules behind each tab, in the order they are likely to be needed
+TAB_MODULES = [
+    'ui.document_management',
+    'ui.analysis_tab',
+    'ui.extraction_tab',
+    'ui.comparison_tab',
+    'ui.dashboard_tab'
+]
+
+# Third-party dependencies grouped by subsystem
+SUBSYSTEM_MODULES = {
+    'llm': ['langchain.chains', 'langchain_google_genai', 'google.generativeai'],
+    'vector index': ['faiss', 'langchain.vectorstores'],
+    'pdf': ['fitz'],
+    'dataframes': ['numpy', 'pandas'],
+    'plotting': ['plotly.express', 'plotly.graph_objects']
+}
+
+_load_times = {}
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+def load_attribute(module_name, attribute):
+    """Import a module on first use and return one of its attributes"""
+    if module_name not in _load_times:
+        start_time = time.perf_counter()
+        module = importlib.import_module(module_name)
+        _load_times[module_name] = time.perf_counter() - start_time
+    else:
+        module = importlib.import_module(module_name)
+    return getattr(module, attribute)
+
+def _warm_up(module_names):
+    """Import modules one after another, ignoring failures"""
+    for module_name in module_names:
+        try:
+            start_time = time.perf_counter()
+            importlib.import_module(module_name)
+            _load_times.setdefault(module_name, time.perf_counter() - start_time)
+        except Exception:
+            # Warm-up is best effort; the real import will surface any error
+            pass
+
+def start_background_warmup(module_names=None):
+    """Preload heavy modules in a daemon thread, once per process"""
+    global _warmup_thread
+    if module_names is None:
+        module_names = [m for modules in SUBSYSTEM_MODULES.values() for m in modules] + TAB_MODULES
+
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm_up, args=(module_names,), name="import-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+def module_load_times():
+    """Seconds spent on the first import of each lazily loaded module"""
+    return dict(_load_times)
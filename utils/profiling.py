@@ -0,0 +1,169 @@
+"""On-demand cProfile + tracemalloc profiling for reruns and background jobs.
+
+    with profile_block('rerun', enabled) as profile:
+        main()
+    profile['hotspots']  # filled in once the block exits
+
+Each profile is written to the profile directory as a .pstats file (for
+snakeviz / pstats), a .collapsed file (for flamegraph.pl or speedscope) and a
+.memory.txt allocation summary; only the most recent profiles are kept.
+"""
+import os
+import io
+import glob
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from config import PROFILE_DIR, PROFILE_KEEP, PROFILE_TOP_N
+
+_local = threading.local()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+def _start_tracemalloc():
+    # tracemalloc is process-wide, so overlapping profiles share one session
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+
+def _stop_tracemalloc():
+    """Take a snapshot and stop tracing once the last profile using it finishes"""
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+    return snapshot, peak
+
+@contextmanager
+def profile_block(name, enabled=True, top_n=PROFILE_TOP_N, profile_dir=PROFILE_DIR):
+    """Profile the enclosed code when enabled; yields a dict filled with results on exit
+
+    When disabled (or when already inside a profiled block on this thread) it
+    yields None and adds no instrumentation.
+    """
+    if not enabled or getattr(_local, 'active', False):
+        yield None
+        return
+
+    result = {'name': name}
+    profiler = cProfile.Profile()
+    _local.active = True
+    _start_tracemalloc()
+    start_time = time.perf_counter()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        duration = time.perf_counter() - start_time
+        snapshot, peak = _stop_tracemalloc()
+        _local.active = False
+        result.update(_save_profile(name, profiler, snapshot, peak, duration, top_n, profile_dir))
+
+def _save_profile(name, profiler, snapshot, peak, duration, top_n, profile_dir):
+    """Write pstats, collapsed stacks and memory summary, and return the inline summary"""
+    os.makedirs(profile_dir, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() or c in '-_' else '_' for c in name)
+    base_path = os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{safe_name}")
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.dump_stats(base_path + ".pstats")
+    with open(base_path + ".collapsed", "w") as f:
+        for stack, micros in collapsed_stacks(stats):
+            f.write(f"{stack} {micros}\n")
+
+    memory_top = [
+        {
+            'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_kb': stat.size / 1024,
+            'count': stat.count
+        }
+        for stat in snapshot.statistics('lineno')[:top_n]
+    ]
+    with open(base_path + ".memory.txt", "w") as f:
+        f.write(f"peak traced memory: {peak / (1024 * 1024):.1f} MB\n")
+        for entry in memory_top:
+            f.write(f"{entry['size_kb']:>12.1f} KB {entry['count']:>8} blocks  {entry['location']}\n")
+
+    rotate_profiles(profile_dir)
+    return {
+        'duration': duration,
+        'peak_memory_mb': peak / (1024 * 1024),
+        'pstats_path': base_path + ".pstats",
+        'collapsed_path': base_path + ".collapsed",
+        'hotspots': hotspots(stats, top_n),
+        'memory_top': memory_top
+    }
+
+def _label(func):
+    filename, lineno, function_name = func
+    if filename == '~':
+        return function_name  # Built-ins such as <built-in method time.sleep>
+    return f"{os.path.basename(filename)}:{lineno}({function_name})"
+
+def hotspots(stats, top_n=PROFILE_TOP_N):
+    """Functions with the most self time"""
+    rows = []
+    for func, (_, calls, self_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            'function': _label(func),
+            'calls': calls,
+            'self_s': self_time,
+            'cumulative_s': cumulative_time
+        })
+    rows.sort(key=lambda r: r['self_s'], reverse=True)
+    return rows[:top_n]
+
+def collapsed_stacks(stats, max_depth=64, min_micros=1):
+    """Approximate collapsed stacks ("a;b;c <microseconds>") from cProfile's caller graph
+
+    cProfile only keeps caller->callee edges, so time below a function that is
+    reached from several paths is split across them in proportion to each
+    edge's cumulative time.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, edge_cumulative))
+
+    lines = {}
+
+    def walk(func, path, weight):
+        _, _, self_time, cumulative_time, _ = stats.stats[func]
+        micros = int(self_time * weight * 1e6)
+        if micros >= min_micros:
+            stack = ";".join(_label(f) for f in path)
+            lines[stack] = lines.get(stack, 0) + micros
+        if len(path) >= max_depth:
+            return
+        for callee, edge_cumulative in callees.get(func, []):
+            if callee in path or callee not in stats.stats:
+                continue  # Recursion is folded into the first frame
+            callee_cumulative = stats.stats[callee][3]
+            if callee_cumulative <= 0:
+                continue
+            callee_weight = weight * edge_cumulative / callee_cumulative
+            if callee_cumulative * callee_weight * 1e6 >= min_micros:
+                walk(callee, path + [callee], callee_weight)
+
+    roots = [func for func, (_, _, _, _, callers) in stats.stats.items() if not callers]
+    for root in roots:
+        walk(root, [root], 1.0)
+    return sorted(lines.items())
+
+def rotate_profiles(profile_dir=PROFILE_DIR, keep=PROFILE_KEEP):
+    """Delete all but the newest `keep` profiles"""
+    profiles = sorted(glob.glob(os.path.join(profile_dir, "*.pstats")))
+    for old_profile in profiles[:-keep] if keep else profiles:
+        base_path = old_profile[:-len(".pstats")]
+        for suffix in (".pstats", ".collapsed", ".memory.txt"):
+            if os.path.exists(base_path + suffix):
+                os.remove(base_path + suffix)